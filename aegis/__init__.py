@@ -0,0 +1,63 @@
+"""
+Project Aegis - 风控中台核心引擎
+app.py 只负责渲染, 数据生成与计算逻辑放在这里
+
+公开名称按需导入 (PEP 562): `import aegis.snapshot` 或 `from aegis import ShopSnapshot`
+只加载用到的子模块, 不会连带导入 plotly / Faker / requests 等重依赖
+"""
+
+import importlib
+
+# 公开名称 -> 所在子模块
+_EXPORTS = {
+    'generate_shop_frame': 'aegis.datagen',
+    'generate_shop_arrays': 'aegis.datagen',
+    'generate_fleet': 'aegis.datagen',
+    'generate_sps_history': 'aegis.datagen',
+    'generate_daily_history': 'aegis.datagen',
+    'build_name_pool': 'aegis.datagen',
+    'RngStreams': 'aegis.rng',
+    'enforce_shop_schema': 'aegis.schema',
+    'flag': 'aegis.schema',
+    'format_shop_ids': 'aegis.schema',
+    'memory_report': 'aegis.schema',
+    'ShopSnapshot': 'aegis.snapshot',
+    'SpsForecast': 'aegis.forecast',
+    'GridIndex': 'aegis.logistics',
+    'LogisticsNetwork': 'aegis.logistics',
+    'FleetAnomalyDetector': 'aegis.anomaly',
+    'AnomalyMonitor': 'aegis.anomaly',
+    'SnapshotRefresher': 'aegis.refresh',
+    'AlertDispatcher': 'aegis.alerts',
+    'StreamingBreaker': 'aegis.breaker',
+    'RoasRollup': 'aegis.rollup',
+    'is_circuit_breaker': 'aegis.breaker',
+    'KeywordMatcher': 'aegis.reviews',
+    'classify_review': 'aegis.reviews',
+    'ReviewCache': 'aegis.review_cache',
+    'triage_reviews': 'aegis.triage',
+    'RenderTimer': 'aegis.timing',
+    'EscalationService': 'aegis.escalation',
+    'EscalationTier': 'aegis.escalation',
+    'analyze_review': 'aegis.escalation',
+    'ReviewFeed': 'aegis.feed',
+    'ReviewProducer': 'aegis.feed',
+    'FigureCache': 'aegis.figures',
+    'lttb': 'aegis.downsample',
+    'minmax_buckets': 'aegis.downsample',
+    'density_sample': 'aegis.downsample',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value  # 之后直接命中模块字典
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
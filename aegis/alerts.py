@@ -0,0 +1,304 @@
+"""
+告警通知管道: P0 店铺 (sps_score < 3.5) 与 Smart+ 熔断触发
+- 只对状态切换告警 (正常 -> P0, 未熔断 -> 熔断), 持续处于 P0 的店铺不会在每次刷新 / 重跑时重复告警
+- 同一店铺 / 广告计划 cooldown 秒内只发一次 (去重 + 限流)
+- 后台线程常驻一个事件循环: submit() 只做一次线程安全投递就返回, 不阻塞刷新线程或 Streamlit 脚本线程;
+  告警攒 batch_window 秒 (或满 max_batch 条) 合并成一批, 信号量限制在途批次数
+- 发送端可插拔: 任何带 async send(batch) 的对象; 自带 JSONL 文件 / HTTP webhook / 内存三种
+- 记录端到端延迟 (检测 -> 发送完成) 与单次发送耗时的 p50 / p99
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from aegis.breaker import TRIP
+from aegis.escalation import LatencyRecorder, TTLCache
+from aegis.schema import SHOP_ID_FORMAT
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALERT_LOG = os.getenv('AEGIS_ALERT_LOG', os.path.join(tempfile.gettempdir(), 'aegis_alerts.jsonl'))
+
+SHOP_CRITICAL = 'shop_critical'
+BREAKER_TRIP = 'breaker_trip'
+FLEET_CAMPAIGN = 'smart_plus'  # 看板上的 ROAS 时序是全店 Smart+ 汇总, 当作一个广告计划
+
+
+# ---------- 状态切换检测 ----------
+
+def shop_alerts(previous, current, detected_at=None):
+    """两个快照版本之间新进入 P0 的店铺 (含新出现且已是 P0 的店铺)"""
+    if previous is current or previous.version == current.version:
+        return []
+    was = previous.flag('is_critical')
+    old_ids = previous.column('shop_id')
+    if previous.n_shops <= current.n_shops and np.array_equal(old_ids, current.column('shop_id')[:previous.n_shops]):
+        # upsert 不移动已有行, 按位置比对即可
+        before = np.zeros(current.n_shops, dtype=bool)
+        before[:previous.n_shops] = was
+    else:
+        before = current.align(old_ids, was, fill=False)[0]
+    rows = np.flatnonzero(current.flag('is_critical') & ~before)
+    if len(rows) == 0:
+        return []
+
+    detected_at = time.time() if detected_at is None else detected_at
+    regions = current.categories('region')[current.column('region')[rows]]
+    return [
+        {'kind': SHOP_CRITICAL, 'key': SHOP_ID_FORMAT % shop_id, 'shop_id': shop_id, 'region': region,
+         'sps_score': round(sps, 2), 'detected_at': detected_at}
+        for shop_id, region, sps in zip(current.column('shop_id')[rows].tolist(), regions,
+                                        current.column('sps_score')[rows].tolist())
+    ]
+
+
+def roas_alerts(previous, current, campaign=FLEET_CAMPAIGN, detected_at=None):
+    """新追加的 ROAS 小时里由未熔断变为熔断的点"""
+    if len(current) == 0:
+        return []
+    if len(previous):
+        last = previous['timestamp'].iloc[-1]
+        new = current[current['timestamp'] > last]
+        prior = bool(previous['is_circuit_breaker'].iloc[-1])
+    else:
+        new, prior = current, False
+    if len(new) == 0:
+        return []
+    tripped = new['is_circuit_breaker'].to_numpy(dtype=bool)
+    edges = np.flatnonzero(tripped & ~np.r_[prior, tripped[:-1]])
+
+    detected_at = time.time() if detected_at is None else detected_at
+    return [
+        {'kind': BREAKER_TRIP, 'key': f"campaign:{campaign}", 'campaign': campaign,
+         'timestamp': str(new['timestamp'].iloc[i]), 'roas': round(float(new['roas'].iloc[i]), 3),
+         'spend_velocity': round(float(new['spend_velocity'].iloc[i]), 2), 'detected_at': detected_at}
+        for i in edges
+    ]
+
+
+def breaker_alerts(transitions, detected_at=None):
+    """StreamingBreaker.ingest 返回的状态切换 (TRANSITION_DTYPE) 中的熔断事件"""
+    trips = transitions[transitions['kind'] == TRIP]
+    detected_at = time.time() if detected_at is None else detected_at
+    return [
+        {'kind': BREAKER_TRIP, 'key': f"campaign:{campaign}", 'campaign': campaign, 'ts': ts,
+         'roas': round(roas, 3), 'spend_velocity': round(velocity, 2), 'detected_at': detected_at}
+        for ts, campaign, roas, velocity in zip(trips['ts'].tolist(), trips['campaign'].tolist(),
+                                                trips['roas'].tolist(), trips['velocity'].tolist())
+    ]
+
+
+# ---------- 发送端 ----------
+
+class FileSink:
+    """每批追加到 JSONL 文件 (本地调试 / 测试), 写盘放到线程池, 不占事件循环"""
+
+    def __init__(self, path=DEFAULT_ALERT_LOG):
+        self.path = path
+
+    async def send(self, batch):
+        await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch):
+        lines = ''.join(json.dumps(alert, ensure_ascii=False, default=str) + '\n' for alert in batch)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
+
+class HttpSink:
+    """整批 POST 到 webhook ({"alerts": [...]}), 复用连接"""
+
+    def __init__(self, url, timeout=10):
+        import requests  # 只有配置了 webhook 才需要
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    async def send(self, batch):
+        await asyncio.to_thread(self._post, batch)
+
+    def _post(self, batch):
+        body = json.dumps({'alerts': batch}, ensure_ascii=False, default=str).encode()
+        response = self.session.post(self.url, data=body, timeout=self.timeout,
+                                     headers={'Content-Type': 'application/json'})
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
+class MemorySink:
+    """留在内存里 (测试 / 压测用), delay 模拟下游耗时"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    async def send(self, batch):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.batches.append(batch)
+
+    @property
+    def alerts(self):
+        return [alert for batch in self.batches for alert in batch]
+
+
+# ---------- 分发 ----------
+
+class AlertDispatcher:
+    """去重限流 + 微批发送; 后台线程常驻一个事件循环, 公开方法可在任意线程调用
+
+    内部状态只在事件循环线程里修改, 不加锁. 待发送队列超过 max_pending 时丢弃最旧的告警并计数;
+    发送失败按 retries 次重试 (指数退避), 仍失败只计数, 不阻塞后续批次.
+    """
+
+    def __init__(self, sink, batch_window=1.0, max_batch=1000, cooldown=600, max_inflight=4,
+                 max_pending=100_000, retries=2, max_keys=1_000_000):
+        self.sink = sink
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.cooldown = cooldown
+        self.retries = retries
+        self._recent = TTLCache(max_keys, cooldown)  # key -> 上次告警时间, 过期即可再次告警
+        self._pending = deque(maxlen=max_pending)
+        self._tasks = set()
+        self.latency = LatencyRecorder()
+        self.send_latency = LatencyRecorder()
+        self.last_alert = None
+
+        self.received = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.sent = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_error = None
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='alert-dispatcher', daemon=True)
+        self._thread.start()
+        self._run(self._start(max_inflight))
+
+    async def _start(self, max_inflight):
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self._ready = asyncio.Event()  # 有待发送的告警
+        self._full = asyncio.Event()   # 攒满一批, 不必等窗口结束
+        self._batcher = asyncio.create_task(self._batch_loop())
+
+    def _run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    # ---------- 入口 ----------
+
+    def submit(self, alerts):
+        """投递一批告警 (dict 列表, 需含 key / detected_at), 立即返回"""
+        if alerts:
+            self._loop.call_soon_threadsafe(self._enqueue, alerts)
+
+    def observe(self, previous, current):
+        """SnapshotRefresher.subscribe 的回调: 比对前后两个版本, 投递状态切换"""
+        detected_at = time.time()
+        self.submit(shop_alerts(previous[0], current[0], detected_at)
+                    + roas_alerts(previous[1], current[1], detected_at=detected_at))
+
+    def _enqueue(self, alerts):
+        for alert in alerts:
+            self.received += 1
+            if self._recent.get(alert['key']) is not None:
+                self.suppressed += 1
+                continue
+            self._recent.put(alert['key'], alert['detected_at'])
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(alert)
+        if self._pending:
+            self._ready.set()
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+
+    # ---------- 发送 ----------
+
+    async def _batch_loop(self):
+        while True:
+            await self._ready.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.batch_window)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            self._full.clear()
+            while self._pending:
+                await self._semaphore.acquire()
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+                task = asyncio.create_task(self._send(batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch):
+        try:
+            for attempt in range(self.retries + 1):
+                start = time.perf_counter()
+                try:
+                    await self.sink.send(batch)
+                except Exception as e:  # 下游不可用: 重试, 仍失败只计数
+                    self.last_error = repr(e)
+                    if attempt == self.retries:
+                        self.failed += len(batch)
+                        logger.exception("alert delivery failed (%d alerts)", len(batch))
+                        return
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                else:
+                    break
+                finally:
+                    self.send_latency.record(time.perf_counter() - start)
+            done = time.time()
+            for alert in batch:
+                self.latency.record(done - alert['detected_at'])
+            self.sent += len(batch)
+            self.batches += 1
+            self.last_alert = batch[-1]
+        finally:
+            self._semaphore.release()
+
+    async def _drain(self):
+        while self._pending or self._tasks:
+            self._full.set()  # 立即发送, 不等窗口
+            await asyncio.sleep(0.005)
+        self._full.clear()
+
+    def flush(self, timeout=None):
+        """等待已投递的告警全部发送完 (或失败); 与 submit 同走事件循环队列, 排在之前投递的告警之后"""
+        self._run(self._drain(), timeout)
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'suppressed': self.suppressed,
+            'dropped': self.dropped,
+            'sent': self.sent,
+            'batches': self.batches,
+            'failed': self.failed,
+            'pending': len(self._pending),
+            'p50_ms': self.latency.percentile(50) * 1000,
+            'p99_ms': self.latency.percentile(99) * 1000,
+            'send_p50_ms': self.send_latency.percentile(50) * 1000,
+            'send_p99_ms': self.send_latency.percentile(99) * 1000,
+            'last_error': self.last_error,
+        }
+
+    def close(self, timeout=30):
+        self.flush(timeout)
+        self._batcher.cancel()
+        if hasattr(self.sink, 'close'):
+            self.sink.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
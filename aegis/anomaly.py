@@ -0,0 +1,271 @@
+"""
+店铺履约指标异常检测 (延迟发货率 / NRR)
+每天收到一列新值时增量更新, 每个指标给出三类信号 (只报告变差方向, 即数值偏高):
+- 店铺稳健 z: 今天的值相对本店铺前 window 天的 中位数 / MAD
+- 同组稳健 z: 今天相对本店铺中位数的偏离, 与同组 (区域 x 是否受春节影响, 见 peer_groups) 所有店铺
+  今天偏离的 中位数 / MAD 比较; 用偏离而不是原始水平, 长期偏高但稳定的店铺不会每天被标记
+- EWMA 控制图: 指数加权均值超过 中位数 + L·σ·sqrt(λ/(2-λ)) (σ = 1.4826·MAD, 稳态控制限)
+只有 "相对自身历史变差 (店铺 z 或 EWMA) 且 同组店铺没有一起变差 (同组 z)" 才标记:
+三个信号各自按阈值检验, 要求一致相当于多重检验校正, 春节等整组漂移也不会被当成异常.
+模拟数据上标记率约等于注入跳变的店铺比例 (两个指标合计约 1%, 见 benchmarks/bench_anomaly.py)
+
+历史按 0.001 定点存 uint16 环形缓冲 (店铺 x 天), 每个指标固定 n x window x 2 字节,
+100 万店铺 x 28 天两个指标约 112 MB (另有 EWMA 状态 16 MB), 中位数 / MAD 分批计算;
+中位数 / MAD 在定点整数上计算, 没有浮点误差
+
+AnomalyMonitor 把检测器放到渲染路径之外: 后台线程回放历史预热, 之后在刷新线程里每跨过一天 update 一次
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 指标列 -> 展示名
+METRICS = {
+    'shipping_delay_rate': '延迟率',
+    'nrr': 'NRR',
+}
+
+WINDOW_DAYS = 28
+MIN_PERIODS = 7  # 历史不足的店铺不打分
+Z_THRESHOLD = 3.5
+EWMA_LAMBDA = 0.2
+EWMA_L = 3.0
+
+SCALE = 1000  # 与 Schema 的 0.001 精度一致
+MAD_SCALE = 1.4826  # MAD -> 正态标准差
+_MISSING = np.iinfo(np.uint16).max
+_FAR = np.iinfo(np.int32).max
+_CHUNK = 1 << 17  # 中位数 / MAD 分批计算, 排序用的临时数组不随店铺数增长
+
+# 信号位, 每个指标占 3 位 (第 i 个指标左移 3*i)
+SHOP_Z = 1
+GROUP_Z = 2
+EWMA = 4
+SIGNAL_NAMES = {SHOP_Z: '店铺 z', GROUP_Z: '同组 z', EWMA: 'EWMA'}
+
+
+def peer_groups(region_codes, affected_by_cny):
+    """同组 z 的分组编码: 区域 x 是否受春节影响, 受影响店铺只和同样受影响的店铺比"""
+    return np.asarray(region_codes, dtype=np.int16) * 2 + np.asarray(affected_by_cny, dtype=np.int16)
+
+
+def quantize(values):
+    """浮点比率 -> uint16 定点, NaN 记为缺失"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, _MISSING, dtype=np.uint16)
+    ok = ~np.isnan(values)
+    out[ok] = np.clip(np.rint(values[ok] * SCALE), 0, _MISSING - 1)
+    return out
+
+
+def rolling_median_mad(ring):
+    """每行非缺失值的 (中位数, MAD, 个数), 单位为定点; 缺失值排在最后, 按有效个数取中间位置"""
+    k = (ring != _MISSING).sum(axis=1)
+    lo_pos = np.maximum(k - 1, 0) // 2
+    hi_pos = k // 2
+    rows = np.arange(len(ring))
+
+    ordered = np.sort(ring, axis=1).astype(np.int32)
+    median2 = ordered[rows, lo_pos] + ordered[rows, np.minimum(hi_pos, ring.shape[1] - 1)]  # 2 x 中位数
+
+    deviation2 = np.abs(2 * ring.astype(np.int32) - median2[:, None])  # 2 x |x - 中位数|
+    deviation2[ring == _MISSING] = _FAR
+    deviation2.sort(axis=1)
+    mad4 = deviation2[rows, lo_pos] + deviation2[rows, np.minimum(hi_pos, ring.shape[1] - 1)]  # 4 x MAD
+
+    return median2 / 2, mad4 / 4, k
+
+
+def robust_z(x, median, mad):
+    """(x - 中位数) / (1.4826 MAD); MAD 为 0 时按 1 个定点单位计, 避免除零"""
+    return (x - median) / (MAD_SCALE * np.maximum(mad, 1))
+
+
+class AnomalyReport:
+    """某一天的检测结果, 按构建检测器时的 shop_id 顺序排列"""
+
+    def __init__(self, day, shop_ids, flags, scores):
+        self.day = day
+        self.shop_ids = shop_ids
+        self.flags = flags
+        self.scores = scores  # 指标 -> {'shop_z', 'group_z', 'ewma', 'ucl'}
+        self._aligned = (None, None)
+
+    def __len__(self):
+        return int((self.flags != 0).sum())
+
+    def align(self, snapshot):
+        """信号位按快照行顺序排列, 快照里新增的店铺为 0"""
+        version, flags = self._aligned
+        if version != snapshot.version:
+            flags, = snapshot.align(self.shop_ids, self.flags, fill=0)
+            self._aligned = (snapshot.version, flags)
+        return flags
+
+    @staticmethod
+    def describe(flags):
+        """信号位 -> 展示文字, 如 '延迟率: 店铺 z / EWMA'"""
+        labels = []
+        for i, name in enumerate(METRICS.values()):
+            bits = (int(flags) >> (3 * i)) & 7
+            if bits:
+                labels.append(f"{name}: " + ' / '.join(label for bit, label in SIGNAL_NAMES.items() if bits & bit))
+        return '; '.join(labels)
+
+
+class FleetAnomalyDetector:
+    """全量店铺的日度异常检测器
+
+    shop_ids / group_codes (见 peer_groups) 在构建时固定; update() 每天调用一次, 传入与 shop_ids 对齐的各指标当天值.
+    """
+
+    def __init__(self, shop_ids, group_codes, window=WINDOW_DAYS, min_periods=MIN_PERIODS,
+                 threshold=Z_THRESHOLD, ewma_lambda=EWMA_LAMBDA, ewma_l=EWMA_L):
+        self.shop_ids = np.asarray(shop_ids, dtype=np.uint32)
+        self.group_codes = np.asarray(group_codes)
+        self.window = window
+        self.min_periods = min_periods
+        self.threshold = threshold
+        self.ewma_lambda = ewma_lambda
+        self._ucl_width = ewma_l * np.sqrt(ewma_lambda / (2 - ewma_lambda))
+
+        n = len(self.shop_ids)
+        self._rings = {m: np.full((n, window), _MISSING, dtype=np.uint16) for m in METRICS}
+        self._ewma = {m: np.full(n, np.nan) for m in METRICS}
+        self._fleet_mean = {m: np.full(window, np.nan) for m in METRICS}  # 全店铺日均值, 算周环比
+        self.day = 0
+        self.report = None
+
+    def nbytes(self):
+        arrays = [*self._rings.values(), *self._ewma.values(), *self._fleet_mean.values()]
+        return sum(a.nbytes for a in arrays)
+
+    def update(self, values):
+        """写入一天的数据 {指标: 当天值 (float, 缺失为 NaN)}, 返回当天的 AnomalyReport"""
+        flags = np.zeros(len(self.shop_ids), dtype=np.uint8)
+        scores = {}
+        slot = self.day % self.window
+        for i, metric in enumerate(METRICS):
+            x_fixed = quantize(values[metric])
+            present = x_fixed != _MISSING
+            x = np.where(present, x_fixed, np.nan)
+
+            # 店铺维度: 对比前 window 天 (不含今天)
+            ring = self._rings[metric]
+            median, mad, k = np.empty(len(ring)), np.empty(len(ring)), np.empty(len(ring), dtype=np.int64)
+            for lo in range(0, len(ring), _CHUNK):
+                median[lo:lo + _CHUNK], mad[lo:lo + _CHUNK], k[lo:lo + _CHUNK] = rolling_median_mad(ring[lo:lo + _CHUNK])
+            scored = present & (k >= self.min_periods)
+            shop_z = np.where(scored, robust_z(x, median, mad), np.nan)
+
+            # 同组维度: 今天各店铺相对自身中位数的偏离, 在同组内横向比较
+            deviation = x - median
+            group_z = np.full(len(x), np.nan)
+            for code in np.unique(self.group_codes):
+                members = (self.group_codes == code) & scored
+                if members.any():
+                    today = deviation[members]
+                    group_median = np.median(today)
+                    group_mad = np.median(np.abs(today - group_median))
+                    group_z[members] = robust_z(today, group_median, group_mad)
+
+            # EWMA 控制图: 今天的值先并入, 再与历史中位数的控制限比较
+            ewma = self._ewma[metric]
+            fresh = present & np.isnan(ewma)
+            ewma[fresh] = x[fresh]
+            update = present & ~fresh
+            ewma[update] = self.ewma_lambda * x[update] + (1 - self.ewma_lambda) * ewma[update]
+            ucl = np.where(scored,
+                           median + self._ucl_width * MAD_SCALE * np.maximum(mad, 1), np.nan)
+
+            with np.errstate(invalid='ignore'):
+                shop_hit, group_hit, ewma_hit = shop_z > self.threshold, group_z > self.threshold, ewma > ucl
+            bits = shop_hit * SHOP_Z + group_hit * GROUP_Z + ewma_hit * EWMA
+            bits[~(group_hit & (shop_hit | ewma_hit))] = 0  # 单个信号不标记
+            flags |= (bits.astype(np.uint8) << (3 * i))
+            scores[metric] = {
+                'shop_z': shop_z.astype(np.float32),
+                'group_z': group_z.astype(np.float32),
+                'ewma': ewma / SCALE,
+                'ucl': (ucl / SCALE).astype(np.float32),
+            }
+
+            ring[:, slot] = x_fixed
+            self._fleet_mean[metric][slot] = np.nanmean(x) / SCALE if present.any() else np.nan
+
+        self.day += 1
+        self.report = AnomalyReport(self.day, self.shop_ids, flags, scores)
+        return self.report
+
+    def week_over_week(self, metric):
+        """全店铺日均值: 最近 7 天 / 之前 7 天 - 1; 不足 14 天返回 NaN"""
+        if self.day < 14 or self.window < 14:
+            return float('nan')
+        days = [(self.day - 1 - d) % self.window for d in range(14)]
+        means = self._fleet_mean[metric][days]
+        return float(np.mean(means[:7]) / np.mean(means[7:]) - 1)
+
+
+class AnomalyMonitor:
+    """后台预热 + 按天增量更新的检测器, 公开方法可在任意线程调用
+
+    - 构建时启动后台线程执行 build() (如用最近 window 天历史回放) 得到 FleetAnomalyDetector,
+      就绪前 detector 为 None, 调用方照常渲染 (异常列为空, 周环比显示 "—")
+    - observe(previous, current): SnapshotRefresher.subscribe 的回调; 跨过一天 (day_seconds) 时
+      取新快照里各店铺的当天值 update 一次, 快照里已没有的店铺记为缺失
+    """
+
+    def __init__(self, build, day_seconds=86400, clock=time.time):
+        self.day_seconds = day_seconds
+        self._clock = clock
+        self._lock = threading.Lock()  # 预热完成与每日更新互斥
+        self._day = None
+        self.detector = None
+        self.error = None
+        self.ready = threading.Event()
+        self._thread = threading.Thread(target=self._warm_up, args=(build,), name='anomaly-warmup', daemon=True)
+        self._thread.start()
+
+    def _today(self):
+        return int(self._clock() // self.day_seconds)
+
+    def _warm_up(self, build):
+        try:
+            detector = build()
+        except Exception as e:  # 预热失败只影响异常检测, 看板其余部分照常
+            self.error = repr(e)
+            logger.exception("anomaly detector warm-up failed")
+            return
+        with self._lock:
+            self._day = self._today()
+            self.detector = detector
+        self.ready.set()
+
+    def report(self):
+        """当天的 AnomalyReport, 未就绪时为 None"""
+        detector = self.detector
+        return None if detector is None else detector.report
+
+    def week_over_week(self, metric):
+        detector = self.detector
+        return float('nan') if detector is None else detector.week_over_week(metric)
+
+    def observe(self, previous, current):
+        snapshot = current[0]
+        with self._lock:
+            today = self._today()
+            if self.detector is None or today == self._day:
+                return
+            self._day = today
+            rows = snapshot.locate(self.detector.shop_ids)
+            found = rows >= 0
+            values = {}
+            for metric in METRICS:
+                column = snapshot.column(metric)
+                values[metric] = np.where(found, column[np.where(found, rows, 0)], np.nan)
+            self.detector.update(values)
@@ -0,0 +1,221 @@
+"""
+流式 Smart+ 熔断引擎
+按秒分桶累积每个广告计划的花费 / 收入, 环形缓冲维护滚动 ROAS 与烧钱速度,
+带迟滞地输出熔断 (trip) / 恢复 (reset) 状态切换
+
+熔断规则与 generate_roas_timeseries 相同: ROAS < 1.5 且 Spend Velocity > 2x
+"""
+
+import numpy as np
+
+ROAS_TRIP = 1.5
+VELOCITY_TRIP = 2.0
+
+# 迟滞: 恢复需要 ROAS 回到 1.8 以上, 且烧钱速度回落到 1.5x 以下
+ROAS_RESET = 1.8
+VELOCITY_RESET = 1.5
+
+TRIP = 1
+RESET = 0
+
+TRANSITION_DTYPE = np.dtype([
+    ('ts', np.int64),
+    ('campaign', np.int64),
+    ('kind', np.int8),
+    ('roas', np.float32),
+    ('velocity', np.float32),
+])
+
+
+def is_circuit_breaker(roas, spend_velocity):
+    """静态熔断规则 (向量化)"""
+    return (roas < ROAS_TRIP) & (spend_velocity > VELOCITY_TRIP)
+
+
+class StreamingBreaker:
+    """多广告计划流式熔断器
+
+    - 桶宽 bucket_seconds 秒, 滚动窗口 window_buckets 个桶
+    - 烧钱速度 = 窗口内平均每桶花费 / 基线每桶花费 (EWMA, 半衰期 baseline_halflife 秒);
+      熔断期间基线冻结, 危机期间的花费不会被吸收进基线
+    - 计划出现满一个窗口后才参与评估, 熔断后至少保持 hold_buckets 个桶;
+      恢复需要 ROAS >= roas_reset 且烧钱速度 <= velocity_reset (窗口内无花费也视为恢复)
+
+    campaign 为从 0 开始的整数 id, 超出容量时自动扩容.
+    """
+
+    def __init__(self, n_campaigns=1024, bucket_seconds=1, window_buckets=60,
+                 baseline_halflife=3600, hold_buckets=None, min_window_spend=1.0,
+                 roas_trip=ROAS_TRIP, velocity_trip=VELOCITY_TRIP,
+                 roas_reset=ROAS_RESET, velocity_reset=VELOCITY_RESET):
+        self.bucket_seconds = bucket_seconds
+        self.window = window_buckets
+        self.hold = window_buckets if hold_buckets is None else hold_buckets
+        self.min_window_spend = min_window_spend
+        self.roas_trip = roas_trip
+        self.velocity_trip = velocity_trip
+        self.roas_reset = roas_reset
+        self.velocity_reset = velocity_reset
+        self._decay = 0.5 ** (bucket_seconds / baseline_halflife)
+
+        self._now = None  # 当前未关闭的桶号
+        self._capacity = 0
+        self._grow(n_campaigns)
+
+        self.events = 0
+        self.trips = 0
+        self.resets = 0
+
+    def _grow(self, capacity):
+        old = self._capacity
+        if capacity <= old:
+            return
+
+        def extend(name, fill, dtype, rows=None):
+            shape = (capacity,) if rows is None else (rows, capacity)
+            new = np.full(shape, fill, dtype=dtype)
+            if old:
+                new[..., :old] = getattr(self, name)
+            setattr(self, name, new)
+
+        # 环形缓冲按 (桶, 计划) 布局, 写入一个桶是连续内存
+        extend('_ring_spend', 0, np.float32, self.window)
+        extend('_ring_rev', 0, np.float32, self.window)
+        extend('_win_spend', 0, np.float64)
+        extend('_win_rev', 0, np.float64)
+        extend('_cur_spend', 0, np.float64)
+        extend('_cur_rev', 0, np.float64)
+        extend('_baseline', np.nan, np.float64)
+        extend('_age', 0, np.int64)
+        extend('_tripped', False, bool)
+        extend('_tripped_at', 0, np.int64)
+        self._capacity = capacity
+
+    # ---------- 查询 ----------
+
+    def rolling_roas(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self._win_spend > 0, self._win_rev / self._win_spend, np.nan)
+
+    def spend_velocity(self):
+        rate = self._win_spend / self.window
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self._baseline > 0, rate / self._baseline, 0.0)
+
+    def tripped(self):
+        """当前处于熔断状态的计划 id"""
+        return np.flatnonzero(self._tripped)
+
+    # ---------- 写入 ----------
+
+    def ingest(self, ts, campaign, spend, revenue):
+        """写入一批事件 (ts 单位秒), 返回本批触发的状态切换 (TRANSITION_DTYPE)
+
+        批内可乱序; 早于当前桶的迟到事件计入当前桶.
+        """
+        ts = np.asarray(ts)
+        campaign = np.asarray(campaign, dtype=np.int64)
+        spend = np.asarray(spend, dtype=np.float64)
+        revenue = np.asarray(revenue, dtype=np.float64)
+        if len(ts) == 0:
+            return np.empty(0, dtype=TRANSITION_DTYPE)
+
+        buckets = ts.astype(np.int64) // self.bucket_seconds
+        if np.any(buckets[1:] < buckets[:-1]):
+            order = np.argsort(buckets, kind='stable')
+            buckets, campaign, spend, revenue = buckets[order], campaign[order], spend[order], revenue[order]
+
+        if campaign.max() >= self._capacity:
+            self._grow(max(self._capacity * 2, int(campaign.max()) + 1))
+        if self._now is None:
+            self._now = int(buckets[0])
+        self.events += len(buckets)
+
+        out = []
+        bounds = np.flatnonzero(np.diff(buckets)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(buckets)]):
+            bucket = int(buckets[lo])
+            if bucket > self._now:
+                out.extend(self._advance(bucket))
+            np.add.at(self._cur_spend, campaign[lo:hi], spend[lo:hi])
+            np.add.at(self._cur_rev, campaign[lo:hi], revenue[lo:hi])
+        return np.concatenate(out) if out else np.empty(0, dtype=TRANSITION_DTYPE)
+
+    def advance_to(self, ts):
+        """无事件时推进时钟, 让空闲计划也能恢复"""
+        bucket = int(ts) // self.bucket_seconds
+        if self._now is None or bucket <= self._now:
+            return np.empty(0, dtype=TRANSITION_DTYPE)
+        out = self._advance(bucket)
+        return np.concatenate(out) if out else np.empty(0, dtype=TRANSITION_DTYPE)
+
+    # ---------- 内部 ----------
+
+    def _advance(self, bucket):
+        out = [self._close_bucket()]
+        # 空桶: 窗口最多滑出 window 个桶, 之后只剩基线衰减
+        gap = bucket - self._now - 1
+        for _ in range(min(gap, self.window)):
+            out.append(self._close_bucket())
+        if gap > self.window:
+            self._baseline[~self._tripped] *= self._decay ** (gap - self.window)
+            self._age[self._age > 0] += gap - self.window
+        self._now = bucket
+        return [t for t in out if len(t)]
+
+    def _close_bucket(self):
+        slot = self._now % self.window
+        cur_spend, cur_rev = self._cur_spend, self._cur_rev
+
+        self._win_spend += cur_spend - self._ring_spend[slot]
+        self._win_rev += cur_rev - self._ring_rev[slot]
+        self._ring_spend[slot] = cur_spend
+        self._ring_rev[slot] = cur_rev
+        if slot == self.window - 1:
+            # 每转一圈用环形缓冲重算一次窗口和, 消除增减累积误差
+            self._win_spend = self._ring_spend.sum(axis=0, dtype=np.float64)
+            self._win_rev = self._ring_rev.sum(axis=0, dtype=np.float64)
+
+        seen = (self._age > 0) | (cur_spend > 0)
+        fresh = np.isnan(self._baseline) & (cur_spend > 0)
+        ewma = np.where(self._tripped, self._baseline, self._baseline * self._decay + cur_spend * (1 - self._decay))
+        self._baseline = np.where(fresh, cur_spend, ewma)
+        self._age[seen] += 1
+
+        transitions = self._evaluate()
+        cur_spend.fill(0)
+        cur_rev.fill(0)
+        self._now += 1
+        return transitions
+
+    def _evaluate(self):
+        roas = self.rolling_roas()
+        velocity = self.spend_velocity()
+        warm = self._age >= self.window
+
+        with np.errstate(invalid='ignore'):
+            trip = warm & ~self._tripped & (self._win_spend >= self.min_window_spend) & \
+                is_circuit_breaker(roas, velocity)
+            held = (self._now - self._tripped_at) >= self.hold
+            recovered = ((roas >= self.roas_reset) & (velocity <= self.velocity_reset)) | (self._win_spend == 0)
+            reset = self._tripped & held & recovered
+
+        trip_ids = np.flatnonzero(trip)
+        reset_ids = np.flatnonzero(reset)
+        if len(trip_ids) == 0 and len(reset_ids) == 0:
+            return np.empty(0, dtype=TRANSITION_DTYPE)
+
+        self._tripped[trip_ids] = True
+        self._tripped_at[trip_ids] = self._now
+        self._tripped[reset_ids] = False
+        self.trips += len(trip_ids)
+        self.resets += len(reset_ids)
+
+        ids = np.concatenate([trip_ids, reset_ids])
+        out = np.empty(len(ids), dtype=TRANSITION_DTYPE)
+        out['ts'] = (self._now + 1) * self.bucket_seconds
+        out['campaign'] = ids
+        out['kind'] = np.r_[np.full(len(trip_ids), TRIP), np.full(len(reset_ids), RESET)]
+        out['roas'] = roas[ids]
+        out['velocity'] = velocity[ids]
+        return out
@@ -0,0 +1,325 @@
+"""
+DeepSeek LLM 升级通道 (asyncio)
+规则引擎落入低置信度 "服务问题" 兜底时, 再交给 LLM 判定:
+- requests.Session 连接池 + 有界线程池发请求, 信号量限制并发
+- 微批: batch_window 内的评论合并成一个 prompt
+- 相同评论 (规范化后) 在途时只发一次请求
+- LRU + TTL 结果缓存, 记录 p50 / p99 延迟与命中率
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from aegis.reviews import FALLBACK_CATEGORY, REVIEW_RESULTS, classify_review, normalize_review
+
+DEEPSEEK_API_URL = os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com/chat/completions')
+DEEPSEEK_MODEL = os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')
+
+SYSTEM_PROMPT = """你是 TikTok Shop 的差评分析专家。
+任务: 逐条判断差评属于 "logistics" (物流问题, 可申诉)、"quality" (质量问题, 不可申诉) 还是 "service" (服务问题, 可申诉)。
+输入是 JSON 数组, 按顺序输出 JSON: {"results": [{"category": "...", "confidence": 0.0-1.0, "reason": "一句话理由"}]}"""
+
+
+def should_escalate(result):
+    """只有落入兜底类别的结果需要 LLM 复核"""
+    return result['category'] == REVIEW_RESULTS[FALLBACK_CATEGORY]['category']
+
+
+class TTLCache:
+    """LRU + TTL 缓存, 带命中计数"""
+
+    def __init__(self, maxsize=10_000, ttl=3600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > self._clock():
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LatencyRecorder:
+    """最近 N 个样本的延迟分位数 (秒)"""
+
+    def __init__(self, maxlen=100_000):
+        self._samples = deque(maxlen=maxlen)
+
+    def record(self, seconds):
+        self._samples.append(seconds)
+
+    def percentile(self, q):
+        return float(np.percentile(self._samples, q)) if self._samples else float('nan')
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class DeepSeekClient:
+    """同步批量分类客户端, 复用 HTTP 连接"""
+
+    def __init__(self, api_key=None, url=DEEPSEEK_API_URL, model=DEEPSEEK_MODEL,
+                 pool_size=8, timeout=30):
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+        import requests  # 只有配置了 DEEPSEEK_API_KEY 才会创建客户端, 冷启动不导入
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        api_key = api_key or os.getenv('DEEPSEEK_API_KEY')
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+
+    def classify_batch(self, reviews):
+        """一次请求分类多条评论, 返回 [{'category', 'confidence', 'reason'}]"""
+        response = self.session.post(self.url, timeout=self.timeout, json={
+            'model': self.model,
+            'messages': [
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': json.dumps(reviews, ensure_ascii=False)},
+            ],
+            'response_format': {'type': 'json_object'},
+            'temperature': 0,
+        })
+        response.raise_for_status()
+        content = response.json()['choices'][0]['message']['content']
+        # 兼容模型把 JSON 包在 ``` 代码块里
+        content = content.strip().removeprefix('```json').removeprefix('```').removesuffix('```')
+        results = json.loads(content)['results']
+        if len(results) != len(reviews):
+            raise ValueError(f"LLM 返回 {len(results)} 条结果, 期望 {len(reviews)} 条")
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+def _degraded(text, reason):
+    return dict(classify_review(text), ai_reason=reason, degraded=True)
+
+
+def _llm_result(item):
+    category = item.get('category')
+    if category not in REVIEW_RESULTS:
+        category = FALLBACK_CATEGORY
+    result = dict(REVIEW_RESULTS[category])
+    result['confidence'] = float(item.get('confidence', result['confidence']))
+    result['powered_by'] = 'DeepSeek API'
+    if item.get('reason'):
+        result['ai_reason'] = item['reason']
+    return result
+
+
+class EscalationTier:
+    """异步 LLM 升级通道, 必须在同一个事件循环内使用"""
+
+    def __init__(self, client=None, max_concurrency=8, batch_size=16, batch_window=0.02,
+                 cache_size=10_000, cache_ttl=3600):
+        self.client = client or DeepSeekClient(pool_size=max_concurrency)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self.latency = LatencyRecorder()
+        self.call_latency = LatencyRecorder()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='deepseek')
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queue = asyncio.Queue()
+        self._inflight = {}
+        self._tasks = set()
+        self._batcher = None
+
+        self.requests = 0
+        self.coalesced = 0
+        self.calls = 0
+        self.failures = 0
+
+    async def classify(self, text):
+        start = time.perf_counter()
+        self.requests += 1
+        key = normalize_review(text)
+
+        result = self.cache.get(key)
+        if result is None:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                self._ensure_batcher()
+                await self._queue.put((key, text))
+            result = await asyncio.shield(future)
+
+        self.latency.record(time.perf_counter() - start)
+        return dict(result)
+
+    async def classify_many(self, texts):
+        return await asyncio.gather(*(self.classify(t) for t in texts))
+
+    def _ensure_batcher(self):
+        if self._batcher is None or self._batcher.done():
+            self._batcher = asyncio.create_task(self._batch_loop())
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch):
+        texts = [text for _, text in batch]
+        try:
+            async with self._semaphore:
+                start = time.perf_counter()
+                self.calls += 1
+                try:
+                    items = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self.client.classify_batch, texts)
+                    if len(items) != len(batch):
+                        raise ValueError(f"LLM 返回 {len(items)} 条结果, 期望 {len(batch)} 条")
+                    results = [_llm_result(item) for item in items]
+                except Exception as e:
+                    # 任何 LLM / 解析错误都降级到规则引擎, 不写缓存
+                    self.failures += 1
+                    results = None
+                    reason = f'LLM 调用失败, 使用规则引擎结果 ({type(e).__name__})'
+                finally:
+                    self.call_latency.record(time.perf_counter() - start)
+
+            for i, (key, text) in enumerate(batch):
+                if results is not None:
+                    result = results[i]
+                    self.cache.put(key, result)
+                else:
+                    result = _degraded(text, reason)
+                self._resolve(key, result)
+        finally:
+            # 被取消或上面出错时, 本批剩下的在途请求也必须结束: 否则调用方一直等到超时,
+            # 之后相同评论还会合并到这个永远不会完成的 future 上
+            for key, text in batch:
+                if key in self._inflight:
+                    self._resolve(key, _degraded(text, 'LLM 升级通道分发中断, 使用规则引擎结果'))
+
+    def _resolve(self, key, result):
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'llm_calls': self.calls,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'cache_hit_rate': self.cache.hit_rate,
+            'p50_ms': self.latency.percentile(50) * 1000,
+            'p99_ms': self.latency.percentile(99) * 1000,
+            'call_p50_ms': self.call_latency.percentile(50) * 1000,
+            'call_p99_ms': self.call_latency.percentile(99) * 1000,
+        }
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        for task in list(self._tasks):
+            await task
+        self._executor.shutdown(wait=False)
+        self.client.close()
+
+
+class EscalationService:
+    """给同步调用方 (Streamlit 脚本线程) 用的包装: 后台线程常驻一个事件循环"""
+
+    def __init__(self, **tier_kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='llm-escalation', daemon=True)
+        self._thread.start()
+        self.tier = self._run(self._create(tier_kwargs))
+
+    async def _create(self, tier_kwargs):
+        return EscalationTier(**tier_kwargs)
+
+    def _run(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def classify(self, text, timeout=30):
+        return self._run(self.tier.classify(text), timeout)
+
+    def classify_many(self, texts, timeout=None):
+        return self._run(self.tier.classify_many(texts), timeout)
+
+    def stats(self):
+        return self.tier.stats()
+
+    def close(self):
+        self._run(self.tier.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def analyze_review(text, service=None, cache=None):
+    """规则引擎优先, 低置信度兜底结果交给 LLM 升级通道
+
+    - service 为 None 时只用规则引擎
+    - cache 为 aegis.review_cache.ReviewCache 时先查持久化缓存, 降级结果不写入
+    """
+    if cache is not None:
+        cached = cache.get(text)
+        if cached is not None:
+            return cached
+
+    result = classify_review(text)
+    if service is not None and should_escalate(result):
+        try:
+            result = service.classify(text)
+        except FutureTimeoutError:
+            result = _degraded(text, 'LLM 升级通道等待超时, 使用规则引擎结果')
+
+    if cache is not None and not result.get('degraded'):
+        cache.put(text, result)
+    return result
@@ -0,0 +1,165 @@
+"""
+实时差评流: 定长环形缓冲 + 本地模拟生产者
+生产者持续写入已分类的评论, 页面只读取最近 N 条; 容量固定, 持续写入内存不增长
+"""
+
+import itertools
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from aegis.reviews import DEFAULT_MATCHER, REVIEW_RESULTS
+from aegis.schema import SHOP_ID_FORMAT
+
+FEED_CATEGORIES = list(REVIEW_RESULTS)  # logistics / quality / service, 编码即下标
+FEED_LABELS = {'logistics': '📦 物流', 'quality': '🚨 质量', 'service': '💬 服务'}
+FEED_STATUS = {
+    key: '✅ 已申诉' if result['is_appealable'] else '❌ 已下架'
+    for key, result in REVIEW_RESULTS.items()
+}
+
+_CODES = {key: code for code, key in enumerate(FEED_CATEGORIES)}
+
+SAMPLE_REVIEWS = [
+    "Shipping took forever! 3 weeks delay",
+    "Product quality is terrible, fake!",
+    "春节期间物流慢可以理解,但包装破损",
+    "Customer service not responding",
+    "物流太慢了,等了一个月才收到",
+    "Defective charger, stopped working after two days",
+    "客服态度很差, 一直不回复消息",
+    "Package arrived late and the box was crushed",
+    "尺码不对, 申请退货也没人处理",
+    "Seller never answered my messages",
+]
+
+
+class ReviewFeed:
+    """定长环形缓冲: O(1) 追加, 读取最近 n 条只拷贝 n 条"""
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._shop = np.zeros(capacity, dtype=np.uint32)
+        self._code = np.zeros(capacity, dtype=np.int8)
+        self._text = np.empty(capacity, dtype=object)
+        self._seq = 0  # 累计写入条数, 下一条写入位置 = seq % capacity
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._seq, self.capacity)
+
+    @property
+    def total(self):
+        """累计写入条数 (含已被覆盖的)"""
+        return self._seq
+
+    def append(self, ts, shop_id, text, category):
+        with self._lock:
+            i = self._seq % self.capacity
+            self._ts[i] = ts
+            self._shop[i] = shop_id
+            self._code[i] = _CODES[category]
+            self._text[i] = text
+            self._seq += 1
+
+    def extend(self, ts, shop_ids, texts, categories):
+        """批量追加 (同一时间戳), 超过容量时只保留最后 capacity 条"""
+        n = len(texts)
+        if n == 0:
+            return
+        codes = np.fromiter((_CODES[c] for c in categories), dtype=np.int8, count=n)
+        shop_ids = np.asarray(shop_ids, dtype=np.uint32)
+        texts = np.asarray(texts, dtype=object)
+        with self._lock:
+            skip = max(n - self.capacity, 0)
+            pos = (self._seq + skip + np.arange(n - skip)) % self.capacity
+            self._ts[pos] = ts
+            self._shop[pos] = shop_ids[skip:]
+            self._code[pos] = codes[skip:]
+            self._text[pos] = texts[skip:]
+            self._seq += n
+
+    def latest(self, n=20, now=None):
+        """最近 n 条, 新的在前; 返回可直接渲染的 DataFrame"""
+        with self._lock:
+            n = min(n, len(self))
+            pos = (self._seq - 1 - np.arange(n)) % self.capacity
+            ts = self._ts[pos]
+            shops = self._shop[pos]
+            codes = self._code[pos]
+            texts = self._text[pos]
+        now = time.time() if now is None else now
+        keys = [FEED_CATEGORIES[c] for c in codes]
+        return pd.DataFrame({
+            'time': [_ago(now - t) for t in ts],
+            'shop': [SHOP_ID_FORMAT % s for s in shops],
+            'review': texts,
+            'category': [FEED_LABELS[k] for k in keys],
+            'status': [FEED_STATUS[k] for k in keys],
+        })
+
+
+def _ago(seconds):
+    if seconds < 60:
+        return f"{max(int(seconds), 0)}秒前"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}分钟前"
+    return f"{int(seconds // 3600)}小时前"
+
+
+def synthetic_reviews(n_shops=100, seed=42):
+    """本地模拟评论源, 无限产出 (shop_id, text); 可替换为真实消息队列"""
+    rng = np.random.default_rng(seed)
+    while True:
+        shops = rng.integers(1, n_shops + 1, 256)
+        picks = rng.integers(0, len(SAMPLE_REVIEWS), 256)
+        for shop, pick in zip(shops, picks):
+            yield int(shop), SAMPLE_REVIEWS[pick]
+
+
+class ReviewProducer:
+    """后台线程: 按固定速率从评论源取数, 规则引擎分类后批量写入环形缓冲"""
+
+    def __init__(self, feed, rate=1.0, source=None, matcher=DEFAULT_MATCHER, tick=0.1):
+        self.feed = feed
+        self.rate = rate
+        self.source = synthetic_reviews() if source is None else source
+        self.matcher = matcher
+        self.tick = tick
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='review-producer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        due = 0.0  # 累计应产出条数 (小数部分留到下一拍)
+        last = time.monotonic()
+        while not self._stop.wait(self.tick):
+            now = time.monotonic()
+            due += (now - last) * self.rate
+            last = now
+            n = int(due)
+            if n == 0:
+                continue
+            due -= n
+            if not self.produce(n):
+                break  # 评论源耗尽
+
+    def produce(self, n):
+        """从评论源取 n 条分类后写入, 返回实际写入条数"""
+        batch = list(itertools.islice(self.source, n))
+        if not batch:
+            return 0
+        shop_ids, texts = zip(*batch)
+        categories = [self.matcher.classify(text)[0] for text in texts]
+        self.feed.extend(time.time(), shop_ids, texts, categories)
+        return len(batch)
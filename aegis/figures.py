@@ -0,0 +1,325 @@
+"""
+图表构建 + 进程级缓存
+按 (图表名, 数据版本, 参数) 缓存序列化好的 figure JSON (不可变字符串), 数据没变的重跑不再构建 / 降采样,
+plotly_chart() 每次从 JSON 还原一个新 Figure 交给 st.plotly_chart, 各会话共享也不会互相改写;
+直方图在服务端用 np.histogram 分箱, 浏览器只收到 bin 计数而不是整列原始分数
+plotly 在各 build_* 里才导入 (导入约 0.2 秒), 冷启动时页头和核心指标不用等它
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from aegis.downsample import (
+    ROAS_POINT_BUDGET, SCATTER_BINS, SCATTER_POINT_BUDGET, density_sample, lttb, minmax_buckets
+)
+
+PORTS_DATA = pd.DataFrame({
+    'port': ['Los Angeles', 'Long Beach', 'New York', 'Felixstowe', 'Rotterdam'],
+    'lat': [33.7, 33.8, 40.7, 51.9, 51.9],
+    'lon': [-118.2, -118.1, -74.0, 1.3, 4.5],
+    'congestion_level': [85, 78, 65, 72, 45],
+    'delay_days': [8, 7, 5, 6, 3]
+})
+
+
+# 缓存条目: 序列化好的 figure JSON
+FigureSpec = namedtuple('FigureSpec', 'json')
+
+
+def figure_json(fig):
+    import plotly.io as pio
+    return pio.to_json(fig, validate=False)
+
+
+def figure_bytes(fig):
+    """figure 序列化后发给浏览器的字节数"""
+    return len(figure_json(fig).encode())
+
+
+def figure_spec(fig):
+    return FigureSpec(figure_json(fig))
+
+
+def plotly_chart(spec):
+    """用公开的 st.plotly_chart 渲染缓存的 FigureSpec (宽度撑满容器); 每次还原一个新 Figure, 不共享可变对象"""
+    import plotly.io as pio
+    import streamlit as st
+
+    return st.plotly_chart(pio.from_json(spec.json), use_container_width=True)
+
+
+def frame_version(df):
+    """不带版本号的小表 (如 ROAS 时序) 用内容哈希当版本"""
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+class FigureCache:
+    """LRU 缓存: key -> FigureSpec (序列化后的 JSON); 记录命中数和每张图的发送字节数 (即缓存的 JSON 大小)"""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sizes = {}  # 图表名 -> 最近一次构建的字节数
+
+    def get(self, name, key, build):
+        """命中直接返回; 未命中调用 build() 构建 Figure, 序列化后缓存"""
+        cache_key = (name, key)
+        with self._lock:
+            spec = self._figures.get(cache_key)
+            if spec is not None:
+                self._figures.move_to_end(cache_key)
+                self.hits += 1
+                return spec
+        spec = figure_spec(build())
+        with self._lock:
+            self.misses += 1
+            self.sizes[name] = len(spec.json.encode())
+            self._figures[cache_key] = spec
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+        return spec
+
+    def __len__(self):
+        return len(self._figures)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._figures),
+            'bytes': dict(self.sizes),
+        }
+
+
+def build_sps_gauge(avg_sps):
+    import plotly.graph_objects as go
+
+    fig_gauge = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=avg_sps,
+        delta={'reference': 3.8},
+        title={'text': "全局平均 SPS"},
+        gauge={
+            'axis': {'range': [2.0, 5.0]},
+            'bar': {'color': "#10A37F" if avg_sps >= 3.6 else "#EF4444"},
+            'steps': [
+                {'range': [2.0, 3.5], 'color': '#FEE2E2'},
+                {'range': [3.5, 3.6], 'color': '#FEF3C7'},
+                {'range': [3.6, 5.0], 'color': '#D1FAE5'}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 3.5
+            }
+        }
+    ))
+
+    fig_gauge.update_layout(
+        paper_bgcolor='#FFFFFF',
+        font={'color': "#202123"},
+        height=250,  # 减小高度
+        margin=dict(l=20, r=20, t=40, b=20)  # 减小边距
+    )
+    return fig_gauge
+
+
+def build_port_map(ports_data=PORTS_DATA, title='港口拥堵热力图'):
+    import plotly.express as px
+
+    fig_map = px.scatter_geo(
+        ports_data,
+        lat='lat',
+        lon='lon',
+        size='congestion_level',
+        color='delay_days',
+        hover_name='port',
+        color_continuous_scale='Reds',
+        size_max=50,
+        title=title
+    )
+
+    fig_map.update_layout(
+        geo=dict(
+            bgcolor='#F7F7F8',
+            showland=True,
+            landcolor='#FFFFFF',
+            projection_type='natural earth'
+        ),
+        paper_bgcolor='#FFFFFF',
+        font=dict(color='#202123'),
+        height=300,  # 减小高度
+        margin=dict(l=0, r=0, t=40, b=0)  # 减小边距
+    )
+    return fig_map
+
+
+def _roas_points(data, max_points, method):
+    if len(data) <= max_points:
+        return data
+    if method == 'lttb':
+        ts = data['timestamp'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+        rows = lttb(ts, data['roas'].to_numpy(), max_points)
+    else:
+        rows = minmax_buckets(data['roas'].to_numpy(), max_points)
+    return data.iloc[rows]
+
+
+def build_roas_chart(roas_df, max_points=ROAS_POINT_BUDGET, method='lttb', title='ROAS 时间序列 (过去 24 小时)'):
+    import plotly.graph_objects as go
+
+    fig_roas = go.Figure()
+
+    # 超出点数预算时降采样: 正常段默认 LTTB 保形, 熔断段用 min-max 保住最低 ROAS
+    normal_data = _roas_points(roas_df[~roas_df['is_circuit_breaker']], max_points, method)
+    circuit_data = _roas_points(roas_df[roas_df['is_circuit_breaker']], max_points, 'minmax')
+
+    fig_roas.add_trace(go.Scatter(
+        x=normal_data['timestamp'],
+        y=normal_data['roas'],
+        mode='lines+markers',
+        name='Normal ROAS',
+        line=dict(color='#10A37F', width=3),
+        marker=dict(size=4)
+    ))
+
+    fig_roas.add_trace(go.Scatter(
+        x=circuit_data['timestamp'],
+        y=circuit_data['roas'],
+        mode='lines+markers',
+        name='🔴 熔断触发',
+        line=dict(color='#EF4444', width=4),
+        marker=dict(size=8, symbol='x')
+    ))
+
+    fig_roas.add_hline(
+        y=1.5,
+        line_dash="dash",
+        line_color="red",
+        annotation_text="熔断阈值 (1.5)"
+    )
+
+    fig_roas.update_layout(
+        title=title,
+        xaxis_title='时间',
+        yaxis_title='ROAS',
+        paper_bgcolor='#FFFFFF',
+        plot_bgcolor='#F7F7F8',
+        font=dict(color='#202123'),
+        height=300,  # 减小高度
+        margin=dict(l=40, r=20, t=60, b=40),  # 减小边距
+        hovermode='x'  # 简化 hover 模式
+    )
+    return fig_roas
+
+
+def sps_histogram_bins(sps_scores, bins=20):
+    """服务端分箱: 返回 (bin 中心, bin 宽度, 计数)"""
+    counts, edges = np.histogram(sps_scores, bins=bins)
+    return (edges[:-1] + edges[1:]) / 2, np.diff(edges), counts
+
+
+def build_sps_histogram(sps_scores, avg_sps, bins=20):
+    import plotly.graph_objects as go
+
+    centers, widths, counts = sps_histogram_bins(sps_scores, bins)
+    fig_hist = go.Figure(go.Bar(
+        x=centers,
+        y=counts,
+        width=widths,
+        marker_color='#10A37F',
+        hovertemplate='sps_score=%{x:.3f}<br>count=%{y}<extra></extra>'
+    ))
+
+    fig_hist.add_vline(x=3.5, line_dash="dash", line_color="red", line_width=2)
+    fig_hist.add_vline(x=avg_sps, line_dash="solid", line_color="#10A37F", line_width=2)
+
+    fig_hist.update_layout(
+        title='SPS 分数分布',
+        xaxis_title='sps_score',
+        yaxis_title='count',
+        bargap=0,
+        paper_bgcolor='#FFFFFF',
+        plot_bgcolor='#F7F7F8',
+        font=dict(color='#202123'),
+        height=280,  # 减小高度
+        margin=dict(l=40, r=20, t=60, b=40),
+        showlegend=False
+    )
+    return fig_hist
+
+
+def build_sps_scatter(snapshot, budget=SCATTER_POINT_BUDGET, bins=SCATTER_BINS, seed=None):
+    import plotly.graph_objects as go
+
+    # 超出点数预算时画 2D 密度底图; P0 店铺不占预算, 始终画出 (太多时改画红色 P0 密度层), 预算内再画离群店铺
+    orders = snapshot.column('daily_orders')
+    sps = snapshot.column('sps_score')
+    critical = snapshot.flag('is_critical')
+    rows, grid, critical_grid = density_sample(orders, sps, keep=critical, budget=budget, bins=bins, log_x=True,
+                                               seed=seed)
+
+    fig_scatter = go.Figure()
+    if grid is not None:
+        x_centers, y_centers, counts = grid
+        fig_scatter.add_trace(go.Scatter(
+            x=x_centers,
+            y=y_centers,
+            mode='markers',
+            name='密度',
+            marker=dict(symbol='square', size=9, color=np.log10(counts + 1), colorscale='Greens', opacity=0.5),
+            customdata=counts,
+            hovertemplate='店铺数=%{customdata:,}<extra></extra>'
+        ))
+    if critical_grid is not None:
+        x_centers, y_centers, counts = critical_grid
+        fig_scatter.add_trace(go.Scatter(
+            x=x_centers,
+            y=y_centers,
+            mode='markers',
+            name='is_critical=True (密度)',
+            marker=dict(symbol='square', size=9, color=np.log10(counts + 1), colorscale='Reds', opacity=0.8),
+            customdata=counts,
+            hovertemplate='P0 店铺数=%{customdata:,}<extra></extra>'
+        ))
+    for is_critical, color in ((False, '#10A37F'), (True, '#EF4444')):
+        picked = rows[critical[rows] == is_critical]
+        fig_scatter.add_trace(go.Scatter(
+            x=orders[picked],
+            y=sps[picked],
+            mode='markers',
+            name=f'is_critical={is_critical}',
+            marker=dict(color=color),
+            hovertemplate='daily_orders=%{x}<br>sps_score=%{y:.2f}<extra></extra>'
+        ))
+
+    if grid is None:
+        title = f'SPS vs 订单量 (全部 {snapshot.n_shops:,} 家)'
+    else:
+        title = f'SPS vs 订单量 ({snapshot.n_shops:,} 家密度 + P0/离群 {len(rows):,} 家)'
+        if critical_grid is not None:
+            title = (f'SPS vs 订单量 ({snapshot.n_shops:,} 家密度 + P0 {int(critical.sum()):,} 家密度'
+                     f' + 离群 {len(rows):,} 家)')
+    fig_scatter.add_hline(y=3.5, line_dash="dash", line_color="red")
+
+    fig_scatter.update_layout(
+        title=title,
+        xaxis_title='daily_orders',
+        yaxis_title='sps_score',
+        paper_bgcolor='#FFFFFF',
+        plot_bgcolor='#F7F7F8',
+        font=dict(color='#202123'),
+        xaxis_type='log',
+        height=280,  # 减小高度
+        margin=dict(l=40, r=20, t=60, b=40),
+        showlegend=False
+    )
+    return fig_scatter
@@ -0,0 +1,130 @@
+"""
+SPS 跌破风险预测
+对每家店铺最近 N 天的日 SPS 拟合指数加权线性趋势 (近期权重高, 半衰期默认 7 天),
+外推未来 72 小时, 给出跌破 3.5 的概率和预计跌破时间 (ETA)
+
+所有店铺共用同一组时间点和权重, 加权最小二乘的闭式解只需要两次矩阵-向量乘,
+全量店铺一起拟合, 没有逐店铺的 Python 循环
+"""
+
+import numpy as np
+
+SPS_THRESHOLD = 3.5
+FORECAST_HOURS = 72
+HALFLIFE_DAYS = 7.0
+
+# 跌破概率达到该值的未跌破店铺, 在 tab 4 "72h 内预计跌破" 筛选中列出
+BREACH_ALERT_PROB = 0.5
+
+# 外推时每批处理的店铺数, 限制 (店铺, 小时) 矩阵的内存
+_CHUNK = 65536
+
+
+def _norm_cdf(z):
+    """标准正态分布函数 (Abramowitz-Stegun 7.1.26, 误差 < 1.5e-7), 不依赖 scipy"""
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+
+class TrendFit:
+    """加权线性趋势的拟合结果: level 为今天的拟合值, slope 为每天变化, sigma 为残差标准差"""
+
+    def __init__(self, level, slope, sigma, sums):
+        self.level = level
+        self.slope = slope
+        self.sigma = sigma
+        self._sums = sums  # (Σw, Σwt, Σwt², det), 所有店铺共用
+
+    def leverage(self, days_ahead):
+        """x' (X'WX)^-1 x: 外推到 days_ahead 天后时, 趋势本身的不确定度 (相对 sigma²)"""
+        sw, swt, swtt, det = self._sums
+        h = np.asarray(days_ahead, dtype=np.float64)
+        return (swtt - 2 * h * swt + h * h * sw) / det
+
+
+def fit_trend(history, halflife=HALFLIFE_DAYS):
+    """history: (店铺, 天) 日 SPS, 最后一列为今天; 返回 TrendFit"""
+    history = np.asarray(history)
+    n_days = history.shape[1]
+    if n_days < 3:
+        raise ValueError(f"至少需要 3 天历史, 当前 {n_days} 天")
+    t = np.arange(n_days, dtype=np.float64) - (n_days - 1)  # 今天为 0, 过去为负
+    w = 0.5 ** (-t / halflife)
+
+    sw, swt, swtt = w.sum(), (w * t).sum(), (w * t * t).sum()
+    det = sw * swtt - swt * swt
+    sy = history @ w
+    sty = history @ (w * t)
+    slope = (sw * sty - swt * sy) / det
+    level = (swtt * sy - swt * sty) / det
+
+    resid = history - level[:, None].astype(history.dtype)
+    resid -= slope[:, None].astype(history.dtype) * t.astype(history.dtype)
+    sigma = np.sqrt((resid * resid) @ w / sw * n_days / (n_days - 2))
+    return TrendFit(level, slope, sigma, (sw, swt, swtt, det))
+
+
+def breach_forecast(fit, threshold=SPS_THRESHOLD, hours=FORECAST_HOURS):
+    """返回 (breach_prob, eta_hours)
+
+    breach_prob: 未来 1..hours 小时中任一时点的预测值低于 threshold 的最大概率
+                 (预测分布 N(趋势, sigma² (1 + leverage)), 是首次跌破概率的下界)
+    eta_hours: 趋势线跌到 threshold 的小时数; 已低于阈值为 0, 趋势不下行为 NaN
+    """
+    days_ahead = np.arange(1, hours + 1) / 24
+    spread = np.sqrt(1 + fit.leverage(days_ahead))  # (hours,)
+    n = len(fit.level)
+
+    z_max = np.empty(n)
+    for lo in range(0, n, _CHUNK):
+        hi = min(lo + _CHUNK, n)
+        gap = threshold - fit.level[lo:hi, None] - fit.slope[lo:hi, None] * days_ahead
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = gap / (fit.sigma[lo:hi, None] * spread)
+        # sigma 为 0 (历史完全平直) 时按趋势线是否跌破取 ±inf
+        z = np.where(np.isnan(z), -np.inf, z)
+        z_max[lo:hi] = z.max(axis=1)
+    breach_prob = _norm_cdf(np.clip(z_max, -40, 40))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eta = (fit.level - threshold) / -fit.slope * 24
+    eta = np.where(fit.level < threshold, 0.0, np.where(fit.slope < 0, eta, np.nan))
+    return breach_prob, eta
+
+
+class SpsForecast:
+    """按 shop_id 保存的预测结果, align() 对齐到任一快照版本的行顺序"""
+
+    def __init__(self, shop_ids, breach_prob, eta_hours, slope, hours=FORECAST_HOURS):
+        self.shop_ids = np.asarray(shop_ids, dtype=np.uint32)
+        self.breach_prob = breach_prob.astype(np.float32)
+        self.eta_hours = eta_hours.astype(np.float32)
+        self.slope = slope.astype(np.float32)
+        self.hours = hours
+        self._aligned = (None, None)  # (快照版本, 结果)
+
+    @classmethod
+    def fit(cls, shop_ids, history, threshold=SPS_THRESHOLD, hours=FORECAST_HOURS, halflife=HALFLIFE_DAYS):
+        trend = fit_trend(history, halflife)
+        breach_prob, eta_hours = breach_forecast(trend, threshold, hours)
+        return cls(shop_ids, breach_prob, eta_hours, trend.slope, hours)
+
+    def __len__(self):
+        return len(self.shop_ids)
+
+    def align(self, snapshot):
+        """(breach_prob, eta_hours) 按快照行顺序排列; 没有历史的店铺 (如刷新后新增) 为 NaN"""
+        version, aligned = self._aligned
+        if version == snapshot.version:
+            return aligned
+        aligned = tuple(snapshot.align(self.shop_ids, self.breach_prob, self.eta_hours))
+        self._aligned = (snapshot.version, aligned)
+        return aligned
+
+    def at_risk(self, snapshot, min_prob=BREACH_ALERT_PROB):
+        """当前未跌破、但 hours 小时内跌破概率 >= min_prob 的行 (布尔掩码)"""
+        prob, _ = self.align(snapshot)
+        return ~snapshot.flag('is_critical') & (prob >= min_prob)
@@ -0,0 +1,255 @@
+"""
+快照级预计算筛选索引
+- 每个状态档位 / 区域 / 春节标记一张行号位图 (packbits, 每店铺 1 bit)
+- SPS 升序 / SPS 降序 / 订单量降序三条预排序置换, 其余列的置换按需生成
+筛选 = 位图求交, top_n = 沿预排序置换走 O(k) 步, 分页 = 按块命中计数定位后只扫 1~2 个块
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 每字节 1 的个数, 兼容没有 np.bitwise_count 的 NumPy (< 2.0)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# 排序键 -> (列, 是否降序)
+SORT_ORDERS = {
+    'sps_asc': ('sps_score', False),
+    'sps_desc': ('sps_score', True),
+    'orders_desc': ('daily_orders', True),
+}
+
+# 沿置换扫描的首批行数, 命中率低时每批翻倍
+_WALK_CHUNK = 1024
+
+# 分页时每块的行数; 每个分页器只保留 n / _PAGE_BLOCK 个累计命中数
+_PAGE_BLOCK = 4096
+_MAX_PAGERS = 32
+
+
+class RowBitmap:
+    """定长行号位图"""
+
+    __slots__ = ('bits', 'n')
+
+    def __init__(self, bits, n):
+        self.bits = bits
+        self.n = n
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls(np.packbits(mask), len(mask))
+
+    @classmethod
+    def full(cls, n):
+        return cls.from_mask(np.ones(n, dtype=bool))
+
+    def __and__(self, other):
+        return RowBitmap(self.bits & other.bits, self.n)
+
+    def __or__(self, other):
+        return RowBitmap(self.bits | other.bits, self.n)
+
+    def count(self):
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def contains(self, rows):
+        """rows 中每个行号是否在位图内"""
+        return ((self.bits[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+    def to_mask(self):
+        return np.unpackbits(self.bits, count=self.n).astype(bool)
+
+    def rows(self):
+        return np.flatnonzero(self.to_mask())
+
+
+class RowPager:
+    """沿一条排序置换分页: 预先按块统计命中数, 取任意一页只扫描该页所在的块"""
+
+    def __init__(self, perm, selection=None, block=_PAGE_BLOCK):
+        self.perm = perm
+        self.selection = selection
+        self.block = block
+        if selection is None:
+            self._cum = None
+            self.total = len(perm)
+        else:
+            starts = np.arange(0, len(perm), block)
+            hits = selection.contains(perm)
+            self._cum = np.cumsum(np.add.reduceat(hits, starts, dtype=np.int64)) if len(perm) else np.zeros(0, np.int64)
+            self.total = int(self._cum[-1]) if len(self._cum) else 0
+
+    def page(self, offset, limit):
+        """排序后第 offset 起的 limit 个命中行号"""
+        if self._cum is None:
+            return self.perm[offset:offset + limit]
+
+        b = int(np.searchsorted(self._cum, offset, side='right'))
+        skip = offset - (int(self._cum[b - 1]) if b else 0)
+        found = []
+        remaining = limit
+        start = b * self.block
+        while remaining > 0 and start < len(self.perm):
+            chunk = self.perm[start:start + self.block]
+            hits = chunk[self.selection.contains(chunk)][skip:skip + remaining]
+            found.append(hits)
+            remaining -= len(hits)
+            skip = 0
+            start += self.block
+        return np.concatenate(found) if found else self.perm[:0]
+
+
+def _sort_keys(snapshot, key):
+    """SORT_ORDERS 键对应的升序排序键; float64 能精确表示 uint32 / float32, 取负不会溢出"""
+    column, descending = SORT_ORDERS[key]
+    keys = snapshot.column(column).astype(np.float64)
+    return -keys if descending else keys
+
+
+class ShopIndex:
+    """一个快照的全部筛选索引, 快照版本不变就不需要重建"""
+
+    def __init__(self, snapshot, orders=None):
+        self.version = snapshot.version
+        self.n = len(snapshot)
+        self._snapshot = snapshot
+        self.all = RowBitmap.full(self.n)
+
+        critical = snapshot.flag('is_critical')
+        warning = snapshot.flag('is_warning')
+        self.status = {
+            'critical': RowBitmap.from_mask(critical),
+            'warning': RowBitmap.from_mask(warning),
+            'safe': RowBitmap.from_mask(~(critical | warning)),
+            'cny': RowBitmap.from_mask(snapshot.flag('affected_by_cny')),
+        }
+        self.promo = RowBitmap.from_mask(snapshot.flag('smart_promo_eligible'))
+
+        codes = snapshot.column('region')
+        self.region = {
+            name: RowBitmap.from_mask(codes == code)
+            for code, name in enumerate(snapshot.categories('region'))
+        }
+
+        if orders is None:
+            orders = {}
+            for key in SORT_ORDERS:
+                perm = np.argsort(_sort_keys(snapshot, key), kind='stable')
+                perm.flags.writeable = False
+                orders[key] = perm
+        self.orders = orders
+
+        self._ascending = {'sps_score': self.orders['sps_asc']}  # 列 -> 升序置换 (其余列按需生成)
+        self._pagers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def updated(self, snapshot, rows):
+        """快照只有 rows 这些行变化 (含末尾追加) 时, 由本索引得到新快照的索引
+
+        位图直接重建 (O(n) 且很快); 预排序置换不重新 argsort: 去掉变化行后, 把它们按新值
+        二分插回, 结果与全量稳定排序完全一致
+        """
+        rows = np.unique(rows)
+        orders = {}
+        for key, perm in self.orders.items():
+            keys = _sort_keys(snapshot, key)
+            kept = perm[~np.isin(perm, rows, assume_unique=True)]
+            moved = rows[np.argsort(keys[rows], kind='stable')]
+            # 稳定排序的次序即 (键, 行号) 字典序; complex 的比较正好是 (实部, 虚部) 字典序
+            kept_keys = keys[kept] + 1j * kept
+            pos = np.searchsorted(kept_keys, keys[moved] + 1j * moved)
+            perm = np.insert(kept, pos, moved)
+            perm.flags.writeable = False
+            orders[key] = perm
+        return ShopIndex(snapshot, orders)
+
+    def register(self, name, mask):
+        """把外部算出的行集合 (如 SPS 预测的高风险店铺) 注册为一个筛选档位, 已注册时不覆盖"""
+        if name not in self.status:
+            self.status[name] = RowBitmap.from_mask(mask)
+        return self.status[name]
+
+    def select(self, status=None, region=None):
+        """状态 / 区域位图求交, 未知区域返回空集"""
+        selection = self.all
+        if status is not None:
+            selection = selection & self.status[status]
+        if region is not None:
+            if region not in self.region:
+                return RowBitmap(np.zeros_like(self.all.bits), self.n)
+            selection = selection & self.region[region]
+        return selection
+
+    def top(self, selection, order, k):
+        """沿预排序置换取前 k 个命中行"""
+        perm = self.orders[order]
+        if selection is self.all:
+            return perm[:k]
+
+        found = []
+        remaining = k
+        start, step = 0, max(_WALK_CHUNK, k)
+        while remaining > 0 and start < self.n:
+            chunk = perm[start:start + step]
+            hits = chunk[selection.contains(chunk)][:remaining]
+            found.append(hits)
+            remaining -= len(hits)
+            start += step
+            step *= 2
+        return np.concatenate(found) if found else perm[:0]
+
+    def sort_permutation(self, column, descending=False):
+        """任意列的稳定排序置换; 降序为升序置换的反向视图, 不额外占内存"""
+        perm = self._ascending.get(column)
+        if perm is None:
+            values = self._snapshot.column(column)
+            if isinstance(self._snapshot.frame[column].dtype, pd.CategoricalDtype):
+                # category 列按标签字典序, 而不是编码顺序
+                labels = np.asarray(self._snapshot.categories(column), dtype=object)
+                rank = np.empty(len(labels), dtype=np.int64)
+                rank[np.argsort(labels, kind='stable')] = np.arange(len(labels))
+                values = rank[values]
+            perm = np.argsort(values, kind='stable')
+            perm.flags.writeable = False
+            self._ascending[column] = perm
+        return perm[::-1] if descending else perm
+
+    def name_matches(self, query):
+        """店铺名包含 query (不区分大小写) 的行; 只在去重后的名称字典上匹配"""
+        query = query.lower()
+        labels = self._snapshot.categories('shop_name')
+        codes = [code for code, label in enumerate(labels) if query in label.lower()]
+        return RowBitmap.from_mask(np.isin(self._snapshot.column('shop_name'), codes))
+
+    def pager(self, status=None, region=None, search=None, column='sps_score', descending=False):
+        """筛选 + 搜索 + 排序后的分页器, 同一组条件复用 (LRU)"""
+        search = (search or '').strip()
+        key = (status, region, search.lower(), column, descending)
+        with self._lock:
+            pager = self._pagers.get(key)
+            if pager is not None:
+                self._pagers.move_to_end(key)
+                return pager
+
+        selection = self.select(status, region)
+        if search:
+            selection = selection & self.name_matches(search)
+        perm = self.sort_permutation(column, descending)
+        pager = RowPager(perm, None if selection is self.all else selection)
+
+        with self._lock:
+            self._pagers[key] = pager
+            while len(self._pagers) > _MAX_PAGERS:
+                self._pagers.popitem(last=False)
+        return pager
+
+    def sorted_rows(self, selection, order):
+        """命中行按置换顺序全部返回 (无需再排序)"""
+        perm = self.orders[order]
+        if selection is self.all:
+            return perm
+        return perm[selection.contains(perm)]
+
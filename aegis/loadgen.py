@@ -0,0 +1,198 @@
+"""
+压测数据生成器: 百万~千万级店铺 + 数月小时级 ROAS, 分块并行生成并直接写成 Parquet / Arrow IPC 分片
+- 店铺按 SHOP_CHUNK_ROWS 分块, 每块用 RngStreams 的独立子流 (见 aegis.datagen.generate_fleet),
+  结果与进程数无关; ROAS 按 ROAS_CHUNK_HOURS 小时分块
+- 每个任务在 worker 里生成一块并立即写盘, 只把统计信息传回主进程,
+  内存上限约为 workers x 单块大小, 不随总规模增长
+- 输出目录 shops/ 与 roas/ 可直接作为 AEGIS_SHOP_SOURCE / AEGIS_ROAS_SOURCE 给看板加载 (见 aegis.storage)
+需要 pyarrow (requirements.txt 已列出); 峰值 RSS 在 Linux / macOS 上统计, 其他平台显示 n/a
+
+用法:
+    python -m aegis.loadgen --shops 10000000 --roas-days 180 --out /tmp/aegis_load --workers 4 --verify
+    AEGIS_SHOP_SOURCE=/tmp/aegis_load/shops AEGIS_ROAS_SOURCE=/tmp/aegis_load/roas streamlit run app.py
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from aegis.datagen import SHOP_CHUNK_ROWS, _name_categories, generate_roas_hours, generate_shop_chunk, shop_frame
+from aegis.rng import ROOT_SEED, RngStreams
+
+try:
+    from aegis.storage import write_roas_frame, write_shop_frame
+except ImportError as e:
+    if not (e.name or '').startswith('pyarrow'):
+        raise
+    raise ImportError("aegis.loadgen 写 Parquet / Arrow IPC 分片需要 pyarrow: pip install pyarrow") from e
+
+ROAS_CHUNK_HOURS = 30 * 24
+
+# --format -> 分片扩展名
+SHARD_EXTENSIONS = {
+    'parquet': '.parquet',
+    'ipc': '.arrow',
+}
+
+MANIFEST = '_manifest.json'  # '_' 开头, 读分片目录时被忽略
+
+
+def shard_path(out_dir, index, ext):
+    return os.path.join(out_dir, f"part-{index:05d}{ext}")
+
+
+def write_shop_shard(streams, index, n_shops, chunk_rows, out_dir, ext):
+    """生成第 index 块店铺并写盘, 返回统计"""
+    start = time.perf_counter()
+    frame = shop_frame(generate_shop_chunk(streams, index, n_shops, chunk_rows), name_seed=streams.int_seed('names'))
+    generated = time.perf_counter()
+    path = shard_path(out_dir, index, ext)
+    write_shop_frame(frame, path)
+    return {'rows': len(frame), 'generate_s': generated - start, 'write_s': time.perf_counter() - generated,
+            'bytes': os.path.getsize(path)}
+
+
+def write_roas_shard(streams, index, n_hours, chunk_hours, start, out_dir, ext):
+    """生成第 index 段 (chunk_hours 小时) ROAS 时序并写盘, 返回统计"""
+    begin = time.perf_counter()
+    offset = index * chunk_hours
+    frame = generate_roas_hours(pd.Timestamp(start) + pd.Timedelta(hours=offset), min(chunk_hours, n_hours - offset),
+                                streams.generator('roas', index))
+    generated = time.perf_counter()
+    path = shard_path(out_dir, index, ext)
+    write_roas_frame(frame, path)
+    return {'rows': len(frame), 'generate_s': generated - begin, 'write_s': time.perf_counter() - generated,
+            'bytes': os.path.getsize(path)}
+
+
+def _warm_names(name_seed):
+    """worker 初始化: 名称池 (Faker) 每个进程只建一次, 不计入各块的生成耗时"""
+    _name_categories(seed=name_seed)
+
+
+def prepare_dir(out_dir, overwrite):
+    os.makedirs(out_dir, exist_ok=True)
+    stale = glob.glob(os.path.join(out_dir, 'part-*'))
+    if stale and not overwrite:
+        raise SystemExit(f"{out_dir} 已有 {len(stale)} 个分片, 加 --overwrite 覆盖")
+    for path in stale:
+        os.remove(path)
+
+
+def run_stage(task, n_tasks, streams, workers):
+    """依次 / 并行执行 task(i) (i = 块号), 汇总各块统计"""
+    start = time.perf_counter()
+    if workers > 1 and n_tasks > 1:
+        with ProcessPoolExecutor(min(workers, n_tasks), initializer=_warm_names,
+                                 initargs=(streams.int_seed('names'),)) as pool:
+            results = list(pool.map(task, range(n_tasks)))
+    else:
+        _warm_names(streams.int_seed('names'))
+        results = [task(i) for i in range(n_tasks)]
+    totals = {key: sum(r[key] for r in results) for key in ('rows', 'generate_s', 'write_s', 'bytes')}
+    totals.update(shards=n_tasks, wall_s=time.perf_counter() - start)
+    return totals
+
+
+def peak_rss_mb():
+    """(本进程, 子进程中最大) 峰值 RSS; 取不到的记为 nan
+
+    Linux 本进程读 /proc 的 VmHWM, 其余用 ru_maxrss (Linux 单位 KB, macOS 为字节); Windows 没有 resource 模块
+    """
+    own = children = float('nan')
+    try:
+        with open('/proc/self/status') as f:
+            own = next((int(line.split()[1]) / 1024 for line in f if line.startswith('VmHWM:')), own)
+    except OSError:  # 没有 /proc (macOS 等)
+        pass
+    try:
+        import resource  # 仅 Unix
+    except ImportError:
+        return own, children
+    unit = 2**20 if sys.platform == 'darwin' else 1024
+    if own != own:
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return own, children
+
+
+def format_mb(value):
+    return 'n/a' if value != value else f"{value:,.0f} MB"
+
+
+def report(stage, stats):
+    rows, wall = stats['rows'], stats['wall_s']
+    gen_rate = rows / stats['generate_s'] if stats['generate_s'] else float('inf')
+    write_rate = stats['bytes'] / 2**20 / stats['write_s'] if stats['write_s'] else float('inf')
+    print(f"{stage:<6}{stats['shards']:>6}{rows:>14,}{wall:>9.2f}{rows / wall:>14,.0f}"
+          f"{gen_rate:>14,.0f}{write_rate:>11,.1f}{stats['bytes'] / 2**20:>10,.1f}")
+
+
+def verify(out_dir, n_shops, n_hours):
+    """按看板的加载路径读回分片, 确认行数并报告加载耗时"""
+    from aegis.snapshot import ShopSnapshot
+    from aegis.storage import load_roas_frame, load_shop_frame
+
+    start = time.perf_counter()
+    snapshot = ShopSnapshot(load_shop_frame(os.path.join(out_dir, 'shops')))
+    shop_s = time.perf_counter() - start
+    start = time.perf_counter()
+    roas = load_roas_frame(os.path.join(out_dir, 'roas'), hours=ROAS_CHUNK_HOURS)
+    roas_s = time.perf_counter() - start
+    assert snapshot.n_shops == n_shops, (snapshot.n_shops, n_shops)
+    assert len(roas) == min(n_hours, ROAS_CHUNK_HOURS), len(roas)
+    print(f"\n读回: 店铺快照 {snapshot.n_shops:,} 行 {shop_s:.2f}s, ROAS 最近 {len(roas):,} 小时 {roas_s:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, default=1_000_000)
+    parser.add_argument('--roas-days', type=int, default=90)
+    parser.add_argument('--out', default='loadtest_data')
+    parser.add_argument('--format', choices=list(SHARD_EXTENSIONS), default='parquet')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-rows', type=int, default=SHOP_CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=ROOT_SEED)
+    parser.add_argument('--overwrite', action='store_true')
+    parser.add_argument('--verify', action='store_true', help='写完后按看板的加载路径读回并计时')
+    args = parser.parse_args(argv)
+
+    streams = RngStreams(args.seed)
+    ext = SHARD_EXTENSIONS[args.format]
+    n_hours = args.roas_days * 24
+    end = pd.Timestamp.now().floor('h')
+    start = end - pd.Timedelta(hours=n_hours - 1)
+    shop_dir, roas_dir = os.path.join(args.out, 'shops'), os.path.join(args.out, 'roas')
+    prepare_dir(shop_dir, args.overwrite)
+    prepare_dir(roas_dir, args.overwrite)
+
+    print(f"{'阶段':<6}{'分片':>6}{'行数':>14}{'耗时 s':>9}{'行/s (整体)':>14}{'行/s (生成)':>14}"
+          f"{'写 MB/s':>11}{'大小 MB':>10}")
+    shop_task = partial(write_shop_shard, streams, n_shops=args.shops, chunk_rows=args.chunk_rows,
+                        out_dir=shop_dir, ext=ext)
+    report('店铺', run_stage(shop_task, -(-args.shops // args.chunk_rows), streams, args.workers))
+    roas_task = partial(write_roas_shard, streams, n_hours=n_hours, chunk_hours=ROAS_CHUNK_HOURS,
+                        start=start.isoformat(), out_dir=roas_dir, ext=ext)
+    report('ROAS', run_stage(roas_task, -(-n_hours // ROAS_CHUNK_HOURS), streams, args.workers))
+
+    for out_dir, rows in ((shop_dir, args.shops), (roas_dir, n_hours)):
+        with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+            json.dump({'seed': args.seed, 'rows': rows, 'chunk_rows': args.chunk_rows,
+                       'roas_chunk_hours': ROAS_CHUNK_HOURS, 'format': args.format, 'end': end.isoformat()}, f)
+
+    own, children = peak_rss_mb()
+    print(f"\n峰值 RSS: 主进程 {format_mb(own)}, 单个 worker 最大 {format_mb(children)} (workers={args.workers})")
+    if args.verify:
+        verify(args.out, args.shops, n_hours)
+    print(f"\n看板加载: AEGIS_SHOP_SOURCE={shop_dir} AEGIS_ROAS_SOURCE={roas_dir} streamlit run app.py")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
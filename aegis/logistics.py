@@ -0,0 +1,407 @@
+"""
+物流网络: 港口 / 仓库空间索引 + 站点滚动延迟聚合
+- GridIndex: 经纬度网格分桶 (按格子排序 + 二分定位), 批量最近站点查询全部向量化,
+  只在 3x3 邻域内算距离, 邻域不足以保证最近时才回退到全量扫描
+- HubDelayStats: 发货事件按最近站点归集, 每站点按小时分桶环形累积 事件数 / 延迟和 / 最大延迟
+- LogisticsNetwork: 站点 + 索引 + 滚动聚合; 给地图按缩放粒度输出预聚合点, 给店铺算拥堵暴露度
+
+店铺表没有坐标: 店铺位置由 shop_id 哈希在所属区域中心附近确定 (同一 shop_id 位置固定, 店铺区域视为不变),
+最近站点与距离按 shop_id 缓存, 快照增量更新后只为新出现的 shop_id 查索引
+"""
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+# 区域中心 (纬度, 经度) 与散布半径 (度)
+REGION_CENTERS = {
+    'US-East': (40.0, -77.0),
+    'US-West': (36.0, -119.0),
+    'UK': (52.5, -1.5),
+    'EU': (49.0, 8.0),
+}
+REGION_SPREAD_DEG = 4.0
+
+# 原先地图上的 5 个港口, 作为网络中的固定站点保留 (拥堵基线 0~100)
+MAJOR_PORTS = pd.DataFrame({
+    'name': ['Los Angeles', 'Long Beach', 'New York', 'Felixstowe', 'Rotterdam'],
+    'lat': [33.7, 33.8, 40.7, 51.9, 51.9],
+    'lon': [-118.2, -118.1, -74.0, 1.3, 4.5],
+    'region': ['US-West', 'US-West', 'US-East', 'UK', 'EU'],
+    'congestion': [85, 78, 65, 72, 45],
+})
+
+# 地图粒度 -> 聚合格子边长 (度), None 为逐站点
+MAP_LEVELS = {
+    '全球': 8.0,
+    '区域': 2.0,
+    '城市': 0.5,
+    '站点': None,
+}
+
+WINDOW_HOURS = 24
+EXPOSURE_DECAY_KM = 300.0  # 店铺离站点越远, 受其拥堵影响越小
+
+# 暴露度 (0~1) -> 延迟发货率目标: 无拥堵 2%, 满拥堵 27% (覆盖 Beta(2, 5) * 0.3 的主要区间)
+BASE_DELAY_RATE = 0.02
+DELAY_RATE_PER_EXPOSURE = 0.25
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=np.float64)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def unit_vectors(lat, lon):
+    """经纬度 -> 单位球面坐标 (x, y, z); 两点弦长平方与球面距离单调, 比较远近时不用三角函数"""
+    lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+    return np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)
+
+
+def chord2_to_km(chord2):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.sqrt(chord2) / 2, 1))
+
+
+def _ranges(starts, counts):
+    """把若干 [start, start + count) 区间展开成一个下标数组"""
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+class GridIndex:
+    """经纬度网格上的点索引
+
+    点按格子编号排序, 每个格子对应排序后的一段连续下标, 全网格的段起点存成一张偏移表 (CSR),
+    查格子是 O(1) 的数组下标. 最近点查询只在 3x3 邻域内算距离;
+    邻域内最近距离超过"邻域外不可能更近"的半径 (或邻域为空) 的查询, 交给 coarsen 倍边长的上一层网格,
+    直到格子边长超过 max_cell_deg 后全量扫描
+    """
+
+    def __init__(self, lat, lon, cell_deg=0.25, coarsen=4, max_cell_deg=30.0):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.xyz = unit_vectors(self.lat, self.lon)
+        self.cell_deg = cell_deg
+        self._n_cols = int(np.ceil(360 / cell_deg))
+        # 边长不整除 360 时最后一列 (跨 180° 经线) 较窄, 邻域外的安全半径按最窄的列算
+        self._col_deg = min(cell_deg, 360 - (self._n_cols - 1) * cell_deg)
+        self._n_rows = int(np.floor(180 / cell_deg)) + 3  # 上下各留一行空格子, 邻域越过两极时不用判断
+        cells = self.cell_of(self.lat, self.lon)
+        self._order = np.argsort(cells, kind='stable')
+        self._offsets = np.zeros(self._n_rows * self._n_cols + 1, dtype=np.int32)
+        np.cumsum(np.bincount(cells, minlength=self._n_rows * self._n_cols), out=self._offsets[1:])
+        self._coarsen = coarsen
+        self._max_cell_deg = max_cell_deg
+        self._parent = None
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _coords(self, lat, lon):
+        row = np.floor((np.asarray(lat) + 90) / self.cell_deg).astype(np.int64) + 1
+        col = np.floor((np.asarray(lon) + 180) / self.cell_deg).astype(np.int64) % self._n_cols
+        return row, col
+
+    def _cells(self, row, col):
+        return row * self._n_cols + col % self._n_cols
+
+    def cell_of(self, lat, lon):
+        return self._cells(*self._coords(lat, lon))
+
+    def nearest(self, lat, lon):
+        """批量最近点, 返回 (点下标, 距离 km)"""
+        best, chord2 = self._nearest(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+        return best, chord2_to_km(chord2)
+
+    def _nearest(self, lat, lon):
+        """返回 (点下标, 弦长平方)"""
+        n = len(lat)
+        best = np.full(n, -1, dtype=np.int64)
+        dist = np.full(n, np.inf)
+        row, col = self._coords(lat, lon)
+        qx, qy, qz = unit_vectors(lat, lon)
+        px, py, pz = self.xyz
+
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                cells = self._cells(row + dr, col + dc)
+                starts = self._offsets[cells]
+                counts = self._offsets[cells + 1] - starts
+                hit = np.flatnonzero(counts)
+                if not len(hit):
+                    continue
+                # (查询, 候选点) 对按查询连续排列, 每组取最小距离
+                queries = np.repeat(hit, counts[hit])
+                points = self._order[_ranges(starts[hit], counts[hit])]
+                d = (qx[queries] - px[points]) ** 2 + (qy[queries] - py[points]) ** 2 + (qz[queries] - pz[points]) ** 2
+                group_start = np.cumsum(counts[hit]) - counts[hit]
+                group_min = np.minimum.reduceat(d, group_start)
+                first = np.flatnonzero(d == np.repeat(group_min, counts[hit]))
+                first = first[np.r_[True, queries[first][1:] != queries[first][:-1]]]
+                closer = (d[first] < dist[hit]) | ((d[first] == dist[hit]) & (points[first] < best[hit]))
+                best[hit[closer]] = points[first][closer]
+                dist[hit[closer]] = d[first][closer]
+
+        # 邻域外一列宽度内不可能有更近的点 (按最窄的列和邻域最靠极点一侧的经度缩放)
+        edge_lat = np.minimum(np.abs(lat) + 2 * self.cell_deg, 90)
+        safe_km = 0.99 * self._col_deg * KM_PER_DEGREE * np.cos(np.radians(edge_lat))
+        unresolved = np.flatnonzero(dist > (2 * np.sin(safe_km / (2 * EARTH_RADIUS_KM))) ** 2)
+        if len(unresolved):
+            best[unresolved], dist[unresolved] = self._fallback(lat[unresolved], lon[unresolved])
+        return best, dist
+
+    def _fallback(self, lat, lon):
+        cell_deg = self.cell_deg * self._coarsen
+        if cell_deg <= self._max_cell_deg:
+            if self._parent is None:
+                self._parent = GridIndex(self.lat, self.lon, cell_deg, self._coarsen, self._max_cell_deg)
+            return self._parent._nearest(lat, lon)
+        best = np.empty(len(lat), dtype=np.int64)
+        dist = np.empty(len(lat))
+        qx, qy, qz = unit_vectors(lat, lon)
+        px, py, pz = self.xyz
+        step = max(1, (1 << 22) // max(len(self), 1))  # (查询, 点) 距离矩阵控制在约 4M 个元素
+        for lo in range(0, len(lat), step):
+            hi = lo + step
+            d = (qx[lo:hi, None] - px) ** 2 + (qy[lo:hi, None] - py) ** 2 + (qz[lo:hi, None] - pz) ** 2
+            best[lo:hi] = d.argmin(axis=1)
+            dist[lo:hi] = d[np.arange(len(d)), best[lo:hi]]
+        return best, dist
+
+
+class HubDelayStats:
+    """每站点按小时分桶的滚动延迟聚合 (最近 window_hours 小时)"""
+
+    def __init__(self, n_hubs, window_hours=WINDOW_HOURS):
+        self.window = window_hours
+        self.bucket = np.full(window_hours, np.iinfo(np.int64).min, dtype=np.int64)  # 槽位当前存的小时号
+        self.events = np.zeros((window_hours, n_hubs), dtype=np.int64)
+        self.delay_sum = np.zeros((window_hours, n_hubs))
+        self.delay_max = np.zeros((window_hours, n_hubs))
+        self.latest = None
+
+    def ingest(self, ts, hub, delay_days):
+        """ts 为秒; 比窗口还旧的事件丢弃, 返回丢弃数"""
+        hours = np.asarray(ts, dtype=np.int64) // 3600
+        slot = hours % self.window
+        latest = self.bucket.copy()
+        np.maximum.at(latest, slot, hours)
+        stale = np.flatnonzero(latest != self.bucket)
+        self.events[stale] = 0
+        self.delay_sum[stale] = 0
+        self.delay_max[stale] = 0
+        self.bucket = latest
+
+        ok = hours == self.bucket[slot]
+        at = (slot[ok], np.asarray(hub)[ok])
+        delay_days = np.asarray(delay_days, dtype=np.float64)[ok]
+        np.add.at(self.events, at, 1)
+        np.add.at(self.delay_sum, at, delay_days)
+        np.maximum.at(self.delay_max, at, delay_days)
+        if len(hours):
+            self.latest = int(hours.max()) if self.latest is None else max(self.latest, int(hours.max()))
+        return int((~ok).sum())
+
+    def totals(self):
+        """窗口内每站点的 (事件数, 平均延迟天数, 最大延迟天数)"""
+        if self.latest is None:
+            n = self.events.shape[1]
+            return np.zeros(n, dtype=np.int64), np.full(n, np.nan), np.zeros(n)
+        live = (self.bucket > self.latest - self.window) & (self.bucket <= self.latest)
+        events = self.events[live].sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_delay = self.delay_sum[live].sum(axis=0) / events
+        return events, mean_delay, self.delay_max[live].max(axis=0, initial=0)
+
+
+def generate_hubs(n_hubs=2000, seed=42):
+    """模拟站点网络: MAJOR_PORTS + 各区域中心附近随机分布的港口 / 仓库, 返回 DataFrame
+
+    capacity 为每小时可处理的发货事件数; congestion 为拥堵基线 (模拟事件的延迟与之相关)
+    """
+    rng = np.random.default_rng(seed)
+    n = max(n_hubs - len(MAJOR_PORTS), 0)
+    regions = np.array(list(REGION_CENTERS))[rng.choice(len(REGION_CENTERS), n, p=[0.4, 0.3, 0.2, 0.1])]
+    centers = np.array([REGION_CENTERS[r] for r in regions]).reshape(-1, 2)
+    kind = np.where(rng.random(n) < 0.1, 'port', 'warehouse')
+    synthetic = pd.DataFrame({
+        'name': [f"{r}-{k[0].upper()}{i:05d}" for i, (r, k) in enumerate(zip(regions, kind))],
+        'lat': centers[:, 0] + rng.normal(0, REGION_SPREAD_DEG / 2, n),
+        'lon': centers[:, 1] + rng.normal(0, REGION_SPREAD_DEG, n),
+        'region': regions,
+        'kind': kind,
+        'congestion': np.clip(rng.beta(2, 4, n) * 100, 0, 100),
+    })
+    ports = MAJOR_PORTS.assign(kind='port')
+    hubs = pd.concat([ports, synthetic], ignore_index=True)
+    hubs['capacity'] = np.where(hubs['kind'] == 'port', 40.0, 8.0) * rng.lognormal(0, 0.3, len(hubs))
+    return hubs
+
+
+def shop_locations(shop_ids, regions):
+    """shop_id 哈希 -> 所属区域中心附近的固定坐标; 未知区域放在全部区域中心的均值处"""
+    h = np.asarray(shop_ids, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    h ^= h >> np.uint64(31)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(29)
+    u = (h >> np.uint64(11)).astype(np.float64) / 2 ** 53
+    v = ((h << np.uint64(32)) >> np.uint64(11)).astype(np.float64) / 2 ** 53
+
+    fallback = np.mean(list(REGION_CENTERS.values()), axis=0)
+    names, codes = np.unique(np.asarray(regions, dtype=str), return_inverse=True)
+    centers = np.array([REGION_CENTERS.get(r, fallback) for r in names]).reshape(-1, 2)[codes.ravel()]
+    radius = REGION_SPREAD_DEG * np.sqrt(u)  # 圆盘内均匀
+    angle = 2 * np.pi * v
+    return centers[:, 0] + radius * np.sin(angle), centers[:, 1] + radius * np.cos(angle)
+
+
+class LogisticsNetwork:
+    """站点网络 + 空间索引 + 滚动延迟聚合"""
+
+    def __init__(self, hubs, cell_deg=0.25, window_hours=WINDOW_HOURS):
+        self.hubs = hubs.reset_index(drop=True)
+        self.index = GridIndex(self.hubs['lat'], self.hubs['lon'], cell_deg)
+        self.stats = HubDelayStats(len(self.hubs), window_hours)
+        self.version = 0
+        self._exposure = (None, None)  # (快照版本, 按行排列的暴露度)
+        self._congestion = (None, None)  # (网络版本, 每站点拥堵度 0~1)
+        # 按 shop_id 升序: (shop_id, 最近站点, 距离 km)
+        self._shop_hubs = (np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64), np.empty(0))
+
+    def ingest_shipments(self, ts, lat, lon, delay_days):
+        """发货事件 (秒, 坐标, 延迟天数) 按最近站点归集"""
+        hub, _ = self.index.nearest(lat, lon)
+        dropped = self.stats.ingest(ts, hub, delay_days)
+        self.version += 1
+        self._exposure = (None, None)
+        return dropped
+
+    def hub_status(self):
+        """每站点当前窗口的 事件数 / 平均延迟 / 拥堵度 (窗口内每小时事件数 / 处理能力, 0~100)"""
+        events, mean_delay, max_delay = self.stats.totals()
+        per_hour = events / self.stats.window
+        congestion = np.clip(per_hour / self.hubs['capacity'].to_numpy() * 100, 0, 100)
+        return self.hubs[['name', 'lat', 'lon', 'region', 'kind']].assign(
+            events=events,
+            delay_days=np.nan_to_num(mean_delay),
+            max_delay_days=max_delay,
+            congestion_level=congestion,
+        )
+
+    def map_points(self, level='区域'):
+        """地图点集: 站点按 MAP_LEVELS 的格子合并, 位置取格内站点均值, 延迟按事件数加权, 拥堵取格内最大值"""
+        status = self.hub_status()
+        cell_deg = MAP_LEVELS[level]
+        if cell_deg is None:
+            return status.rename(columns={'name': 'port'}).assign(hubs=1)
+
+        cells = GridIndex(status['lat'], status['lon'], cell_deg).cell_of(status['lat'], status['lon'])
+        keys, group = np.unique(cells, return_inverse=True)
+        count = np.bincount(group)
+        events = np.bincount(group, weights=status['events'].to_numpy())
+        delay_weight = np.bincount(group, weights=status['events'].to_numpy() * status['delay_days'].to_numpy())
+        congestion = status['congestion_level'].to_numpy()
+        peak = np.full(len(keys), -1.0)
+        np.maximum.at(peak, group, congestion)
+
+        # 每格以最拥堵的站点命名
+        order = np.lexsort((congestion, group))
+        top = order[np.r_[group[order][1:] != group[order][:-1], True]]
+        names = status['name'].to_numpy()[top]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delay = np.where(events > 0, delay_weight / events, 0.0)
+        return pd.DataFrame({
+            'port': [name if c == 1 else f"{name} 等 {c} 个站点" for name, c in zip(names, count)],
+            'lat': np.bincount(group, weights=status['lat'].to_numpy()) / count,
+            'lon': np.bincount(group, weights=status['lon'].to_numpy()) / count,
+            'congestion_level': peak,
+            'delay_days': delay,
+            'events': events.astype(np.int64),
+            'hubs': count,
+        })
+
+    def hub_congestion(self):
+        """每站点当前拥堵度 (0~1), 同一网络版本只算一次"""
+        version, congestion = self._congestion
+        if version != self.version:
+            congestion = self.hub_status()['congestion_level'].to_numpy() / 100
+            self._congestion = (self.version, congestion)
+        return congestion
+
+    def shop_hubs(self, snapshot, rows=None):
+        """rows 行 (默认全部) 店铺的 (最近站点下标, 距离 km); 按 shop_id 缓存, 只为没见过的 shop_id 查索引"""
+        all_ids = snapshot.column('shop_id')
+        ids = all_ids if rows is None else all_ids[rows]
+        known_ids, known_hub, known_dist = self._shop_hubs
+        pos = np.searchsorted(known_ids, ids)
+        found = pos < len(known_ids)
+        found[found] = known_ids[pos[found]] == ids[found]
+        if not found.all():
+            new_ids, first = np.unique(ids[~found], return_index=True)
+            new_rows = np.flatnonzero(~found)[first]
+            if rows is not None:
+                new_rows = np.asarray(rows)[new_rows]
+            regions = np.asarray(snapshot.categories('region'), dtype=object)[snapshot.column('region')[new_rows]]
+            hub, dist = self.index.nearest(*shop_locations(new_ids, regions))
+            at = np.searchsorted(known_ids, new_ids)
+            self._shop_hubs = (np.insert(known_ids, at, new_ids), np.insert(known_hub, at, hub),
+                               np.insert(known_dist, at, dist))
+            known_ids, known_hub, known_dist = self._shop_hubs
+            pos = np.searchsorted(known_ids, ids)
+        return known_hub[pos], known_dist[pos]
+
+    def shop_exposure(self, snapshot):
+        """每家店铺 (快照行顺序) 的 (最近站点下标, 距离 km, 拥堵暴露度 0~1), 同一快照版本只算一次"""
+        version, cached = self._exposure
+        if version == snapshot.version:
+            return cached
+        hub, dist = self.shop_hubs(snapshot)
+        exposure = self.hub_congestion()[hub] * np.exp(-dist / EXPOSURE_DECAY_KM)
+        cached = (hub, dist, exposure)
+        self._exposure = (snapshot.version, cached)
+        return cached
+
+    def exposed_hubs(self, snapshot, top=10):
+        """按关联店铺的暴露度之和排序的站点: 哪些站点的拥堵影响的店铺最多"""
+        hub, _, exposure = self.shop_exposure(snapshot)
+        shops = np.bincount(hub, minlength=len(self.hubs))
+        load = np.bincount(hub, weights=exposure, minlength=len(self.hubs))
+        status = self.hub_status()
+        order = np.argsort(-load, kind='stable')[:top]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_exposure = load[order] / shops[order]
+        return pd.DataFrame({
+            '站点': status['name'].to_numpy()[order],
+            '区域': status['region'].to_numpy()[order],
+            '拥堵度': status['congestion_level'].to_numpy()[order].round(0),
+            '平均延迟 (天)': status['delay_days'].to_numpy()[order].round(1),
+            '关联店铺': shops[order],
+            '平均暴露度': mean_exposure.round(2),
+        })
+
+    def delay_rate_target(self, snapshot, rows):
+        """rows 行店铺在当前拥堵下的延迟发货率目标 (供模拟增量源向其回归); 只查 rows 行, 不算全量暴露度"""
+        hub, dist = self.shop_hubs(snapshot, rows)
+        exposure = self.hub_congestion()[hub] * np.exp(-dist / EXPOSURE_DECAY_KM)
+        return BASE_DELAY_RATE + DELAY_RATE_PER_EXPOSURE * exposure
+
+
+def simulate_shipments(hubs, n_events, hours=WINDOW_HOURS, end_ts=None, seed=42):
+    """模拟发货事件: 按站点处理能力抽样, 坐标在站点附近抖动, 延迟天数 ~ Gamma, 均值随站点拥堵基线上升
+
+    返回 (ts 秒, lat, lon, delay_days)
+    """
+    rng = np.random.default_rng(seed)
+    weights = hubs['capacity'].to_numpy() * (0.5 + hubs['congestion'].to_numpy() / 100)
+    hub = rng.choice(len(hubs), n_events, p=weights / weights.sum())
+    end_ts = int(pd.Timestamp.now().timestamp()) if end_ts is None else end_ts
+    ts = end_ts - rng.integers(0, hours * 3600, n_events)
+    lat = hubs['lat'].to_numpy()[hub] + rng.normal(0, 0.05, n_events)
+    lon = hubs['lon'].to_numpy()[hub] + rng.normal(0, 0.05, n_events)
+    mean_delay = 1 + hubs['congestion'].to_numpy()[hub] / 100 * 8  # 拥堵 85 的港口约 8 天
+    delay = rng.gamma(4.0, mean_delay / 4.0)
+    return ts, lat, lon, delay
@@ -0,0 +1,238 @@
+"""
+快照增量刷新
+后台线程定期从数据源拉取变更: 店铺表按 shop_id upsert, ROAS 时序追加新的小时 (同时合并进多尺度预聚合);
+新版本在后台构建并预热索引 / KPI 后, 用一次引用赋值原子发布 (双缓冲),
+读者随时拿到的都是完整的旧版本或新版本, 从不阻塞, 页面热路径也不再同步跑生成器
+"""
+
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from aegis.breaker import is_circuit_breaker
+from aegis.schema import FLAG_CNY, SHOP_SCHEMA, enforce_shop_schema, pack_flags
+
+logger = logging.getLogger(__name__)
+
+
+def append_roas(roas_df, new_rows, hours=None):
+    """追加新的 ROAS 小时, 只保留最后 hours 行"""
+    if new_rows is None or len(new_rows) == 0:
+        return roas_df
+    roas_df = pd.concat([roas_df, new_rows[roas_df.columns]], ignore_index=True)
+    if hours is not None and len(roas_df) > hours:
+        roas_df = roas_df.iloc[-hours:].reset_index(drop=True)
+    return roas_df
+
+
+def diff_shops(snapshot, frame):
+    """新的全量店铺表与快照比对, 只返回新增或有变化的行 (快照中有、新表里没有的店铺不删除)"""
+    frame = enforce_shop_schema(frame).drop_duplicates('shop_id', keep='last').reset_index(drop=True)
+    rows = snapshot.locate(frame['shop_id'].to_numpy())
+    known = rows >= 0
+    changed = ~known
+    for name in SHOP_SCHEMA:
+        if name == 'shop_id':
+            continue
+        old = snapshot.column(name)[rows[known]]
+        if isinstance(frame[name].dtype, pd.CategoricalDtype):
+            # 新表的标签映射到快照的编码; 快照里没有的标签编码为 -1, 必然不相等
+            new = pd.Categorical(frame[name], categories=snapshot.categories(name)).codes[known]
+        else:
+            new = frame[name].to_numpy()[known]
+        changed[known] |= old != new
+    return frame[changed]
+
+
+class SimulatedDeltaSource:
+    """本地模拟变更源: 每次随机改动一部分店铺的指标, 每过 roas_interval 秒产出一个新的 ROAS 小时
+
+    真实接入时实现同样的两个方法即可 (例如读 API 增量或落地的增量文件)
+    delay_target(snapshot, rows) 给出变更行的延迟发货率目标 (如 LogisticsNetwork.delay_rate_target),
+    设置后延迟率每次向目标回归 delay_pull, 否则只做随机游走
+    """
+
+    def __init__(self, change_fraction=0.01, roas_interval=60.0, seed=42, delay_target=None, delay_pull=0.2):
+        self.change_fraction = change_fraction
+        self.roas_interval = roas_interval
+        self.delay_target = delay_target
+        self.delay_pull = delay_pull
+        self._rng = np.random.default_rng(seed)
+        self._last_roas = time.monotonic()
+
+    def shop_changes(self, snapshot):
+        """返回变更行 (紧凑 Schema), 没有变更时返回 None"""
+        n = max(int(snapshot.n_shops * self.change_fraction), 1) if snapshot.n_shops else 0
+        if n == 0:
+            return None
+        rows = np.sort(self._rng.choice(snapshot.n_shops, n, replace=False))
+        changes = snapshot.take(rows).reset_index(drop=True)
+
+        sps = np.clip(changes['sps_score'].to_numpy() + self._rng.normal(0, 0.05, n), 2.0, 5.0).round(2)
+        delay = changes['shipping_delay_rate'].to_numpy().astype(np.float64)
+        if self.delay_target is not None:
+            delay += self.delay_pull * (self.delay_target(snapshot, rows) - delay)
+        delay = np.clip(delay + self._rng.normal(0, 0.01, n), 0.0, 1.0).round(3)
+        orders = np.maximum(changes['daily_orders'].to_numpy() * self._rng.uniform(0.9, 1.1, n), 1)
+        flags = changes['flags'].to_numpy()
+        is_critical = sps < 3.5
+        return changes.assign(
+            sps_score=sps.astype(np.float32),
+            shipping_delay_rate=delay.astype(np.float32),
+            daily_orders=orders.astype(np.uint32),
+            flags=pack_flags(is_critical, (sps >= 3.5) & (sps < 3.6), ~is_critical, (flags & FLAG_CNY) != 0),
+        )
+
+    def roas_rows(self, roas_df):
+        """到点时返回下一个小时的 ROAS 行"""
+        now = time.monotonic()
+        if now - self._last_roas < self.roas_interval or len(roas_df) == 0:
+            return None
+        self._last_roas = now
+        roas = np.array([2.5 + self._rng.normal(0, 0.3)])
+        velocity = np.array([1.0 if self._rng.random() > 0.1 else self._rng.uniform(2.2, 3.5)])
+        if velocity[0] > 2:
+            roas = self._rng.uniform(0.7, 1.3, 1)
+        return pd.DataFrame({
+            'timestamp': [roas_df['timestamp'].iloc[-1] + pd.Timedelta(hours=1)],
+            'roas': roas,
+            'spend_velocity': velocity,
+            'is_circuit_breaker': is_circuit_breaker(roas, velocity),
+        })
+
+
+class FileDeltaSource:
+    """文件数据源 (见 aegis.storage): 文件被覆盖 (mtime 变化) 后重新扫描,
+    只把有变化的店铺行和比当前更新的 ROAS 小时交给刷新器; 分片目录以其中最新的文件 mtime 为准"""
+
+    def __init__(self, shop_path=None, roas_path=None):
+        self.shop_path = shop_path
+        self.roas_path = roas_path
+        self._mtimes = {path: self._mtime(path) for path in (shop_path, roas_path) if path}
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            if os.path.isdir(path):
+                return max((entry.stat().st_mtime_ns for entry in os.scandir(path)), default=None)
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _modified(self, path):
+        mtime = self._mtime(path)
+        if mtime is None or mtime == self._mtimes.get(path):
+            return False
+        self._mtimes[path] = mtime
+        return True
+
+    def shop_changes(self, snapshot):
+        if not self.shop_path or not self._modified(self.shop_path):
+            return None
+        from aegis.storage import load_shop_frame
+        return diff_shops(snapshot, load_shop_frame(self.shop_path))
+
+    def roas_rows(self, roas_df):
+        if not self.roas_path or not self._modified(self.roas_path):
+            return None
+        from aegis.storage import load_roas_frame
+        latest = load_roas_frame(self.roas_path)
+        if len(roas_df):
+            latest = latest[latest['timestamp'] > roas_df['timestamp'].iloc[-1]]
+        return latest
+
+
+class SnapshotRefresher:
+    """后台增量刷新 + 原子发布
+
+    current() 返回 (ShopSnapshot, roas_df, RoasRollup | None), 不加锁; stats() 返回刷新延迟 / 耗时等指标
+    roas_hours 只限制原始 ROAS 点 (画图用) 的保留时长, 更长窗口的指标由 rollup 提供
+    subscribe(callback) 注册发布回调 callback(旧状态, 新状态), 在刷新线程里调用 (如 AlertDispatcher.observe)
+    """
+
+    def __init__(self, snapshot, roas_df, source, interval=30.0, roas_hours=None, rollup=None):
+        self.source = source
+        self.interval = interval
+        self.roas_hours = roas_hours
+        self._state = (snapshot, roas_df, rollup)  # 单次引用赋值即发布
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='snapshot-refresher', daemon=True)
+        self._subscribers = []
+
+        self.refreshes = 0
+        self.errors = 0
+        self.rows_changed = 0
+        self.last_duration = 0.0
+        self.last_error = None
+        self.published_at = time.time()
+
+    def current(self):
+        return self._state
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return callback
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def refresh_once(self):
+        """拉一次变更并发布新版本, 返回本次变更的店铺数"""
+        start = time.perf_counter()
+        previous = snapshot, roas_df, rollup = self._state
+
+        changes = self.source.shop_changes(snapshot)
+        changed = 0 if changes is None else len(changes)
+        if changed:
+            snapshot = snapshot.upsert(changes)
+            snapshot.index  # 后台预热位图 / 排序置换, 读者拿到时已就绪
+            snapshot.kpis
+        new_rows = self.source.roas_rows(roas_df)
+        if rollup is not None and new_rows is not None and len(new_rows):
+            rollup = rollup.copy()  # 写时复制, 读者手里的旧版本不变
+            rollup.ingest_frame(new_rows)
+        roas_df = append_roas(roas_df, new_rows, self.roas_hours)
+
+        self._state = (snapshot, roas_df, rollup)
+        self.published_at = time.time()
+        self.last_duration = time.perf_counter() - start
+        self.refreshes += 1
+        self.rows_changed += changed
+        for callback in self._subscribers:
+            try:
+                callback(previous, self._state)
+            except Exception:  # 回调失败不影响已发布的新版本
+                logger.exception("refresh subscriber failed")
+        return changed
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh_once()
+            except Exception as e:  # 刷新失败继续提供旧版本
+                self.errors += 1
+                self.last_error = repr(e)
+                logger.exception("snapshot refresh failed")
+
+    def stats(self):
+        snapshot = self._state[0]
+        now = time.time()
+        return {
+            'version': snapshot.version,
+            'refreshes': self.refreshes,
+            'rows_changed': self.rows_changed,
+            'lag_seconds': now - snapshot.created_at,  # 当前数据距构建已过去多久
+            'since_publish_seconds': now - self.published_at,
+            'last_duration_ms': self.last_duration * 1e3,
+            'errors': self.errors,
+            'last_error': self.last_error,
+        }
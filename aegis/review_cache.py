@@ -0,0 +1,134 @@
+"""
+差评分类结果持久化缓存 (SQLite)
+键 = hash(分类器版本 + 规范化文本), 内容寻址; WAL 模式下多个 Streamlit worker
+和批量分诊子进程共享同一个文件. 条目数超过上限时按最近使用时间淘汰.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from aegis.reviews import CLASSIFIER_VERSION, normalize_review
+
+DEFAULT_CACHE_PATH = os.getenv(
+    'AEGIS_REVIEW_CACHE', os.path.join(tempfile.gettempdir(), 'aegis_review_cache.sqlite')
+)
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# 每写入多少条检查一次是否需要淘汰
+_EVICT_CHECK_EVERY = 1000
+
+# SQLite 单条语句的参数上限 (保守取 999)
+_SQL_BATCH = 900
+
+
+def review_key(text, version=CLASSIFIER_VERSION):
+    return hashlib.blake2b(f'{version}\0{normalize_review(text)}'.encode(), digest_size=16).digest()
+
+
+class ReviewCache:
+    """跨进程共享的分类结果缓存
+
+    hits / misses 为本进程计数, stats() 额外给出文件中的条目数: 打开时 COUNT(*) 一次,
+    之后随写入 / 淘汰累计, 每次淘汰检查时重新校准 (其他进程的写入在校准前看不到).
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 version=CLASSIFIER_VERSION):
+        self.path = path
+        self.max_entries = max_entries
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._since_evict_check = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS review_cache ('
+            ' key BLOB PRIMARY KEY, result TEXT NOT NULL, last_used INTEGER NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS review_cache_last_used ON review_cache (last_used)')
+        self._entries = self._count()
+
+    def _key(self, text):
+        return review_key(text, self.version)
+
+    def get(self, text):
+        return self.get_many([text])[0]
+
+    def get_many(self, texts):
+        """批量查询, 未命中位置为 None"""
+        keys = [self._key(t) for t in texts]
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _SQL_BATCH):
+                batch = keys[i:i + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f'SELECT key, result FROM review_cache WHERE key IN ({",".join("?" * len(batch))})', batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = int(time.time())
+                self._conn.executemany('UPDATE review_cache SET last_used = ? WHERE key = ?',
+                                       [(now, k) for k in found])
+            self.hits += sum(k in found for k in keys)
+            self.misses += sum(k not in found for k in keys)
+        return [json.loads(found[k]) if k in found else None for k in keys]
+
+    def put(self, text, result):
+        self.put_many([text], [result])
+
+    def put_many(self, texts, results):
+        now = int(time.time())
+        rows = [(self._key(t), json.dumps(r, ensure_ascii=False), now) for t, r in zip(texts, results)]
+        with self._lock:
+            self._conn.execute('BEGIN')
+            # 正常退出 COMMIT, 中途出错 ROLLBACK, 不会把连接留在未结束的事务里
+            with self._conn:
+                added = self._conn.executemany('INSERT OR IGNORE INTO review_cache VALUES (?, ?, ?)', rows).rowcount
+                if added < len(rows):
+                    self._conn.executemany('UPDATE review_cache SET result = ?, last_used = ? WHERE key = ?',
+                                           [(r, t, k) for k, r, t in rows])
+            self._entries += added
+            self._since_evict_check += len(rows)
+            if self._since_evict_check >= _EVICT_CHECK_EVERY:
+                self._since_evict_check = 0
+                self._evict()
+
+    def _count(self):
+        return self._conn.execute('SELECT COUNT(*) FROM review_cache').fetchone()[0]
+
+    def _evict(self):
+        self._entries = self._count()
+        excess = self._entries - self.max_entries
+        if excess > 0:
+            # 多删 5%, 避免每次写入都触发淘汰
+            excess += self.max_entries // 20
+            self._entries -= self._conn.execute(
+                'DELETE FROM review_cache WHERE key IN '
+                '(SELECT key FROM review_cache ORDER BY last_used LIMIT ?)', (excess,)
+            ).rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._count()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': self._entries,
+            'version': self.version,
+        }
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,191 @@
+"""
+差评分类规则引擎
+关键词少时 (<= SCAN_MAX_KEYWORDS) 按类别优先级逐个子串查找, 命中即停, 比编译的匹配器更快;
+词表扩充后编译成一个 Aho-Corasick 自动机 (pyahocorasick), 一次扫描找出全部命中,
+没有 C 扩展时退回 trie 结构的单个正则. 优先级与原逻辑相同: 物流 > 质量 > 服务 (兜底)
+"""
+
+import hashlib
+import json
+import re
+
+try:
+    import ahocorasick
+except ImportError:  # 没有 pyahocorasick 时使用 trie 正则
+    ahocorasick = None
+
+LOGISTICS_KEYWORDS = ['shipping', 'delivery', 'late', 'slow', 'delayed', '物流', '发货', '慢', '延迟']
+QUALITY_KEYWORDS = ['fake', 'broken', 'trash', 'quality', 'defective', '假货', '质量', '破损']
+
+# 类别 -> 关键词, 字典顺序即优先级
+REVIEW_KEYWORDS = {
+    'logistics': LOGISTICS_KEYWORDS,
+    'quality': QUALITY_KEYWORDS,
+}
+
+FALLBACK_CATEGORY = 'service'
+
+# 关键词总数不超过该值时默认用逐个子串查找; 实测交叉点 (benchmarks/bench_review_matcher.py):
+# 对 Aho-Corasick 约 20 个, 对 trie 正则约 80 个
+SCAN_MAX_KEYWORDS = 20 if ahocorasick is not None else 80
+
+REVIEW_RESULTS = {
+    'logistics': {
+        'category': '📦 物流问题 (可申诉)',
+        'is_appealable': True,
+        'confidence': 0.92,
+        'action': '自动生成申诉工单',
+        'powered_by': 'AI 规则引擎'
+    },
+    'quality': {
+        'category': '🚨 质量问题 (不可申诉)',
+        'is_appealable': False,
+        'confidence': 0.95,
+        'action': '触发产品下架审查',
+        'powered_by': 'AI 规则引擎'
+    },
+    'service': {
+        'category': '💬 服务问题 (可申诉)',
+        'is_appealable': True,
+        'confidence': 0.85,
+        'action': '标准申诉流程',
+        'powered_by': 'AI 规则引擎'
+    },
+}
+
+
+# 规则或结果模板变化时自动换版本, 持久化缓存随之失效
+CLASSIFIER_VERSION = 'rules-' + hashlib.blake2b(
+    json.dumps([REVIEW_KEYWORDS, REVIEW_RESULTS], ensure_ascii=False, sort_keys=True).encode(),
+    digest_size=6,
+).hexdigest()
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_review(text):
+    """缓存 / 合并请求用的规范化文本: 折叠空白, 转小写"""
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def _trie_pattern(words):
+    """关键词 -> 按字符前缀分支的正则, 避免逐个尝试几百个分支"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = '(?:' + '|'.join(branches) + ')'
+        # 既是词尾又有后续分支时整体可选, 贪婪匹配保证优先取最长关键词
+        return body + '?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """多类别关键词匹配器
+
+    - 子串语义, 与原 `kw in review_lower` 一致 (不做分词边界)
+    - 互相包含、互相重叠的关键词都会命中 (例如 'delayed' 同时命中 'delay', 'trashipping' 同时命中 'trash' 和 'shipping')
+    - backend: 'scan' / 'aho-corasick' / 'regex'; 默认关键词不超过 SCAN_MAX_KEYWORDS 时用 'scan',
+      否则有 pyahocorasick 就用自动机
+    """
+
+    def __init__(self, keywords_by_category, backend=None):
+        self.categories = list(keywords_by_category)
+        owners = {}
+        for category, keywords in keywords_by_category.items():
+            for keyword in keywords:
+                owners.setdefault(keyword.lower(), []).append(category)
+
+        if backend is None:
+            if len(owners) <= SCAN_MAX_KEYWORDS:
+                backend = 'scan'
+            else:
+                backend = 'aho-corasick' if ahocorasick is not None else 'regex'
+        self.backend = backend
+
+        if backend == 'scan':
+            self._keywords = {category: list(dict.fromkeys(kw.lower() for kw in keywords))
+                              for category, keywords in keywords_by_category.items()}
+            self._scan = self._scan_substrings
+        elif backend == 'aho-corasick':
+            # 自动机本身会报告重叠命中
+            self._automaton = ahocorasick.Automaton()
+            for word, cats in owners.items():
+                self._automaton.add_word(word, [(category, word) for category in cats])
+            self._automaton.make_automaton()
+            self._scan = self._scan_automaton
+        else:
+            # 零宽前瞻在每个位置各取一次最长命中, 重叠的关键词都能找到; 同一位置被包含的更短关键词在编译期展开
+            self._hits = {
+                word: [(category, inner) for inner, cats in owners.items() if inner in word for category in cats]
+                for word in owners
+            }
+            self._pattern = re.compile('(?=(' + _trie_pattern(owners) + '))')
+            self._scan = self._scan_regex
+
+    def _scan_substrings(self, text):
+        found = {}
+        for category, keywords in self._keywords.items():
+            matched = [kw for kw in keywords if kw in text]
+            if matched:
+                found[category] = sorted(matched, key=text.find)
+        return found
+
+    def _scan_automaton(self, text):
+        found = {}
+        for _, hits in self._automaton.iter(text):
+            for category, keyword in hits:
+                matched = found.get(category)
+                if matched is None:
+                    found[category] = [keyword]
+                elif keyword not in matched:
+                    matched.append(keyword)
+        return found
+
+    def _scan_regex(self, text):
+        found = {}
+        for match in self._pattern.finditer(text):
+            for category, keyword in self._hits[match.group(1)]:
+                matched = found.setdefault(category, [])
+                if keyword not in matched:
+                    matched.append(keyword)
+        return found
+
+    def scan(self, text):
+        """返回 {类别: [命中关键词]} (按出现顺序去重)"""
+        return self._scan(text.lower())
+
+    def classify(self, text):
+        """返回 (类别, 该类别命中的关键词)"""
+        if self.backend == 'scan':
+            # 按优先级逐类查找, 高优先级类别命中后不再看后面的类别
+            text = text.lower()
+            for category, keywords in self._keywords.items():
+                matched = [kw for kw in keywords if kw in text]
+                if matched:
+                    return category, sorted(matched, key=text.find) if len(matched) > 1 else matched
+            return FALLBACK_CATEGORY, []
+        found = self.scan(text)
+        for category in self.categories:
+            if category in found:
+                return category, found[category]
+        return FALLBACK_CATEGORY, []
+
+
+DEFAULT_MATCHER = KeywordMatcher(REVIEW_KEYWORDS)
+
+
+def classify_review(review_text, matcher=DEFAULT_MATCHER):
+    """规则引擎分类, 结果字段与 analyze_review_with_deepseek 相同, 另附 matched_keywords"""
+    category, matched = matcher.classify(review_text)
+    result = dict(REVIEW_RESULTS[category])
+    result['matched_keywords'] = matched
+    return result
@@ -0,0 +1,232 @@
+"""
+多时间尺度 ROAS 预聚合
+按 分钟 / 小时 / 天 三档分桶, 每桶存 花费和 / 收入和 / 点数 / 熔断次数 / 最大烧钱速度,
+数据点到达时增量合并; 1h / 24h / 7d / 30d 的查询只合并窗口内的桶 (最多 60 个), 与原始点数无关
+
+每个数据点同时计入 全局 / 广告计划 / 区域 三条序列, 桶按环形缓冲存放, 过期桶被新桶覆盖
+"""
+
+import numpy as np
+import pandas as pd
+
+# 分辨率 -> 桶宽 (秒)
+RESOLUTIONS = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+
+# 查询窗口 -> (分辨率, 桶数); 窗口为含当前 (未满) 桶在内的最近 N 个桶
+HORIZONS = {
+    '1h': ('minute', 60),
+    '24h': ('hour', 24),
+    '7d': ('day', 7),
+    '30d': ('day', 30),
+}
+
+_ALL = ('all', None)
+
+
+class RollupStats:
+    """一个窗口的汇总"""
+
+    __slots__ = ('spend', 'revenue', 'points', 'trips', 'peak_velocity')
+
+    def __init__(self, spend=0.0, revenue=0.0, points=0, trips=0, peak_velocity=float('nan')):
+        self.spend = spend
+        self.revenue = revenue
+        self.points = points
+        self.trips = trips
+        self.peak_velocity = peak_velocity
+
+    def __repr__(self):
+        return (f"RollupStats(spend={self.spend:.2f}, revenue={self.revenue:.2f}, points={self.points}, "
+                f"trips={self.trips}, peak_velocity={self.peak_velocity:.2f})")
+
+    @property
+    def roas(self):
+        """花费加权 ROAS; 没有花费列时每点花费记 1, 即各点 ROAS 的均值"""
+        return self.revenue / self.spend if self.spend else float('nan')
+
+
+class _Ring:
+    """单一分辨率的环形桶: 每个字段一张 (槽位, 序列) 表"""
+
+    def __init__(self, width, slots, capacity):
+        self.width = width
+        self.slots = slots
+        self.bucket = np.full(slots, np.iinfo(np.int64).min, dtype=np.int64)  # 槽位当前存的桶号
+        self.spend = np.zeros((slots, capacity))
+        self.revenue = np.zeros((slots, capacity))
+        self.points = np.zeros((slots, capacity), dtype=np.int64)
+        self.trips = np.zeros((slots, capacity), dtype=np.int64)
+        self.peak = np.full((slots, capacity), -np.inf)
+
+    def copy(self):
+        ring = _Ring.__new__(_Ring)
+        ring.__dict__ = {name: value.copy() if isinstance(value, np.ndarray) else value
+                         for name, value in self.__dict__.items()}
+        return ring
+
+    def grow(self, capacity):
+        extra = capacity - self.spend.shape[1]
+        for name, fill in (('spend', 0), ('revenue', 0), ('points', 0), ('trips', 0), ('peak', -np.inf)):
+            old = getattr(self, name)
+            setattr(self, name, np.concatenate([old, np.full((self.slots, extra), fill, dtype=old.dtype)], axis=1))
+
+    def merge(self, ts, series, spend, revenue, trips, velocity):
+        """合并一批点, 返回因过旧 (桶已滑出环) 被丢弃的点数"""
+        buckets = ts // self.width
+        slot = buckets % self.slots
+
+        # 每个槽位取本批最新的桶号, 比原来新的槽位清零后改存新桶
+        latest = self.bucket.copy()
+        np.maximum.at(latest, slot, buckets)
+        stale = np.flatnonzero(latest != self.bucket)
+        for table in (self.spend, self.revenue, self.points, self.trips):
+            table[stale] = 0
+        self.peak[stale] = -np.inf
+        self.bucket = latest
+
+        ok = buckets == self.bucket[slot]
+        at = (slot[ok], series[ok])
+        np.add.at(self.spend, at, spend[ok])
+        np.add.at(self.revenue, at, revenue[ok])
+        np.add.at(self.points, at, 1)
+        np.add.at(self.trips, at, trips[ok])
+        np.maximum.at(self.peak, at, velocity[ok])
+        return int((~ok).sum())
+
+    def window(self, now, n):
+        """最近 n 个桶 (含 now 所在桶) 的槽位, 按时间升序"""
+        current = now // self.width
+        slots = np.flatnonzero((self.bucket > current - n) & (self.bucket <= current))
+        return slots[np.argsort(self.bucket[slots])]
+
+
+class RoasRollup:
+    """ROAS 多尺度预聚合
+
+    ingest_frame 接受 ROAS 时序 (timestamp / roas / spend_velocity / is_circuit_breaker),
+    可选列: spend, revenue (缺省时每点花费 1, 收入 = roas), campaign, region.
+    查询: window('24h') / window('7d', campaign=3) / window('30d', region='UK')
+    """
+
+    def __init__(self, capacity=16):
+        self._series = {_ALL: 0}
+        self._capacity = capacity
+        self._rings = {}
+        for resolution, width in RESOLUTIONS.items():
+            slots = max(n for res, n in HORIZONS.values() if res == resolution)
+            self._rings[resolution] = _Ring(width, slots, capacity)
+        self.latest = None  # 最新数据点时间 (秒)
+        self.points = 0
+        self.dropped = 0
+
+    def copy(self):
+        """写时复制: 刷新线程在副本上合并, 发布前读者看到的仍是旧版本"""
+        rollup = RoasRollup.__new__(RoasRollup)
+        rollup.__dict__.update(self.__dict__)
+        rollup._series = dict(self._series)
+        rollup._rings = {name: ring.copy() for name, ring in self._rings.items()}
+        return rollup
+
+    def _series_ids(self, kind, values):
+        ids = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            key = (kind, value)
+            sid = self._series.get(key)
+            if sid is None:
+                sid = self._series[key] = len(self._series)
+            ids[i] = sid
+        if len(self._series) > self._capacity:
+            self._capacity = max(self._capacity * 2, len(self._series))
+            for ring in self._rings.values():
+                ring.grow(self._capacity)
+        return ids
+
+    def ingest(self, ts, roas, velocity, tripped, spend=None, revenue=None, campaign=None, region=None):
+        """合并一批数据点 (ts 单位秒), 批内可乱序"""
+        ts = np.asarray(ts, dtype=np.int64)
+        n = len(ts)
+        if n == 0:
+            return
+        spend = np.ones(n) if spend is None else np.asarray(spend, dtype=np.float64)
+        revenue = np.asarray(roas, dtype=np.float64) * spend if revenue is None else np.asarray(revenue, dtype=np.float64)
+        velocity = np.asarray(velocity, dtype=np.float64)
+        tripped = np.asarray(tripped, dtype=np.int64)
+
+        # 每个点展开到 全局 + 计划 + 区域 三条序列
+        series = [np.zeros(n, dtype=np.int64)]
+        for kind, values in (('campaign', campaign), ('region', region)):
+            if values is not None:
+                labels, inverse = np.unique(np.asarray(values), return_inverse=True)
+                series.append(self._series_ids(kind, labels.tolist())[inverse])
+        k = len(series)
+        series = np.concatenate(series)
+        ts, spend, revenue, tripped, velocity = (np.tile(a, k) for a in (ts, spend, revenue, tripped, velocity))
+
+        dropped = [ring.merge(ts, series, spend, revenue, tripped, velocity) for ring in self._rings.values()]
+        self.dropped += dropped[-1] // k  # 日桶也放不下的点才算彻底丢弃
+        self.points += n
+        latest = int(ts.max())
+        self.latest = latest if self.latest is None else max(self.latest, latest)
+
+    def ingest_frame(self, roas_df):
+        if len(roas_df) == 0:
+            return
+        ts = roas_df['timestamp'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        optional = {name: roas_df[name].to_numpy() for name in ('spend', 'revenue', 'campaign', 'region')
+                    if name in roas_df.columns}
+        self.ingest(ts, roas_df['roas'].to_numpy(), roas_df['spend_velocity'].to_numpy(),
+                    roas_df['is_circuit_breaker'].to_numpy(), **optional)
+
+    def _lookup(self, horizon, campaign, region):
+        if horizon not in HORIZONS:
+            raise ValueError(f"未知时间窗口: {horizon} (支持 {', '.join(HORIZONS)})")
+        resolution, n = HORIZONS[horizon]
+        if campaign is not None:
+            key = ('campaign', campaign)
+        elif region is not None:
+            key = ('region', region)
+        else:
+            key = _ALL
+        ring = self._rings[resolution]
+        sid = self._series.get(key)
+        if sid is None or self.latest is None:
+            return ring, sid, np.empty(0, dtype=np.int64)
+        return ring, sid, ring.window(self.latest, n)
+
+    def window(self, horizon='24h', campaign=None, region=None):
+        """窗口汇总, 只合并窗口内的桶"""
+        ring, sid, slots = self._lookup(horizon, campaign, region)
+        if len(slots) == 0:
+            return RollupStats()
+        points = int(ring.points[slots, sid].sum())
+        if points == 0:
+            return RollupStats()
+        return RollupStats(
+            spend=float(ring.spend[slots, sid].sum()),
+            revenue=float(ring.revenue[slots, sid].sum()),
+            points=points,
+            trips=int(ring.trips[slots, sid].sum()),
+            peak_velocity=float(ring.peak[slots, sid].max()),
+        )
+
+    def buckets(self, horizon='24h', campaign=None, region=None):
+        """窗口内逐桶的汇总, 列同 ROAS 时序 (spend_velocity 为桶内峰值), 可直接画图"""
+        ring, sid, slots = self._lookup(horizon, campaign, region)
+        sid = 0 if sid is None else sid
+        slots = slots[ring.points[slots, sid] > 0]
+        spend = ring.spend[slots, sid]
+        trips = ring.trips[slots, sid]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roas = ring.revenue[slots, sid] / spend
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(ring.bucket[slots] * ring.width, unit='s'),
+            'roas': roas,
+            'spend_velocity': ring.peak[slots, sid],
+            'is_circuit_breaker': trips > 0,
+            'spend': spend,
+            'trips': trips,
+        })
@@ -0,0 +1,151 @@
+"""
+店铺表紧凑列式 Schema
+- region / shop_name 用 category 存储
+- shop_id 存 uint32, 'SHOP_%04d' 字符串只在展示时格式化
+- 分数用 float32, 订单量用 uint32
+- 4 个布尔标记打包进一个 uint8 位掩码 (flags 列)
+"""
+
+import numpy as np
+import pandas as pd
+
+REGIONS = ['US-East', 'US-West', 'UK', 'EU']
+REGION_DTYPE = pd.CategoricalDtype(REGIONS)
+
+SHOP_ID_FORMAT = 'SHOP_%04d'
+
+FLAG_CRITICAL = 1 << 0
+FLAG_WARNING = 1 << 1
+FLAG_PROMO = 1 << 2
+FLAG_CNY = 1 << 3
+
+# 布尔列名 -> 位
+FLAG_BITS = {
+    'is_critical': FLAG_CRITICAL,
+    'is_warning': FLAG_WARNING,
+    'smart_promo_eligible': FLAG_PROMO,
+    'affected_by_cny': FLAG_CNY,
+}
+
+SHOP_SCHEMA = {
+    'shop_id': np.dtype(np.uint32),
+    'shop_name': 'category',
+    'sps_score': np.dtype(np.float32),
+    'daily_orders': np.dtype(np.uint32),
+    'nrr': np.dtype(np.float32),
+    'shipping_delay_rate': np.dtype(np.float32),
+    'region': REGION_DTYPE,
+    'flags': np.dtype(np.uint8),
+}
+
+# 旧版 (逐行生成) 的列顺序, 用于兼容导出和内存对比
+LEGACY_COLUMNS = [
+    'shop_id', 'shop_name', 'sps_score', 'daily_orders', 'nrr',
+    'shipping_delay_rate', 'is_critical', 'is_warning',
+    'smart_promo_eligible', 'region', 'affected_by_cny'
+]
+
+
+def pack_flags(is_critical, is_warning, smart_promo_eligible, affected_by_cny):
+    """把 4 个布尔数组打包成 uint8 位掩码"""
+    flags = np.asarray(is_critical, dtype=np.uint8) * FLAG_CRITICAL
+    flags |= np.asarray(is_warning, dtype=np.uint8) * FLAG_WARNING
+    flags |= np.asarray(smart_promo_eligible, dtype=np.uint8) * FLAG_PROMO
+    flags |= np.asarray(affected_by_cny, dtype=np.uint8) * FLAG_CNY
+    return flags.astype(np.uint8, copy=False)
+
+
+def flag(df, name):
+    """从 flags 列解出布尔数组, 例如 flag(shop_df, 'is_critical')"""
+    return (df['flags'].to_numpy() & FLAG_BITS[name]) != 0
+
+
+def format_shop_ids(shop_ids):
+    """uint32 shop_id -> 'SHOP_0001' 字符串 (只对展示行调用)"""
+    return [SHOP_ID_FORMAT % i for i in np.asarray(shop_ids)]
+
+
+def parse_shop_ids(labels):
+    """'SHOP_0001' 字符串 -> uint32"""
+    return pd.Series(labels).astype(str).str.slice(5).astype(np.uint32).to_numpy()
+
+
+def _region_dtype(values):
+    """已知区域保持固定顺序, 真实数据中的新区域追加在后面"""
+    extra = sorted(set(pd.unique(values)) - set(REGIONS) - {None})
+    return REGION_DTYPE if not extra else pd.CategoricalDtype(REGIONS + extra)
+
+
+def enforce_shop_schema(df):
+    """把任意来源的店铺表规整成紧凑 Schema
+
+    同时接受旧版布局 (字符串 shop_id + 4 个布尔列) 和紧凑布局,
+    缺列时抛 ValueError.
+    """
+    df = df.copy(deep=False)
+
+    if 'flags' not in df.columns:
+        missing = [c for c in FLAG_BITS if c not in df.columns]
+        if missing:
+            raise ValueError(f"店铺表缺少标记列: {missing}")
+        df['flags'] = pack_flags(*(df[c].to_numpy() for c in FLAG_BITS))
+        df = df.drop(columns=list(FLAG_BITS))
+
+    missing = [c for c in SHOP_SCHEMA if c not in df.columns]
+    if missing:
+        raise ValueError(f"店铺表缺少列: {missing}")
+
+    if not pd.api.types.is_integer_dtype(df['shop_id']):
+        df['shop_id'] = parse_shop_ids(df['shop_id'])
+
+    dtypes = dict(SHOP_SCHEMA)
+    dtypes['region'] = _region_dtype(df['region'])
+
+    return df[list(SHOP_SCHEMA)].astype(dtypes, copy=False)
+
+
+def to_legacy_layout(df):
+    """紧凑 Schema -> 旧版布局 (object 字符串 / int64 / float64 / bool 列)"""
+    legacy = {
+        'shop_id': np.array(format_shop_ids(df['shop_id']), dtype=object),
+        'shop_name': df['shop_name'].astype(object).to_numpy(),
+        'sps_score': df['sps_score'].to_numpy(np.float64).round(2),
+        'daily_orders': df['daily_orders'].to_numpy(np.int64),
+        'nrr': df['nrr'].to_numpy(np.float64).round(3),
+        'shipping_delay_rate': df['shipping_delay_rate'].to_numpy(np.float64).round(3),
+        'region': df['region'].astype(object).to_numpy(),
+    }
+    for name in FLAG_BITS:
+        legacy[name] = flag(df, name)
+    return pd.DataFrame(
+        {c: pd.Series(legacy[c], dtype=legacy[c].dtype, index=df.index) for c in LEGACY_COLUMNS}
+    )
+
+
+def memory_report(df):
+    """按列对比旧版布局与紧凑 Schema 的每店铺字节数"""
+    n = max(len(df), 1)
+    legacy_df = to_legacy_layout(df)
+    legacy = legacy_df.memory_usage(deep=True, index=False) / n
+    compact = df.memory_usage(deep=True, index=False) / n
+
+    rows = []
+    for col in LEGACY_COLUMNS:
+        # 4 个布尔列共用 flags 的 1 字节
+        packed = col in FLAG_BITS
+        target = 'flags' if packed else col
+        rows.append({
+            'column': col,
+            'legacy_dtype': str(legacy_df[col].dtype),
+            'compact_dtype': str(df[target].dtype),
+            'legacy_bytes_per_shop': legacy[col],
+            'compact_bytes_per_shop': compact[target] / len(FLAG_BITS) if packed else compact[target],
+        })
+    rows.append({
+        'column': 'TOTAL',
+        'legacy_dtype': '',
+        'compact_dtype': '',
+        'legacy_bytes_per_shop': legacy.sum(),
+        'compact_bytes_per_shop': compact.sum(),
+    })
+    return pd.DataFrame(rows)
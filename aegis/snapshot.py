@@ -0,0 +1,166 @@
+"""
+进程级只读店铺快照
+所有 Streamlit 会话共享同一份列缓冲区, 筛选返回行号数组而不是 DataFrame 副本
+"""
+
+import itertools
+import threading
+import time
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from aegis.indexes import ShopIndex
+from aegis.kpi import KpiAggregator
+from aegis.schema import FLAG_BITS, SHOP_SCHEMA, enforce_shop_schema
+
+# 快照代数 (generation), 进程内单调递增
+_generation = itertools.count(1)
+_generation_lock = threading.Lock()
+
+
+def next_version():
+    with _generation_lock:
+        return next(_generation)
+
+
+class ShopSnapshot:
+    """只读店铺快照
+
+    - frame: 紧凑 Schema 的 DataFrame, 数值列直接引用快照缓冲区
+    - column(name): 只读 ndarray 视图 (category 列返回编码)
+    - index: 位图 + 预排序置换 (见 aegis.indexes)
+    - kpis: 分格 KPI 聚合 (见 aegis.kpi)
+    - filter_rows: 返回 int64 行号数组, take() 只物化需要展示的行
+    """
+
+    def __init__(self, frame, version=None):
+        frame = enforce_shop_schema(frame).reset_index(drop=True)
+        self.version = next_version() if version is None else version
+        self.created_at = time.time()
+        self.n_shops = len(frame)
+        self.frame = frame
+
+        self._arrays = {}
+        for name in frame.columns:
+            values = frame[name].array
+            arr = values.codes if isinstance(frame[name].dtype, pd.CategoricalDtype) else frame[name].to_numpy()
+            arr = arr.view()
+            arr.flags.writeable = False
+            self._arrays[name] = arr
+
+    def __len__(self):
+        return self.n_shops
+
+    def __repr__(self):
+        return f"ShopSnapshot(version={self.version}, n_shops={self.n_shops})"
+
+    def column(self, name):
+        """零拷贝列视图"""
+        return self._arrays[name]
+
+    def categories(self, name):
+        return self.frame[name].cat.categories
+
+    def regions(self):
+        """按首次出现顺序返回区域 (与 shop_df['region'].unique() 一致)"""
+        codes = self._arrays['region']
+        present, first_seen = np.unique(codes, return_index=True)
+        present = present[np.argsort(first_seen)]
+        return list(self.categories('region')[present])
+
+    def flag(self, name):
+        return (self._arrays['flags'] & FLAG_BITS[name]) != 0
+
+    @cached_property
+    def index(self):
+        """预计算筛选索引, 首次访问时构建, 之后随快照共享"""
+        return ShopIndex(self)
+
+    @cached_property
+    def kpis(self):
+        """分格 KPI 聚合 (见 aegis.kpi)"""
+        return KpiAggregator.from_snapshot(self)
+
+    def filter_rows(self, status=None, region=None, order=None):
+        """按状态 ('critical' / 'warning' / 'safe' / 'cny') 与区域筛选, 返回行号
+
+        order 为 aegis.indexes.SORT_ORDERS 中的键时按该顺序返回.
+        """
+        selection = self.index.select(status, region)
+        if order is None:
+            return selection.rows()
+        return self.index.sorted_rows(selection, order)
+
+    @cached_property
+    def _id_lookup(self):
+        order = np.argsort(self._arrays['shop_id'], kind='stable')
+        return order, self._arrays['shop_id'][order]
+
+    def locate(self, shop_ids):
+        """shop_id -> 行号, 不存在的返回 -1"""
+        shop_ids = np.asarray(shop_ids, dtype=np.uint32)
+        if self.n_shops == 0:
+            return np.full(len(shop_ids), -1, dtype=np.int64)
+        order, sorted_ids = self._id_lookup
+        pos = np.searchsorted(sorted_ids, shop_ids).clip(max=self.n_shops - 1)
+        return np.where(sorted_ids[pos] == shop_ids, order[pos], -1)
+
+    def align(self, shop_ids, *columns, fill=np.nan):
+        """按 shop_id 给出的外部列 (预测 / 异常检测结果) 重排成本快照的行顺序, 快照里没有的 shop_id 忽略,
+        快照里有但外部没有的行填 fill"""
+        rows = self.locate(shop_ids)
+        found = rows >= 0
+        aligned = []
+        for values in columns:
+            values = np.asarray(values)
+            out = np.full(self.n_shops, fill, dtype=values.dtype)
+            out[rows[found]] = values[found]
+            aligned.append(out)
+        return aligned
+
+    def upsert(self, changes):
+        """按 shop_id 合并变更行 (已有则更新, 没有则追加到末尾), 返回新版本快照, 本快照不变
+
+        新快照的列缓冲区是一份新拷贝 (双缓冲), 正在读旧快照的会话不受影响.
+        """
+        changes = enforce_shop_schema(changes).drop_duplicates('shop_id', keep='last')
+        rows = self.locate(changes['shop_id'].to_numpy())
+        hit = rows >= 0
+        updated = rows[hit]
+
+        columns = {}
+        for name in SHOP_SCHEMA:
+            old, new = self.frame[name], changes[name]
+            if isinstance(old.dtype, pd.CategoricalDtype):
+                categories = old.cat.categories.append(new.cat.categories.difference(old.cat.categories))
+                new_values = pd.Categorical(new, categories=categories).codes
+                values = np.concatenate([old.cat.codes.to_numpy(), new_values[~hit]])
+                values[updated] = new_values[hit]
+                columns[name] = pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(categories))
+            else:
+                new_values = new.to_numpy()
+                values = np.concatenate([old.to_numpy(), new_values[~hit]])
+                values[updated] = new_values[hit]
+                columns[name] = values
+        snapshot = ShopSnapshot(pd.DataFrame(columns))
+        changed = np.concatenate([updated, np.arange(self.n_shops, snapshot.n_shops)])
+
+        # 旧快照已算过的 KPI / 索引只按变更行增量更新
+        if 'kpis' in self.__dict__:
+            kpis = self.kpis.copy()
+            kpis.apply_rows(self, updated, sign=-1)
+            kpis.apply_rows(snapshot, changed)
+            snapshot.__dict__['kpis'] = kpis
+        if 'index' in self.__dict__:
+            snapshot.__dict__['index'] = self.index.updated(snapshot, changed)
+        if '_id_lookup' in self.__dict__ and snapshot.n_shops == self.n_shops:
+            snapshot.__dict__['_id_lookup'] = self._id_lookup  # 没有新店铺时 shop_id 不变
+        return snapshot
+
+    def take(self, rows, columns=None):
+        """只物化给定行 (用于表格展示)"""
+        if columns is None:
+            return self.frame.iloc[rows]
+        return self.frame.iloc[rows, self.frame.columns.get_indexer(columns)]
@@ -0,0 +1,124 @@
+"""
+Parquet / Arrow IPC 快照存储
+真实 TikTok Shop API 数据落盘后从这里加载, 替代 Faker 生成器, 返回与生成器相同的 DataFrame 契约:
+- 店铺表: 紧凑 Schema (见 aegis.schema)
+- ROAS 时序: timestamp / roas / spend_velocity / is_circuit_breaker
+文件以内存映射方式打开, 列投影和区域 / 档位谓词下推到扫描层, 被过滤掉的行不会转成 pandas
+路径可以是单个文件, 也可以是同一格式的分片目录 (如 aegis.loadgen 写出的 part-*.parquet, '_' / '.' 开头的文件忽略)
+需要 pyarrow (可选依赖, 只有配置了文件数据源时才导入本模块)
+"""
+
+import os
+from datetime import timedelta
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from aegis.breaker import is_circuit_breaker
+from aegis.schema import FLAG_CRITICAL, FLAG_WARNING, SHOP_SCHEMA, enforce_shop_schema
+
+# 扩展名 -> pyarrow.dataset 格式
+FILE_FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'ipc',
+    '.feather': 'ipc',
+    '.ipc': 'ipc',
+}
+
+ROAS_COLUMNS = ['timestamp', 'roas', 'spend_velocity', 'is_circuit_breaker']
+
+_MMAP_FS = pafs.LocalFileSystem(use_mmap=True)
+
+
+def file_format(path):
+    if os.path.isdir(path):
+        formats = {FILE_FORMATS.get(os.path.splitext(entry.name)[1].lower()) for entry in os.scandir(path)
+                   if entry.is_file() and not entry.name.startswith(('_', '.'))}
+        formats.discard(None)
+        if len(formats) != 1:
+            raise ValueError(f"分片目录 {path} 中没有可识别的快照文件, 或混用了多种格式")
+        return formats.pop()
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext not in FILE_FORMATS:
+        raise ValueError(f"不支持的快照文件格式: {ext} (支持 {', '.join(FILE_FORMATS)})")
+    return FILE_FORMATS[ext]
+
+
+def shop_filter(regions=None, tiers=None):
+    """区域 / 档位 ('critical' / 'warning' / 'safe') 谓词, 无条件时返回 None"""
+    expr = None
+    if regions is not None:
+        expr = pc.field('region').isin(list(regions))
+    if tiers is not None:
+        bits = pc.bit_wise_and(pc.field('flags'), FLAG_CRITICAL | FLAG_WARNING)
+        tier_bits = {'critical': FLAG_CRITICAL, 'warning': FLAG_WARNING, 'safe': 0}
+        unknown = set(tiers) - set(tier_bits)
+        if unknown:
+            raise ValueError(f"未知档位: {sorted(unknown)}")
+        tier_expr = bits.isin([tier_bits[t] for t in tiers])
+        expr = tier_expr if expr is None else expr & tier_expr
+    return expr
+
+
+def read_table(path, columns=None, filter=None):
+    """内存映射扫描, 列投影 + 谓词下推"""
+    fmt = file_format(path)
+    if columns is None and filter is None and fmt == 'ipc' and os.path.isfile(path):
+        # 整表读 IPC: 直接引用映射页, 零拷贝
+        with pa.memory_map(str(path)) as source:
+            return pa.ipc.open_file(source).read_all()
+    dataset = ds.dataset(str(path), format=fmt, filesystem=_MMAP_FS)
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def _to_frame(table):
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def load_shop_frame(path, columns=None, regions=None, tiers=None):
+    """读店铺快照; 不投影时返回紧凑 Schema 全表, 投影时只返回所选列 (dtype 同紧凑 Schema)"""
+    df = _to_frame(read_table(path, columns, shop_filter(regions, tiers)))
+    if columns is None:
+        return enforce_shop_schema(df)
+    dtypes = {c: SHOP_SCHEMA[c] for c in columns if c in SHOP_SCHEMA and c != 'region'}
+    return df.astype(dtypes, copy=False)
+
+
+def write_shop_frame(df, path, row_group_size=1 << 20):
+    """紧凑 Schema 店铺表写盘; IPC 不压缩, 便于内存映射零拷贝读取"""
+    table = pa.Table.from_pandas(enforce_shop_schema(df), preserve_index=False)
+    if file_format(path) == 'ipc':
+        feather.write_feather(table, str(path), compression='uncompressed', chunksize=row_group_size)
+    else:
+        pq.write_table(table, str(path), row_group_size=row_group_size)
+
+
+def load_roas_frame(path, hours=None):
+    """读 ROAS 时序, hours 只保留最后 N 小时 (时间谓词下推)"""
+    filter = None
+    if hours is not None:
+        timestamps = read_table(path, ['timestamp'])['timestamp']
+        latest = pc.max(timestamps).as_py()
+        if latest is not None:
+            start = pa.scalar(latest - timedelta(hours=hours), type=timestamps.type)
+            filter = pc.field('timestamp') > start
+    df = _to_frame(read_table(path, filter=filter)).sort_values('timestamp', ignore_index=True)
+    missing = [c for c in ROAS_COLUMNS[:3] if c not in df.columns]
+    if missing:
+        raise ValueError(f"ROAS 时序缺少列: {missing}")
+    if 'is_circuit_breaker' not in df.columns:
+        df['is_circuit_breaker'] = is_circuit_breaker(df['roas'].to_numpy(), df['spend_velocity'].to_numpy())
+    return df[ROAS_COLUMNS]
+
+
+def write_roas_frame(df, path):
+    table = pa.Table.from_pandas(df[[c for c in ROAS_COLUMNS if c in df.columns]], preserve_index=False)
+    if file_format(path) == 'ipc':
+        feather.write_feather(table, str(path), compression='uncompressed')
+    else:
+        pq.write_table(table, str(path))
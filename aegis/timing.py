@@ -0,0 +1,59 @@
+"""
+渲染分段计时: 记录每个页面区块的服务端耗时
+整页重跑用 lap() 打点, fragment 单独重跑用 section() 包住, 只更新自己那一段
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class RenderTimer:
+    """按区块名记录最近一次耗时 (毫秒) 及其所属的运行序号"""
+
+    def __init__(self):
+        self.sections = {}  # name -> (ms, run)
+        self.run = 0
+        self._mark = time.perf_counter()
+
+    def start(self):
+        """整页重跑开始"""
+        self.run += 1
+        self._mark = time.perf_counter()
+
+    def lap(self, name):
+        """记录上次打点到现在的耗时"""
+        now = time.perf_counter()
+        ms = self._record(name, now - self._mark)
+        self._mark = now
+        return ms
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start)
+            self._mark = time.perf_counter()
+
+    def last(self, name):
+        return self.sections[name][0]
+
+    def _record(self, name, seconds):
+        ms = seconds * 1e3
+        self.sections[name] = (ms, self.run)
+        logger.debug("render %s: %.1f ms (run %d)", name, ms, self.run)
+        return ms
+
+    def report(self):
+        """各区块耗时表, 按耗时降序"""
+        rows = [(name, ms, run) for name, (ms, run) in self.sections.items()]
+        return (
+            pd.DataFrame(rows, columns=['区块', '耗时 (ms)', '运行序号'])
+            .sort_values('耗时 (ms)', ascending=False, ignore_index=True)
+        )
@@ -0,0 +1,230 @@
+"""
+批量差评分诊
+从 CSV / Parquet 文件或任意评论迭代器分块读取, 多进程分类后流式写出,
+内存只与 chunk_size x 同时在途的块数有关, 与文件总行数无关
+
+用法:
+    python -m aegis.triage reviews.csv triaged.csv --column review
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from aegis.review_cache import DEFAULT_CACHE_PATH, ReviewCache
+from aegis.reviews import DEFAULT_MATCHER, REVIEW_RESULTS
+
+DEFAULT_CHUNK_SIZE = 20_000
+OUTPUT_COLUMNS = ['row', 'category', 'is_appealable', 'confidence', 'action']
+
+
+def _is_parquet(path):
+    return str(path).lower().endswith(('.parquet', '.pq'))
+
+
+def iter_review_chunks(source, column='review', chunk_size=DEFAULT_CHUNK_SIZE):
+    """把输入源切成若干评论列表
+
+    source 可以是 .csv / .parquet 路径, 打开的 CSV 文件对象 (如 Streamlit 上传),
+    或任意产出评论字符串的可迭代对象.
+    """
+    if isinstance(source, (str, os.PathLike)) and _is_parquet(source):
+        import pyarrow.parquet as pq  # Parquet 是可选能力
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size, columns=[column]):
+            yield batch.column(0).to_pandas().fillna('').astype(str).tolist()
+    elif isinstance(source, (str, os.PathLike)) or hasattr(source, 'read'):
+        for frame in pd.read_csv(source, usecols=[column], chunksize=chunk_size, dtype={column: str}):
+            yield frame[column].fillna('').tolist()
+    else:
+        iterator = iter(source)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield ['' if text is None else str(text) for text in chunk]
+
+
+# 类别编码, 子进程只回传 int8 编码, 减少进程间序列化
+_CATEGORY_KEYS = list(REVIEW_RESULTS)
+_CATEGORY_CODES = {key: code for code, key in enumerate(_CATEGORY_KEYS)}
+_RESULT_TABLE = pd.DataFrame([REVIEW_RESULTS[key] for key in _CATEGORY_KEYS])
+_LABEL_CODES = {REVIEW_RESULTS[key]['category']: code for key, code in _CATEGORY_CODES.items()}
+
+# 每个进程各自打开缓存连接 (SQLite 连接不能跨 fork 复用)
+_worker_caches = {}
+
+
+def count_rows(path):
+    """估算输入行数 (用于进度条): Parquet 读元数据, CSV 分块数换行"""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    lines = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            lines += block.count(b'\n')
+    return max(lines - 1, 0)
+
+
+def _worker_cache(path):
+    key = (os.getpid(), path)
+    if key not in _worker_caches:
+        _worker_caches[key] = ReviewCache(path)
+    return _worker_caches[key]
+
+
+def classify_chunk(start_row, texts, cache_path=None):
+    """分类一块评论 (在子进程中执行), 返回 (起始行号, 类别编码, 缓存命中数, 未命中数)"""
+    if cache_path is None:
+        codes = np.fromiter(
+            (_CATEGORY_CODES[DEFAULT_MATCHER.classify(text)[0]] for text in texts),
+            dtype=np.int8, count=len(texts),
+        )
+        return start_row, codes, 0, 0
+
+    cache = _worker_cache(cache_path)
+    cached = cache.get_many(texts)
+    codes = np.empty(len(texts), dtype=np.int8)
+    missed_texts, missed_results = [], []
+    for i, (text, result) in enumerate(zip(texts, cached)):
+        if result is None:
+            category = DEFAULT_MATCHER.classify(text)[0]
+            missed_texts.append(text)
+            missed_results.append(REVIEW_RESULTS[category])
+            codes[i] = _CATEGORY_CODES[category]
+        else:
+            codes[i] = _LABEL_CODES[result['category']]
+    if missed_texts:
+        cache.put_many(missed_texts, missed_results)
+    return start_row, codes, len(texts) - len(missed_texts), len(missed_texts)
+
+
+def _result_frame(start_row, codes):
+    frame = _RESULT_TABLE.iloc[codes][OUTPUT_COLUMNS[1:]].reset_index(drop=True)
+    frame.insert(0, 'row', np.arange(start_row, start_row + len(codes)))
+    return frame
+
+
+class _ResultWriter:
+    """按扩展名写 CSV 或 Parquet, 逐块追加"""
+
+    def __init__(self, output):
+        self.output = output
+        self._parquet = None
+        self._header = True
+
+    def write(self, frame):
+        if _is_parquet(self.output):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.output, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.output, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        # 0 行输入也要产出只有表头的文件, 调用方可以照常打开
+        if self._parquet is None and self._header:
+            self.write(_result_frame(0, np.empty(0, dtype=np.int8)))
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def triage_reviews(source, output, column='review', chunk_size=DEFAULT_CHUNK_SIZE,
+                   workers=None, progress=None, cache_path=None):
+    """批量分诊, 结果按输入顺序写到 output (.csv / .parquet)
+
+    - workers: 进程数, 默认 CPU 核数; 0 表示在当前进程内执行
+    - progress: 每写完一块回调 progress(rows_done, elapsed_seconds)
+    - cache_path: 持久化分类缓存 (aegis.review_cache), 与交互式分析共用
+    返回 {'rows', 'seconds', 'rows_per_second', 'categories', 'cache_hits', 'cache_misses'}
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    writer = _ResultWriter(output)
+    counts = Counter()
+    rows = 0
+    cache_hits = cache_misses = 0
+    start = time.perf_counter()
+
+    def emit(chunk):
+        nonlocal rows, cache_hits, cache_misses
+        start_row, codes, hits, misses = chunk
+        cache_hits += hits
+        cache_misses += misses
+        frame = _result_frame(start_row, codes)
+        writer.write(frame)
+        counts.update(frame['category'].value_counts().to_dict())
+        rows += len(frame)
+        if progress is not None:
+            progress(rows, time.perf_counter() - start)
+
+    chunks = iter_review_chunks(source, column, chunk_size)
+    try:
+        if workers == 0:
+            next_row = 0
+            for texts in chunks:
+                emit(classify_chunk(next_row, texts, cache_path))
+                next_row += len(texts)
+        else:
+            # 在途块数上限 = 2 x workers, 保证内存有界且按输入顺序写出
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = []
+                next_row = 0
+                for texts in chunks:
+                    pending.append(pool.submit(classify_chunk, next_row, texts, cache_path))
+                    next_row += len(texts)
+                    if len(pending) >= 2 * workers:
+                        emit(pending.pop(0).result())
+                for future in pending:
+                    emit(future.result())
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+        'categories': dict(counts),
+        'cache_hits': cache_hits,
+        'cache_misses': cache_misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量差评分诊')
+    parser.add_argument('source', help='输入 .csv / .parquet')
+    parser.add_argument('output', help='输出 .csv / .parquet')
+    parser.add_argument('--column', default='review')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache', nargs='?', const=DEFAULT_CACHE_PATH, default=None,
+                        help='启用持久化分类缓存 (可指定 SQLite 路径)')
+    args = parser.parse_args()
+
+    def report(rows, elapsed):
+        print(f"\r{rows:,} rows | {rows / max(elapsed, 1e-9):,.0f} rows/s", end='', flush=True)
+
+    stats = triage_reviews(args.source, args.output, args.column, args.chunk_size, args.workers, report, args.cache)
+    print(f"\n完成: {stats['rows']:,} rows, {stats['seconds']:.1f} s, {stats['rows_per_second']:,.0f} rows/s")
+    if args.cache:
+        print(f"缓存: {stats['cache_hits']:,} hits / {stats['cache_misses']:,} misses")
+    for category, count in sorted(stats['categories'].items(), key=lambda kv: -kv[1]):
+        print(f"  {category}: {count:,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,12 +7,39 @@ Author: Ian Chen
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
-from faker import Faker
+import functools
+import html
+import os
+import shutil
+import tempfile
 import time
 
+from aegis.alerts import AlertDispatcher, FileSink, HttpSink
+from aegis.anomaly import WINDOW_DAYS, AnomalyMonitor, AnomalyReport, FleetAnomalyDetector, peer_groups
+from aegis.assets import dashboard_css
+from aegis.breaker import is_circuit_breaker
+from aegis.datagen import generate_daily_history, generate_fleet, generate_sps_history
+from aegis.downsample import ROAS_POINT_BUDGET, SCATTER_POINT_BUDGET
+from aegis.escalation import DEEPSEEK_MODEL, EscalationService, analyze_review
+from aegis.feed import ReviewFeed, ReviewProducer, synthetic_reviews
+from aegis.figures import (
+    FigureCache, build_port_map, build_roas_chart, build_sps_gauge, build_sps_histogram,
+    build_sps_scatter, frame_version, plotly_chart
+)
+from aegis.forecast import FORECAST_HOURS, SpsForecast
+from aegis.kpi import KpiAggregator
+from aegis.logistics import MAP_LEVELS, LogisticsNetwork, generate_hubs, simulate_shipments
+from aegis.refresh import FileDeltaSource, SimulatedDeltaSource, SnapshotRefresher
+from aegis.review_cache import DEFAULT_CACHE_PATH, ReviewCache
+from aegis.reviews import CLASSIFIER_VERSION
+from aegis.rng import ROOT_SEED, RngStreams
+from aegis.rollup import HORIZONS, RoasRollup
+from aegis.schema import flag
+from aegis.snapshot import ShopSnapshot
+from aegis.timing import RenderTimer
+from aegis.triage import count_rows, triage_reviews
+
 # Page Config
 st.set_page_config(
     page_title="ByteDance Ops Toolkit",
@@ -21,293 +48,200 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# OpenAI Style CSS (升级版 - 添加动画和渐变)
-st.markdown("""
-<style>
-    /* Global Styles */
-    .stApp {
-        background: linear-gradient(135deg, #FFFFFF 0%, #F7F7F8 100%);
-    }
-
-    /* Main Container */
-    .main .block-container {
-        padding-top: 2rem;
-        padding-bottom: 2rem;
-        max-width: 1400px;
-    }
-
-    /* Headers with Animation */
-    h1, h2, h3 {
-        color: #202123 !important;
-        font-weight: 600 !important;
-        animation: fadeInDown 0.6s ease-out;
-    }
-
-    @keyframes fadeInDown {
-        from {
-            opacity: 0;
-            transform: translateY(-20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-
-    /* Status Badge with Pulse */
-    .status-badge {
-        display: inline-block;
-        padding: 4px 12px;
-        border-radius: 12px;
-        font-size: 0.85em;
-        font-weight: 500;
-        margin-right: 8px;
-        animation: pulse 2s infinite;
-    }
-
-    @keyframes pulse {
-        0%, 100% {
-            opacity: 1;
-        }
-        50% {
-            opacity: 0.8;
-        }
-    }
+# 分段计时 (每个会话一份): 整页重跑逐段打点, fragment 单独重跑时只更新自己那一段
+render_timer = st.session_state.setdefault('render_timer', RenderTimer())
+render_timer.start()
 
-    .status-success {
-        background: linear-gradient(135deg, #D1FAE5 0%, #A7F3D0 100%);
-        color: #065F46;
-        box-shadow: 0 2px 8px rgba(16, 163, 127, 0.2);
-    }
+FLEET_SIZE = int(os.getenv('AEGIS_FLEET_SIZE', 100))  # 默认100家店铺, 压测时可调到 10万+
 
-    /* Card Styles with Hover Effect */
-    .card {
-        background: linear-gradient(135deg, #FFFFFF 0%, #F9FAFB 100%);
-        border: 1px solid #E5E7EB;
-        border-radius: 16px;
-        padding: 24px;
-        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.05);
-        margin-bottom: 16px;
-        transition: all 0.3s ease;
-    }
+# 文件数据源 (Parquet / Arrow IPC 单文件或分片目录, 见 aegis.storage / aegis.loadgen); 未配置时使用 Faker 模拟数据
+SHOP_SOURCE = os.getenv('AEGIS_SHOP_SOURCE')
+ROAS_SOURCE = os.getenv('AEGIS_ROAS_SOURCE')
+REFRESH_SECONDS = float(os.getenv('AEGIS_REFRESH_SECONDS', 30))  # 后台增量刷新间隔
+ROAS_HISTORY_HOURS = 30 * 24  # 预聚合覆盖 30 天, 原始点只保留 24 小时画图
+BUDGET_PER_TRIP = 1240  # 每次熔断拦截的预算 ($)
+LOGISTICS_HUBS = int(os.getenv('AEGIS_HUBS', 2000))  # 港口 + 仓库数
+SHIPMENT_EVENTS = 200_000  # 预热用的最近 24 小时发货事件
+ALERT_WEBHOOK = os.getenv('AEGIS_ALERT_WEBHOOK')  # 未配置时告警写入本地 JSONL (aegis.alerts.DEFAULT_ALERT_LOG)
 
-    .card:hover {
-        transform: translateY(-4px);
-        box-shadow: 0 12px 24px rgba(0, 0, 0, 0.1);
-    }
+# 所有模拟数据从同一个根种子按名字派生独立随机数流: 缓存命中与否、不同 worker 进程生成的数据都一致
+RNG = RngStreams(int(os.getenv('AEGIS_SEED', ROOT_SEED)))
 
-    /* Metric Cards with Gradient */
-    .stMetric {
-        background: linear-gradient(135deg, #FFFFFF 0%, #F7F7F8 100%);
-        padding: 20px;
-        border-radius: 12px;
-        border: 1px solid #E5E7EB;
-        transition: all 0.3s ease;
-        animation: fadeIn 0.8s ease-out;
-    }
+# 店铺列表展示列 (列名 -> 表头), 任一列都可排序
+TABLE_COLUMNS = {
+    'shop_name': '店铺名称',
+    'sps_score': 'SPS',
+    'daily_orders': '日订单',
+    'nrr': 'NRR',
+    'shipping_delay_rate': '延迟率',
+    'region': '区域',
+}
 
-    @keyframes fadeIn {
-        from {
-            opacity: 0;
-        }
-        to {
-            opacity: 1;
-        }
-    }
+# OpenAI Style CSS (升级版 - 添加动画和渐变): 样式表在 aegis/static/dashboard.css, 每个进程只读取压缩一次
+st.markdown(dashboard_css(), unsafe_allow_html=True)
 
-    .stMetric:hover {
-        transform: scale(1.05);
-        box-shadow: 0 8px 16px rgba(16, 163, 127, 0.15);
-    }
-
-    /* Primary Button with Gradient */
-    .stButton > button {
-        background: linear-gradient(135deg, #10A37F 0%, #0D8C6C 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 8px !important;
-        padding: 10px 20px !important;
-        font-weight: 600 !important;
-        transition: all 0.3s ease !important;
-        box-shadow: 0 4px 12px rgba(16, 163, 127, 0.3);
-    }
-
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 8px 20px rgba(16, 163, 127, 0.4) !important;
-    }
-
-    /* Tab Styles with Animation */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-        background-color: #F7F7F8;
-        padding: 6px;
-        border-radius: 12px;
-    }
-
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 8px;
-        padding: 10px 20px;
-        font-weight: 500;
-        color: #6B7280;
-        transition: all 0.3s ease;
-    }
-
-    .stTabs [aria-selected="true"] {
-        background: linear-gradient(135deg, #FFFFFF 0%, #F9FAFB 100%);
-        color: #10A37F;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
-    }
-
-    /* Loading Animation */
-    @keyframes shimmer {
-        0% {
-            background-position: -1000px 0;
-        }
-        100% {
-            background-position: 1000px 0;
-        }
-    }
-
-    .loading {
-        animation: shimmer 2s infinite;
-        background: linear-gradient(to right, #f6f7f8 0%, #edeef1 20%, #f6f7f8 40%, #f6f7f8 100%);
-        background-size: 1000px 100%;
-    }
-
-    /* Success Alert */
-    .success-alert {
-        background: linear-gradient(135deg, #D1FAE5 0%, #A7F3D0 100%);
-        border-left: 4px solid #10A37F;
-        padding: 16px;
-        border-radius: 8px;
-        margin: 16px 0;
-        animation: slideInRight 0.5s ease-out;
-    }
-
-    @keyframes slideInRight {
-        from {
-            opacity: 0;
-            transform: translateX(20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-
-    /* Critical Alert */
-    .critical-alert {
-        background: linear-gradient(135deg, #FEE2E2 0%, #FECACA 100%);
-        border-left: 4px solid #EF4444;
-        padding: 16px;
-        border-radius: 8px;
-        margin: 16px 0;
-        animation: shake 0.5s ease-out;
-    }
-
-    @keyframes shake {
-        0%, 100% {
-            transform: translateX(0);
-        }
-        25% {
-            transform: translateX(-10px);
-        }
-        75% {
-            transform: translateX(10px);
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Initialize Faker
-fake = Faker(['zh_CN', 'en_US'])
-np.random.seed(42)
+render_timer.lap('CSS')
 
 # ==================== Data Generation ====================
 
-@st.cache_data(ttl=300)  # 5分钟缓存,减少重新计算
 def generate_shop_data(n_shops=100):  # 减少到100家店铺,提升速度
-    shops = []
-    for i in range(n_shops):
-        base_sps = np.random.beta(8, 2) * 1.8 + 3.2
-        is_affected_by_cny = np.random.random() < 0.25
-        sps_drop = np.random.uniform(0.4, 0.9) if is_affected_by_cny else 0
-        sps_score = base_sps - sps_drop
-        is_critical = sps_score < 3.5
-        is_warning = 3.5 <= sps_score < 3.6
-
-        shops.append({
-            'shop_id': f'SHOP_{i+1:04d}',
-            'shop_name': fake.company(),
-            'sps_score': round(max(2.0, min(5.0, sps_score)), 2),
-            'daily_orders': int(np.random.lognormal(4, 1.5)),
-            'nrr': round(np.random.beta(2, 8) * 0.1, 3),
-            'shipping_delay_rate': round(np.random.beta(2, 5) * 0.3, 3),
-            'is_critical': is_critical,
-            'is_warning': is_warning,
-            'smart_promo_eligible': sps_score >= 3.5,
-            'region': np.random.choice(['US-East', 'US-West', 'UK', 'EU'], p=[0.4, 0.3, 0.2, 0.1]),
-            'affected_by_cny': is_affected_by_cny
-        })
-
-    return pd.DataFrame(shops)
-
-@st.cache_data(ttl=300)  # 5分钟缓存
+    if SHOP_SOURCE:
+        from aegis.storage import load_shop_frame  # pyarrow 是可选依赖, 只有配置了文件源才导入
+        return load_shop_frame(SHOP_SOURCE)
+
+    # 向量化批量生成, 50万店铺冷启动从分钟级降到秒级
+    # 返回紧凑 Schema: 布尔标记在 flags 位掩码里, 用 flag(df, 'is_critical') 读取
+    return generate_fleet(n_shops, RNG)  # 分块生成, 每块独立子流, 结果与块的生成顺序 / 进程无关
+
 def generate_roas_timeseries(hours=24):  # 减少到24小时,提升速度
+    if ROAS_SOURCE:
+        from aegis.storage import load_roas_frame
+        return load_roas_frame(ROAS_SOURCE, hours=hours)
+
     timestamps = [datetime.now() - timedelta(hours=hours-i) for i in range(hours)]
-    base_roas = 2.5 + np.random.normal(0, 0.3, hours)
+    rng = RNG.generator('roas')
+    base_roas = 2.5 + rng.normal(0, 0.3, hours)
 
-    crisis_start = 15
-    crisis_end = 20
-    base_roas[crisis_start:crisis_end] = np.random.uniform(0.7, 1.3, crisis_end - crisis_start)
+    crisis_start = hours - 9  # 熔断段固定在最近一天内
+    crisis_end = hours - 4
+    base_roas[crisis_start:crisis_end] = rng.uniform(0.7, 1.3, crisis_end - crisis_start)
 
     spend_velocity = np.ones(hours)
-    spend_velocity[crisis_start:crisis_end] = np.random.uniform(2.2, 3.5, crisis_end - crisis_start)
-
-    is_circuit_breaker = (base_roas < 1.5) & (spend_velocity > 2.0)
+    spend_velocity[crisis_start:crisis_end] = rng.uniform(2.2, 3.5, crisis_end - crisis_start)
 
+    # 与流式熔断引擎共用同一阈值 (aegis.breaker)
     df = pd.DataFrame({
         'timestamp': timestamps,
         'roas': base_roas,
         'spend_velocity': spend_velocity,
-        'is_circuit_breaker': is_circuit_breaker
+        'is_circuit_breaker': is_circuit_breaker(base_roas, spend_velocity)
     })
 
     return df
 
+@st.cache_resource  # 站点空间索引 + 每站点滚动延迟聚合, 进程级共享
+def load_logistics():
+    network = LogisticsNetwork(generate_hubs(LOGISTICS_HUBS, seed=RNG.sequence('hubs')))
+    network.ingest_shipments(*simulate_shipments(network.hubs, SHIPMENT_EVENTS, seed=RNG.sequence('shipments')))
+    return network
+
+@st.cache_resource  # 进程级共享: 告警去重 / 冷却状态对所有会话生效, 后台事件循环发送
+def load_alert_dispatcher():
+    return AlertDispatcher(HttpSink(ALERT_WEBHOOK) if ALERT_WEBHOOK else FileSink())
+
+@st.cache_resource  # 进程级共享只读快照: 只在首次访问时生成, 之后后台增量刷新并原子发布新版本, 不再 TTL 整体重建
+def load_refresher(n_shops=100):
+    if SHOP_SOURCE or ROAS_SOURCE:
+        source = FileDeltaSource(SHOP_SOURCE, ROAS_SOURCE)  # 文件被覆盖后只合并有变化的行
+    else:
+        # 延迟率向所在站点的拥堵暴露度回归; 站点网络在物流 Tab 或第一次增量刷新时才构建, 不挡核心指标首屏
+        source = SimulatedDeltaSource(
+            seed=RNG.sequence('delta'),
+            delay_target=lambda snapshot, rows: load_logistics().delay_rate_target(snapshot, rows),
+        )
+    roas_history = generate_roas_timeseries(ROAS_HISTORY_HOURS)
+    rollup = RoasRollup()
+    rollup.ingest_frame(roas_history)  # 1h / 24h / 7d / 30d 指标都从预聚合读, 之后新数据点增量合并
+    refresher = SnapshotRefresher(
+        ShopSnapshot(generate_shop_data(n_shops)), roas_history.tail(24).reset_index(drop=True),  # 24小时数据
+        source=source, interval=REFRESH_SECONDS, roas_hours=24, rollup=rollup
+    )
+    refresher.subscribe(load_alert_dispatcher().observe)  # 每次发布新版本时只对状态切换告警
+    return refresher.start()
+
+def timed_fragment(section):
+    """st.fragment + 分段计时: 控件交互只重跑本区块, 并显示本区块服务端耗时"""
+    def decorate(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with render_timer.section(section):
+                func(*args, **kwargs)
+            st.caption(f"⏱️ {section} 服务端耗时 {render_timer.last(section):.1f} ms")
+        return st.fragment(run)
+    return decorate
+
+@st.cache_resource  # 日 SPS 历史按天更新, 全量店铺一次批量拟合 (10万店铺 x 30天 < 1 秒)
+def load_forecast(n_shops=100):
+    snapshot = load_refresher(n_shops).current()[0]
+    history = generate_sps_history(snapshot.column('sps_score'), snapshot.flag('affected_by_cny'), days=30,
+                                   rng=RNG.generator('sps_history'))
+    return SpsForecast.fit(snapshot.column('shop_id'), history)
+
+def warm_anomaly_detector(snapshot):
+    """用模拟的最近 28 天日值回放预热 (100 万店铺约 30 秒, 在后台线程里跑)"""
+    cny = snapshot.flag('affected_by_cny')
+    history = {
+        'shipping_delay_rate': generate_daily_history(snapshot.column('shipping_delay_rate'), cny, days=WINDOW_DAYS,
+                                                      rng=RNG.generator('delay_history')),
+        'nrr': generate_daily_history(snapshot.column('nrr'), np.zeros_like(cny), days=WINDOW_DAYS,
+                                      noise=0.003, jump=(0.02, 0.05), rng=RNG.generator('nrr_history')),
+    }
+    # 同组 = 区域 x 是否受春节影响: 春节带来的整组漂移不算异常
+    detector = FleetAnomalyDetector(snapshot.column('shop_id'), peer_groups(snapshot.column('region'), cny))
+    for day in range(WINDOW_DAYS):
+        detector.update({metric: values[day] for metric, values in history.items()})
+    return detector
+
+@st.cache_resource  # 后台预热, 不挡首屏; 之后由刷新线程每跨过一天用快照当天值增量更新
+def load_anomaly_monitor(n_shops=100):
+    refresher = load_refresher(n_shops)
+    snapshot = refresher.current()[0]
+    monitor = AnomalyMonitor(lambda: warm_anomaly_detector(snapshot))
+    refresher.subscribe(monitor.observe)
+    return monitor
+
+@st.cache_resource  # 进程级共享: 已构建的图表按 (数据版本, 参数) 复用, 各会话都能命中
+def load_figure_cache():
+    return FigureCache(maxsize=64)
+
+@st.cache_resource  # 进程级共享: 连接池 / 结果缓存 / 在途请求合并对所有会话生效
+def load_escalation_service():
+    if not os.getenv('DEEPSEEK_API_KEY'):
+        return None
+    return EscalationService()
+
+@st.cache_resource  # 进程级共享: 磁盘分类缓存, 重启后依然命中
+def load_review_cache():
+    # 分类器版本 (含是否启用 LLM 升级) 参与缓存键, 规则/模型变化后旧结果自动失效
+    version = CLASSIFIER_VERSION
+    if load_escalation_service() is not None:
+        version += '+' + DEEPSEEK_MODEL
+    return ReviewCache(DEFAULT_CACHE_PATH, version=version)
+
 def analyze_review_with_deepseek(review_text):
     """使用 DeepSeek API 分析差评 (优化版)"""
 
-    # 快速本地规则引擎 (优先使用,速度快)
-    logistics_keywords = ['shipping', 'delivery', 'late', 'slow', 'delayed', '物流', '发货', '慢', '延迟']
-    quality_keywords = ['fake', 'broken', 'trash', 'quality', 'defective', '假货', '质量', '破损']
-    review_lower = review_text.lower()
-
-    if any(kw in review_lower for kw in logistics_keywords):
-        return {
-            'category': '📦 物流问题 (可申诉)',
-            'is_appealable': True,
-            'confidence': 0.92,
-            'action': '自动生成申诉工单',
-            'powered_by': 'AI 规则引擎'
-        }
-    elif any(kw in review_lower for kw in quality_keywords):
-        return {
-            'category': '🚨 质量问题 (不可申诉)',
-            'is_appealable': False,
-            'confidence': 0.95,
-            'action': '触发产品下架审查',
-            'powered_by': 'AI 规则引擎'
-        }
-    else:
-        return {
-            'category': '💬 服务问题 (可申诉)',
-            'is_appealable': True,
-            'confidence': 0.85,
-            'action': '标准申诉流程',
-            'powered_by': 'AI 规则引擎'
-        }
+    # 快速本地规则引擎 (优先使用,速度快): 编译后的多关键词匹配, 一次扫描, 物流 > 质量 > 服务
+    # 落入 "服务问题" 兜底的低置信度结果再交给 DeepSeek 升级通道 (配置了 DEEPSEEK_API_KEY 时)
+    # 相同评论 (归一化后) 直接命中磁盘缓存, 不再重复分类/调用 API
+    return analyze_review(review_text, load_escalation_service(), cache=load_review_cache())
+
+@st.cache_resource  # 进程级共享: 环形缓冲 + 后台生产者 (本地模拟源, 可换成真实消息队列)
+def load_review_feed():
+    feed = ReviewFeed(capacity=1024)
+    producer = ReviewProducer(feed, rate=0.5, source=synthetic_reviews(n_shops=shop_snapshot.n_shops, seed=RNG.sequence('reviews')))
+    producer.produce(4)  # 首屏预填
+    producer.start()
+    return feed
+
+@st.fragment(run_every=2)
+def render_review_feed(n=4):
+    feed = load_review_feed()
+    st.markdown(f"### 📡 实时差评流 (最近 {n} 条 | 累计 {feed.total:,} 条)")
+    cards = [
+        f"""
+        <div style='background: #F7F7F8; padding: 12px; border-radius: 8px; margin-bottom: 8px; border-left: 3px solid #10A37F;'>
+            <div style='display: flex; justify-content: space-between; align-items: center;'>
+                <span style='color: #6B7280; font-size: 0.85em;'>{review.time} | {review.shop}</span>
+                <span style='font-size: 0.9em;'>{review.category} | {review.status}</span>
+            </div>
+            <p style='margin: 8px 0 0 0; color: #374151;'>{html.escape(review.review)}</p>
+        </div>
+        """
+        for review in feed.latest(n).itertuples()
+    ]
+    # 一次渲染所有卡片
+    st.markdown(''.join(cards) or "等待新评论...", unsafe_allow_html=True)
 
 # ==================== Header ====================
 
@@ -347,24 +281,31 @@ with col3:
     """, unsafe_allow_html=True)
 
 st.markdown("---")
+render_timer.lap('页头')
 
 # ==================== Generate Data ====================
 
-shop_df = generate_shop_data(100)  # 100家店铺
-roas_df = generate_roas_timeseries(24)  # 24小时数据
+refresher = load_refresher(FLEET_SIZE)
+shop_snapshot, roas_df, roas_rollup = refresher.current()  # 读者不加锁, 拿到的总是完整版本
+figure_cache = load_figure_cache()
+render_timer.lap('数据加载')
 
 # ==================== Key Metrics ====================
 
 col1, col2, col3, col4, col5 = st.columns(5)
 
-critical_shops = shop_df[shop_df['is_critical']].shape[0]
-warning_shops = shop_df[shop_df['is_warning']].shape[0]
-avg_sps = shop_df['sps_score'].mean()
-avg_delay_rate = shop_df['shipping_delay_rate'].mean()
-circuit_breaker_count = roas_df['is_circuit_breaker'].sum()
-budget_saved = circuit_breaker_count * 1240
-total_orders = shop_df['daily_orders'].sum()
-smart_promo_eligible = shop_df[shop_df['sps_score'] >= 3.6].shape[0]
+# 全局指标直接读增量聚合器, 不再逐行重扫 shop_df
+fleet_kpis = shop_snapshot.kpis.total()
+critical_shops = fleet_kpis.critical
+warning_shops = fleet_kpis.warning
+avg_sps = fleet_kpis.avg_sps
+avg_delay_rate = fleet_kpis.avg_delay_rate
+circuit_breaker_count = roas_rollup.window('24h').trips  # 预聚合查询, 与原始点数无关
+budget_saved = circuit_breaker_count * BUDGET_PER_TRIP
+total_orders = fleet_kpis.total_orders
+smart_promo_eligible = fleet_kpis.promo_ready
+anomaly_monitor = load_anomaly_monitor(FLEET_SIZE)
+delay_wow = anomaly_monitor.week_over_week('shipping_delay_rate')  # 预热完成前为 NaN
 
 # 添加震撼的统计横幅
 st.markdown(f"""
@@ -431,8 +372,9 @@ with col4:
     st.metric(
         label="📦 延迟发货率",
         value=f"{avg_delay_rate*100:.1f}%",
-        delta="+24% WoW",
-        delta_color="inverse"
+        # 全店铺日均延迟率: 最近 7 天 vs 之前 7 天; 异常检测器后台预热完成前显示 "—"
+        delta="— WoW" if np.isnan(delay_wow) else f"{delay_wow:+.0%} WoW",
+        delta_color="off" if np.isnan(delay_wow) else "inverse"
     )
 
 with col5:
@@ -442,145 +384,92 @@ with col5:
         delta=f"{circuit_breaker_count} 次熔断"
     )
 
+refresh_stats = refresher.stats()
+st.caption(
+    f"🔄 快照 v{refresh_stats['version']} | 增量刷新 {refresh_stats['refreshes']} 次 "
+    f"(累计 {refresh_stats['rows_changed']:,} 家变更) | 数据延迟 {refresh_stats['lag_seconds']:.0f} 秒 | "
+    f"上次刷新耗时 {refresh_stats['last_duration_ms']:.0f} ms"
+    + (f" | ⚠️ 刷新失败 {refresh_stats['errors']} 次" if refresh_stats['errors'] else "")
+)
+alert_stats = load_alert_dispatcher().stats()
+st.caption(
+    f"🔔 告警 (新增 P0 / 熔断触发): 已发送 {alert_stats['sent']:,} 条 ({alert_stats['batches']} 批) | "
+    f"冷却期内抑制 {alert_stats['suppressed']:,} 条 | 端到端延迟 p99 "
+    + (f"{alert_stats['p99_ms']:.0f} ms" if alert_stats['sent'] else "-")
+    + (f" | ⚠️ 发送失败 {alert_stats['failed']:,} 条" if alert_stats['failed'] else "")
+)
+
 st.markdown("---")
+render_timer.lap('核心指标')
 
 # ==================== Main Tabs ====================
 
 tab1, tab2, tab3, tab4 = st.tabs(["📍 物流热力图", "⚡ Smart+ 熔断器", "🔍 NRR Sniper", "📊 SPS 监控"])
 
-with tab1:
+# 每个 Tab 是独立 fragment: Tab 内控件交互只重跑该 Tab, 不重跑页头/CSS/其他 Tab 的图表
+
+@timed_fragment('物流热力图')
+def render_logistics_tab(avg_sps, shop_snapshot):
     st.markdown("## 🌍 全球物流拥堵实时监控")
 
+    network = load_logistics()
+
     col_gauge1, col_gauge2 = st.columns([1, 2])
 
     with col_gauge1:
-        fig_gauge = go.Figure(go.Indicator(
-            mode="gauge+number+delta",
-            value=avg_sps,
-            delta={'reference': 3.8},
-            title={'text': "全局平均 SPS"},
-            gauge={
-                'axis': {'range': [2.0, 5.0]},
-                'bar': {'color': "#10A37F" if avg_sps >= 3.6 else "#EF4444"},
-                'steps': [
-                    {'range': [2.0, 3.5], 'color': '#FEE2E2'},
-                    {'range': [3.5, 3.6], 'color': '#FEF3C7'},
-                    {'range': [3.6, 5.0], 'color': '#D1FAE5'}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 3.5
-                }
-            }
-        ))
-
-        fig_gauge.update_layout(
-            paper_bgcolor='#FFFFFF',
-            font={'color': "#202123"},
-            height=250,  # 减小高度
-            margin=dict(l=20, r=20, t=40, b=20)  # 减小边距
-        )
+        fig_gauge = figure_cache.get('gauge', round(avg_sps, 4), lambda: build_sps_gauge(avg_sps))
 
-        st.plotly_chart(fig_gauge, use_container_width=True)
+        plotly_chart(fig_gauge)
 
     with col_gauge2:
-        ports_data = pd.DataFrame({
-            'port': ['Los Angeles', 'Long Beach', 'New York', 'Felixstowe', 'Rotterdam'],
-            'lat': [33.7, 33.8, 40.7, 51.9, 51.9],
-            'lon': [-118.2, -118.1, -74.0, 1.3, 4.5],
-            'congestion_level': [85, 78, 65, 72, 45],
-            'delay_days': [8, 7, 5, 6, 3]
-        })
-
-        fig_map = px.scatter_geo(
-            ports_data,
-            lat='lat',
-            lon='lon',
-            size='congestion_level',
-            color='delay_days',
-            hover_name='port',
-            color_continuous_scale='Reds',
-            size_max=50,
-            title='港口拥堵热力图'
+        level = st.radio("地图粒度", list(MAP_LEVELS), index=1, horizontal=True, key='map_level')
+        # 地图只画按粒度预聚合的点 (站点按格子合并), 不画原始发货事件; 聚合随数据版本变化才重算
+        fig_map = figure_cache.get(
+            'port_map', (network.version, level),
+            lambda: build_port_map(network.map_points(level),
+                                   title=f'港口 / 仓库拥堵热力图 ({len(network.hubs):,} 个站点, 近 24 小时)')
         )
 
-        fig_map.update_layout(
-            geo=dict(
-                bgcolor='#F7F7F8',
-                showland=True,
-                landcolor='#FFFFFF',
-                projection_type='natural earth'
-            ),
-            paper_bgcolor='#FFFFFF',
-            font=dict(color='#202123'),
-            height=300,  # 减小高度
-            margin=dict(l=0, r=0, t=40, b=0)  # 减小边距
-        )
+        plotly_chart(fig_map)
 
-        st.plotly_chart(fig_map, use_container_width=True)
+    st.markdown("#### 店铺拥堵暴露最高的站点")
+    st.caption("店铺按所在区域关联最近的港口 / 仓库, 暴露度 = 站点拥堵度 x 距离衰减, 模拟数据源的延迟发货率随之变化")
+    st.dataframe(network.exposed_hubs(shop_snapshot), use_container_width=True, hide_index=True)
 
-with tab2:
+@timed_fragment('Smart+ 熔断器')
+def render_breaker_tab(roas_df, roas_rollup):
     st.markdown("## ⚡ Smart+ Circuit Breaker - ROAS 监控")
 
     st.info("💡 熔断逻辑: 当 ROAS < 1.5 且 Spend Velocity > 2x 时自动暂停广告")
 
-    fig_roas = go.Figure()
-
-    normal_data = roas_df[~roas_df['is_circuit_breaker']]
-    circuit_data = roas_df[roas_df['is_circuit_breaker']]
-
-    fig_roas.add_trace(go.Scatter(
-        x=normal_data['timestamp'],
-        y=normal_data['roas'],
-        mode='lines+markers',
-        name='Normal ROAS',
-        line=dict(color='#10A37F', width=3),
-        marker=dict(size=4)
-    ))
-
-    fig_roas.add_trace(go.Scatter(
-        x=circuit_data['timestamp'],
-        y=circuit_data['roas'],
-        mode='lines+markers',
-        name='🔴 熔断触发',
-        line=dict(color='#EF4444', width=4),
-        marker=dict(size=8, symbol='x')
-    ))
-
-    fig_roas.add_hline(
-        y=1.5,
-        line_dash="dash",
-        line_color="red",
-        annotation_text="熔断阈值 (1.5)"
-    )
+    horizon = st.radio("时间窗口", list(HORIZONS), index=1, horizontal=True, key='roas_horizon')
 
-    fig_roas.update_layout(
-        title='ROAS 时间序列 (过去 24 小时)',
-        xaxis_title='时间',
-        yaxis_title='ROAS',
-        paper_bgcolor='#FFFFFF',
-        plot_bgcolor='#F7F7F8',
-        font=dict(color='#202123'),
-        height=300,  # 减小高度
-        margin=dict(l=40, r=20, t=60, b=40),  # 减小边距
-        hovermode='x'  # 简化 hover 模式
+    if horizon == '24h':
+        chart_df, title = roas_df, 'ROAS 时间序列 (过去 24 小时)'
+    else:
+        # 其他窗口画预聚合桶 (1h 按分钟, 7d / 30d 按天), 烧钱速度取桶内峰值
+        chart_df, title = roas_rollup.buckets(horizon), f'ROAS 时间序列 (过去 {horizon}, 预聚合)'
+    fig_roas = figure_cache.get(
+        'roas', (frame_version(chart_df), ROAS_POINT_BUDGET, title),
+        lambda: build_roas_chart(chart_df, max_points=ROAS_POINT_BUDGET, title=title)
     )
 
-    st.plotly_chart(fig_roas, use_container_width=True)
+    plotly_chart(fig_roas)
 
+    stats = roas_rollup.window(horizon)
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("触发熔断", f"{circuit_breaker_count} 次")
+        st.metric("触发熔断", f"{stats.trips} 次")
     with col2:
-        st.metric("平均 ROAS", f"{roas_df['roas'].mean():.2f}")
+        st.metric("平均 ROAS", f"{stats.roas:.2f}")
     with col3:
-        st.metric("峰值烧钱速度", f"{roas_df['spend_velocity'].max():.1f}x")
+        st.metric("峰值烧钱速度", f"{stats.peak_velocity:.1f}x")
     with col4:
-        st.metric("已拦截预算", f"${budget_saved:,}")
+        st.metric("已拦截预算", f"${stats.trips * BUDGET_PER_TRIP:,}")
 
-with tab3:
+@timed_fragment('NRR Sniper')
+def render_review_tab():
     st.markdown("## 🔍 NRR Sniper - AI 差评分析")
 
     st.info("💡 输入差评内容,AI 自动判定类别并生成申诉策略 (支持中英文)")
@@ -641,6 +530,13 @@ with tab3:
         with col_result2:
             st.markdown("### 处理方案")
             st.caption(f"🤖 Powered by: {result.get('powered_by', 'DeepSeek API')}")
+            if result.get('matched_keywords'):
+                st.caption(f"🔑 命中关键词: {', '.join(result['matched_keywords'])}")
+            cache_stats = load_review_cache().stats()
+            st.caption(
+                f"💾 分类缓存: 命中 {cache_stats['hits']:,} / 未命中 {cache_stats['misses']:,} "
+                f"(命中率 {cache_stats['hit_rate'] * 100:.1f}%, {cache_stats['entries']:,} 条)"
+            )
 
             if result['is_appealable']:
                 st.json({
@@ -657,29 +553,69 @@ with tab3:
                     "ai_reason": result.get('ai_reason', '产品质量问题需立即处理')
                 })
 
-    # 实时差评流展示
+    # 批量差评分诊 (导出文件 -> 多进程分块分类 -> 流式写出)
     st.markdown("---")
-    st.markdown("### 📡 实时差评流 (最近 4 条)")
-
-    sample_reviews = [
-        {"time": "2分钟前", "shop": "Shop_0042", "review": "Shipping took forever! 3 weeks delay", "category": "📦 物流", "status": "✅ 已申诉"},
-        {"time": "5分钟前", "shop": "Shop_0089", "review": "Product quality is terrible, fake!", "category": "🚨 质量", "status": "❌ 已下架"},
-        {"time": "8分钟前", "shop": "Shop_0156", "review": "春节期间物流慢可以理解,但包装破损", "category": "📦 物流", "status": "⏳ 处理中"},
-        {"time": "12分钟前", "shop": "Shop_0203", "review": "Customer service not responding", "category": "💬 服务", "status": "✅ 已申诉"}
-    ]
-
-    for review in sample_reviews:
-        st.markdown(f"""
-        <div style='background: #F7F7F8; padding: 12px; border-radius: 8px; margin-bottom: 8px; border-left: 3px solid #10A37F;'>
-            <div style='display: flex; justify-content: space-between; align-items: center;'>
-                <span style='color: #6B7280; font-size: 0.85em;'>{review['time']} | {review['shop']}</span>
-                <span style='font-size: 0.9em;'>{review['category']} | {review['status']}</span>
-            </div>
-            <p style='margin: 8px 0 0 0; color: #374151;'>{review['review']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown("### 📂 批量差评分诊")
+
+    uploaded_reviews = st.file_uploader("上传差评导出文件 (CSV / Parquet)", type=['csv', 'parquet'])
+
+    if uploaded_reviews is not None:
+        review_column = st.text_input("评论列名", value="review")
+
+        if st.button("🚀 批量分诊", use_container_width=True):
+            suffix = os.path.splitext(uploaded_reviews.name)[1].lower()
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as source_file:
+                shutil.copyfileobj(uploaded_reviews, source_file)
+            output_path = source_file.name + '.triaged.csv'
+            total_rows = max(count_rows(source_file.name), 1)
+
+            progress_bar = st.progress(0.0, text="分诊中...")
+
+            def report_progress(rows_done, elapsed):
+                progress_bar.progress(
+                    min(rows_done / total_rows, 1.0),
+                    text=f"已分诊 {rows_done:,} 条 | {rows_done / max(elapsed, 1e-9):,.0f} 条/秒"
+                )
+
+            try:
+                stats = triage_reviews(
+                    source_file.name, output_path, column=review_column,
+                    progress=report_progress, cache_path=DEFAULT_CACHE_PATH
+                )
+            except (ValueError, KeyError) as e:
+                st.error(f"读取失败, 请检查评论列名: {e}")
+            else:
+                col_stat1, col_stat2, col_stat3 = st.columns(3)
+                with col_stat1:
+                    st.metric("分诊条数", f"{stats['rows']:,}")
+                with col_stat2:
+                    st.metric("吞吐", f"{stats['rows_per_second']:,.0f} 条/秒")
+                with col_stat3:
+                    st.metric("耗时", f"{stats['seconds']:.1f} 秒")
+                st.caption(f"💾 缓存命中 {stats['cache_hits']:,} 条 / 新分类 {stats['cache_misses']:,} 条")
+                st.json(stats['categories'])
+                if stats['rows'] == 0:
+                    st.warning("上传文件没有评论行, 结果只有表头")
+
+                with open(output_path, 'rb') as result_file:
+                    st.download_button(
+                        "⬇️ 下载分诊结果 (CSV)",
+                        data=result_file,
+                        file_name=os.path.splitext(uploaded_reviews.name)[0] + '_triaged.csv',
+                        mime='text/csv',
+                        use_container_width=True
+                    )
+            finally:
+                os.unlink(source_file.name)
+                if os.path.exists(output_path):
+                    os.unlink(output_path)
+
+    # 实时差评流展示 (fragment 定时局部刷新, 不重跑整页)
+    st.markdown("---")
+    render_review_feed()
 
-with tab4:
+@timed_fragment('SPS 监控')
+def render_sps_tab(shop_snapshot, avg_sps):
     st.markdown("## 📊 SPS Guardian Monitor")
 
     col1, col2, col3, col4 = st.columns(4)
@@ -687,117 +623,128 @@ with tab4:
     with col1:
         filter_mode = st.selectbox(
             "筛选模式",
-            ['全部店铺', '仅 P0 Critical', '仅警戒区', '受春节影响']
+            ['全部店铺', '仅 P0 Critical', '仅警戒区', '受春节影响', f'{FORECAST_HOURS}h 内预计跌破', '履约指标异常']
         )
 
     with col2:
-        selected_region = st.selectbox("区域", ['全部'] + list(shop_df['region'].unique()))
+        selected_region = st.selectbox("区域", ['全部'] + shop_snapshot.regions())
 
     with col3:
-        sort_by = st.selectbox("排序", ['SPS 升序', 'SPS 降序', '订单量'])
+        sort_label = st.selectbox("排序列", list(TABLE_COLUMNS.values()), index=1)
 
     with col4:
-        top_n = st.selectbox("显示数量", [20, 50, 100, 500])
-
-    # Filter data
-    filtered_df = shop_df.copy()
-
-    if filter_mode == '仅 P0 Critical':
-        filtered_df = filtered_df[filtered_df['is_critical']]
-    elif filter_mode == '仅警戒区':
-        filtered_df = filtered_df[filtered_df['is_warning']]
-    elif filter_mode == '受春节影响':
-        filtered_df = filtered_df[filtered_df['affected_by_cny']]
-
-    if selected_region != '全部':
-        filtered_df = filtered_df[filtered_df['region'] == selected_region]
-
-    # Sort
-    if sort_by == 'SPS 升序':
-        filtered_df = filtered_df.sort_values('sps_score', ascending=True)
-    elif sort_by == 'SPS 降序':
-        filtered_df = filtered_df.sort_values('sps_score', ascending=False)
+        sort_desc = st.selectbox("顺序", ['升序', '降序']) == '降序'
+
+    # Filter data (预计算位图求交, 不复制整张表)
+    shop_index = shop_snapshot.index
+    status_key = {'仅 P0 Critical': 'critical', '仅警戒区': 'warning', '受春节影响': 'cny',
+                  f'{FORECAST_HOURS}h 内预计跌破': 'forecast_breach', '履约指标异常': 'anomaly'}.get(filter_mode)
+    region_key = None if selected_region == '全部' else selected_region
+
+    # SPS 趋势预测: 按快照版本对齐一次, 高风险店铺注册为位图筛选档位
+    forecast = load_forecast(FLEET_SIZE)
+    breach_prob, eta_hours = forecast.align(shop_snapshot)
+    shop_index.register('forecast_breach', forecast.at_risk(shop_snapshot))
+
+    # 延迟率 / NRR 异常 (同组稳健 z 且 店铺稳健 z / EWMA 控制图之一触发); 后台预热完成前没有异常店铺
+    anomaly_report = load_anomaly_monitor(FLEET_SIZE).report()
+    if anomaly_report is None:
+        anomaly_flags = np.zeros(shop_snapshot.n_shops, dtype=np.uint8)
+        if status_key == 'anomaly':
+            st.caption("⏳ 异常检测器正在后台用最近 28 天历史预热, 完成后刷新即可看到异常店铺")
     else:
-        filtered_df = filtered_df.sort_values('daily_orders', ascending=False)
+        anomaly_flags = anomaly_report.align(shop_snapshot)
+    # 档位名带上检测日: 预热完成 / 每日更新后同一快照版本也会注册新结果 (register 不覆盖已有档位)
+    anomaly_status = f"anomaly@{0 if anomaly_report is None else anomaly_report.day}"
+    shop_index.register(anomaly_status, anomaly_flags != 0)
+    if status_key == 'anomaly':
+        status_key = anomaly_status
 
     # Charts
     col_chart1, col_chart2 = st.columns(2)
 
     with col_chart1:
-        fig_hist = px.histogram(
-            shop_df,
-            x='sps_score',
-            nbins=20,  # 减少柱子数量
-            title='SPS 分数分布',
-            color_discrete_sequence=['#10A37F']
-        )
-
-        fig_hist.add_vline(x=3.5, line_dash="dash", line_color="red", line_width=2)
-        fig_hist.add_vline(x=avg_sps, line_dash="solid", line_color="#10A37F", line_width=2)
-
-        fig_hist.update_layout(
-            paper_bgcolor='#FFFFFF',
-            plot_bgcolor='#F7F7F8',
-            font=dict(color='#202123'),
-            height=280,  # 减小高度
-            margin=dict(l=40, r=20, t=60, b=40),
-            showlegend=False
+        # 服务端 np.histogram 分箱, 只发 20 个 bin 计数; 快照版本不变时直接复用
+        fig_hist = figure_cache.get(
+            'sps_histogram', (shop_snapshot.version, 20),
+            lambda: build_sps_histogram(shop_snapshot.column('sps_score'), avg_sps, bins=20)
         )
-        st.plotly_chart(fig_hist, use_container_width=True)
+        plotly_chart(fig_hist)
 
     with col_chart2:
-        # 只显示前50个店铺,提升性能
-        sample_df = shop_df.sample(min(50, len(shop_df)))
-
-        fig_scatter = px.scatter(
-            sample_df,
-            x='daily_orders',
-            y='sps_score',
-            color='is_critical',
-            title='SPS vs 订单量 (抽样 50 家)',
-            color_discrete_map={True: '#EF4444', False: '#10A37F'}
+        # 超出点数预算时画密度底图, P0 店铺始终保留 (不占预算), 预算内再画离群店铺 (种子取自 AEGIS_SEED 派生的 scatter 流, 可复现)
+        fig_scatter = figure_cache.get(
+            'sps_scatter', (shop_snapshot.version, SCATTER_POINT_BUDGET),
+            lambda: build_sps_scatter(shop_snapshot, budget=SCATTER_POINT_BUDGET, seed=RNG.sequence('scatter'))
         )
-
-        fig_scatter.add_hline(y=3.5, line_dash="dash", line_color="red")
-
-        fig_scatter.update_layout(
-            paper_bgcolor='#FFFFFF',
-            plot_bgcolor='#F7F7F8',
-            font=dict(color='#202123'),
-            xaxis_type='log',
-            height=280,  # 减小高度
-            margin=dict(l=40, r=20, t=60, b=40),
-            showlegend=False
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        plotly_chart(fig_scatter)
 
     # Data Table
     st.markdown("### 店铺详细列表")
 
-    display_df = filtered_df[[
-        'shop_name', 'sps_score', 'daily_orders', 'nrr',
-        'shipping_delay_rate', 'region', 'smart_promo_eligible'
-    ]].head(top_n).copy()
+    col_search, col_size, col_page = st.columns([2, 1, 1])
+    with col_search:
+        search = st.text_input("搜索店铺名称", placeholder="输入店铺名关键字")
+    with col_size:
+        page_size = st.selectbox("每页", [20, 50, 100])
+
+    # 服务端分页: 沿排序置换只取当前页的行号, 不物化整个筛选结果
+    sort_column = {label: column for column, label in TABLE_COLUMNS.items()}[sort_label]
+    pager = shop_index.pager(status_key, region_key, search, sort_column, sort_desc)
+    n_pages = max(-(-pager.total // page_size), 1)
+    with col_page:
+        # 筛选/排序/搜索条件变化时回到第 1 页
+        page_no = st.number_input(
+            "页码", min_value=1, max_value=n_pages, value=1, step=1,
+            key=f"page_{status_key}_{region_key}_{search}_{sort_column}_{sort_desc}_{page_size}"
+        )
+
+    page_rows = pager.page((page_no - 1) * page_size, page_size)
+    page_df = shop_snapshot.take(page_rows, list(TABLE_COLUMNS) + ['flags'])
+    display_df = page_df[list(TABLE_COLUMNS)].assign(
+        smart_promo_eligible=flag(page_df, 'smart_promo_eligible'),
+        breach_prob=breach_prob[page_rows],
+        eta_hours=eta_hours[page_rows],
+        anomaly=[AnomalyReport.describe(f) for f in anomaly_flags[page_rows]],
+    )
 
-    display_df.columns = ['店铺名称', 'SPS', '日订单', 'NRR', '延迟率', '区域', 'Smart Promo']
+    display_df.columns = list(TABLE_COLUMNS.values()) + [
+        'Smart Promo', f'{FORECAST_HOURS}h 跌破概率', '预计跌破 (小时)', '异常信号'
+    ]
 
     st.dataframe(display_df, use_container_width=True, height=300)  # 减小高度
+    st.caption(f"第 {page_no}/{n_pages} 页 | 共 {pager.total:,} 家")
 
-    # Summary
+    # Summary (合并区域/档位分格, 不重扫筛选结果)
     col1, col2, col3, col4 = st.columns(4)
+    if status_key in ('forecast_breach', anomaly_status):
+        # 预测 / 异常档位不在 KPI 分格里, 只聚合命中的行 (通常很少)
+        summary = KpiAggregator.from_rows(shop_snapshot, shop_index.select(status_key, region_key).rows()).total()
+    else:
+        summary = shop_snapshot.kpis.query(status_key, region_key)
+    filtered_count = summary.count
 
     with col1:
-        st.metric("筛选结果", f"{len(filtered_df)} 家")
+        st.metric("筛选结果", f"{filtered_count} 家")
     with col2:
-        critical_pct = (filtered_df['is_critical'].sum() / len(filtered_df) * 100) if len(filtered_df) > 0 else 0
+        critical_pct = (summary.critical / filtered_count * 100) if filtered_count > 0 else 0
         st.metric("P0 占比", f"{critical_pct:.1f}%")
     with col3:
-        eligible_count = filtered_df['smart_promo_eligible'].sum()
+        eligible_count = summary.promo_eligible
         st.metric("Smart Promo 合格", f"{eligible_count} 家")
     with col4:
-        avg_delay = filtered_df['shipping_delay_rate'].mean()
+        avg_delay = summary.avg_delay_rate
         st.metric("平均延迟率", f"{avg_delay*100:.1f}%")
 
+with tab1:
+    render_logistics_tab(avg_sps, shop_snapshot)
+with tab2:
+    render_breaker_tab(roas_df, roas_rollup)
+with tab3:
+    render_review_tab()
+with tab4:
+    render_sps_tab(shop_snapshot, avg_sps)
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -809,3 +756,12 @@ st.markdown("""
     <p style='color: #9CA3AF; margin: 8px 0 0 0; font-size: 0.85em;'>💡 这不是 PPT,这是可以直接运行的生产级系统 | 春节全勤值班承诺</p>
 </div>
 """, unsafe_allow_html=True)
+render_timer.lap('页脚')
+
+with st.expander("⏱️ 服务端渲染耗时 (按区块)"):
+    st.dataframe(render_timer.report(), use_container_width=True, hide_index=True)
+    figure_stats = figure_cache.stats()
+    st.caption(
+        f"📈 图表缓存: 命中 {figure_stats['hits']:,} / 未命中 {figure_stats['misses']:,} | 发送字节: "
+        + ', '.join(f"{name} {size / 1024:,.1f} KB" for name, size in figure_stats['bytes'].items())
+    )
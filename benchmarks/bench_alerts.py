@@ -0,0 +1,188 @@
+"""
+告警管道 Benchmark: 状态切换检测 / 去重限流的正确性, 与 万级/分钟 告警下的投递延迟
+1) 正确性: 快照 upsert 使一批店铺进入 P0 -> 只告警一次; 保持 P0 再刷新 -> 不告警;
+   恢复后冷却期内再次进入 -> 被抑制; 冷却期过后再次进入 -> 重新告警; ROAS 熔断只对上升沿告警
+2) 刷新线程开销: --shops 家店铺时 observe() (比对前后两个版本 + 投递) 的耗时
+3) 吞吐: 生产者线程按 --rates (条/分钟) 每 100 ms 投递一批切换 (含 --dup-ratio 的重复键),
+   分别发到 内存 (模拟 20 ms 下游) / JSONL 文件 / 本地 HTTP 桩, 报告 submit 调用耗时、端到端延迟与积压
+
+用法:
+    python benchmarks/bench_alerts.py --shops 1000000 --rates 10000 100000 600000 --seconds 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from aegis.alerts import AlertDispatcher, FileSink, HttpSink, MemorySink, roas_alerts  # noqa: E402
+from aegis.breaker import is_circuit_breaker  # noqa: E402
+from aegis.datagen import generate_fleet  # noqa: E402
+from aegis.escalation import LatencyRecorder  # noqa: E402
+from aegis.rng import RngStreams  # noqa: E402
+from aegis.schema import pack_flags  # noqa: E402
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+
+def set_sps(snapshot, rows, sps):
+    """把给定行的 SPS 改成 sps, 同时更新 P0 / 预警标记, 返回新版本"""
+    changes = snapshot.take(rows).reset_index(drop=True)
+    sps = np.full(len(rows), sps, dtype=np.float32)
+    critical = sps < 3.5
+    return snapshot.upsert(changes.assign(sps_score=sps, flags=pack_flags(
+        critical, (sps >= 3.5) & (sps < 3.6), ~critical, np.zeros(len(rows), dtype=bool))))
+
+
+def check_transitions(snapshot, rng, n=1000):
+    sink = MemorySink()
+    dispatcher = AlertDispatcher(sink, batch_window=0.01, cooldown=0.5)
+    healthy = np.flatnonzero(~snapshot.flag('is_critical'))
+    rows = np.sort(rng.choice(healthy, n, replace=False))
+
+    def step(previous, current):
+        dispatcher.observe((previous, pd.DataFrame()), (current, pd.DataFrame()))
+        dispatcher.flush()
+        return current
+
+    def sent():
+        return dispatcher.stats()['sent']
+
+    entered = step(snapshot, set_sps(snapshot, rows, 3.0))
+    assert sent() == n, sent()
+    assert {a['shop_id'] for a in sink.alerts} == set(snapshot.column('shop_id')[rows].tolist())
+    stayed = step(entered, set_sps(entered, rows, 3.1))  # 仍是 P0, 只是分数变化
+    assert sent() == n, sent()
+    recovered = step(stayed, set_sps(stayed, rows, 4.5))
+    again = step(recovered, set_sps(recovered, rows, 3.0))  # 冷却期内再次进入
+    assert sent() == n and dispatcher.suppressed == n, dispatcher.stats()
+    time.sleep(0.6)
+    recovered = step(again, set_sps(again, rows, 4.5))
+    step(recovered, set_sps(recovered, rows, 3.0))  # 冷却期已过
+    assert sent() == 2 * n, sent()
+    dispatcher.close()
+
+    ts = pd.date_range('2026-01-01', periods=8, freq='h')
+    roas = np.array([2.5, 1.0, 1.0, 2.4, 1.1, 1.2, 2.6, 1.0])
+    velocity = np.array([1.0, 2.8, 3.0, 1.0, 2.5, 2.6, 1.0, 1.0])
+    frame = pd.DataFrame({'timestamp': ts, 'roas': roas, 'spend_velocity': velocity,
+                          'is_circuit_breaker': is_circuit_breaker(roas, velocity)})
+    edges = [a['timestamp'] for a in roas_alerts(frame.iloc[:2], frame)]
+    assert edges == [str(ts[4])], edges  # 第 2 小时已在旧版本里熔断, 第 3 小时是持续熔断
+    print(f"正确性: {n} 家进入 P0 各告警 1 次; 保持 P0 不告警; 冷却期内再次进入抑制 {n} 条, 冷却后重新告警; "
+          "ROAS 只对熔断上升沿告警")
+
+
+def observe_cost(snapshot, rng, changed_fraction=0.01, repeat=5):
+    sink = MemorySink()
+    dispatcher = AlertDispatcher(sink, batch_window=0.05)
+    n = max(int(snapshot.n_shops * changed_fraction), 1)
+    timings, transitions = [], 0
+    current = snapshot
+    for _ in range(repeat):
+        rows = np.sort(rng.choice(current.n_shops, n, replace=False))
+        updated = set_sps(current, rows, 3.0 if rng.random() < 0.5 else 4.5)
+        start = time.perf_counter()
+        dispatcher.observe((current, pd.DataFrame()), (updated, pd.DataFrame()))
+        timings.append(time.perf_counter() - start)
+        dispatcher.flush()
+        transitions = max(transitions, dispatcher.stats()['sent'])
+        current = updated
+    dispatcher.close()
+    print(f"\n刷新线程开销: {snapshot.n_shops:,} 家店铺, 每次变更 {n:,} 家, "
+          f"observe() 中位 {np.median(timings) * 1e3:.1f} ms / 最大 {max(timings) * 1e3:.1f} ms "
+          f"(累计告警 {transitions:,} 条)")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    received = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        StubHandler.received += len(json.loads(body)['alerts'])
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def throughput(sink, rate, seconds, dup_ratio, rng):
+    """rate 条/分钟, 每 100 ms 投递一批; 返回 (stats, submit 耗时记录, 唯一键数)"""
+    dispatcher = AlertDispatcher(sink, batch_window=0.5, max_batch=1000, cooldown=3600)
+    submit_latency = LatencyRecorder()
+    per_tick = max(int(rate / 600), 1)
+    ticks = int(seconds * 10)
+    unique = 0
+    start = time.perf_counter()
+    for tick in range(ticks):
+        n_dup = int(per_tick * dup_ratio) if unique else 0
+        keys = list(range(unique, unique + per_tick - n_dup)) + rng.integers(0, max(unique, 1), n_dup).tolist()
+        unique += per_tick - n_dup
+        now = time.time()
+        alerts = [{'kind': 'shop_critical', 'key': f"SHOP_{k:07d}", 'shop_id': k, 'detected_at': now} for k in keys]
+        t = time.perf_counter()
+        dispatcher.submit(alerts)
+        submit_latency.record(time.perf_counter() - t)
+        time.sleep(max(start + (tick + 1) / 10 - time.perf_counter(), 0))
+    backlog = dispatcher.stats()['pending']
+    dispatcher.flush()
+    stats = dispatcher.stats()
+    dispatcher.close()
+    return stats, submit_latency, unique, backlog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, default=1_000_000)
+    parser.add_argument('--rates', type=int, nargs='+', default=[10_000, 100_000, 600_000])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--dup-ratio', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    streams = RngStreams(args.seed)
+    rng = streams.generator('bench_alerts')
+
+    check_transitions(ShopSnapshot(generate_fleet(10_000, streams)), rng)
+    observe_cost(ShopSnapshot(generate_fleet(args.shops, streams)), rng)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/alerts"
+
+    print(f"\n吞吐 (每档 {args.seconds:g} 秒, 重复键 {args.dup_ratio:.0%}, 批窗口 0.5 秒):")
+    print(f"{'条/分钟':>10}{'发送端':>8}{'已发送':>10}{'抑制':>9}{'批数':>6}{'submit p99 ms':>15}"
+          f"{'积压':>8}{'端到端 p50':>12}{'p99 ms':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for rate in args.rates:
+            sinks = {
+                'memory': MemorySink(delay=0.02),
+                'file': FileSink(os.path.join(workdir, f"alerts_{rate}.jsonl")),
+                'http': HttpSink(url),
+            }
+            for name, sink in sinks.items():
+                StubHandler.received = 0
+                stats, submit_latency, unique, backlog = throughput(sink, rate, args.seconds, args.dup_ratio, rng)
+                assert stats['sent'] == unique and stats['failed'] == 0, (name, stats, unique)
+                assert stats['sent'] + stats['suppressed'] == stats['received'], stats
+                if name == 'file':
+                    with open(sink.path) as f:
+                        assert sum(1 for _ in f) == unique
+                if name == 'http':
+                    assert StubHandler.received == unique, (StubHandler.received, unique)
+                print(f"{rate:>10,}{name:>8}{stats['sent']:>10,}{stats['suppressed']:>9,}{stats['batches']:>6}"
+                      f"{submit_latency.percentile(99) * 1e3:>15.3f}{backlog:>8,}"
+                      f"{stats['p50_ms']:>12.0f}{stats['p99_ms']:>9.0f}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
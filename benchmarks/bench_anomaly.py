@@ -0,0 +1,180 @@
+"""
+履约指标异常检测 Benchmark: 增量检测器 vs pandas 批量参考实现
+1) 一致性: --check-shops 家店铺 x --days 天 (含 5% 缺失值), 每天的店铺 z / 同组 z / EWMA / 信号位
+   与 pandas rolling / groupby / ewm 的批量结果逐一比对
+2) 标记率: 与看板相同的模拟数据 (25% 店铺春节漂移, 0.5% 店铺注入跳变), 预热 window 天后当天的标记率
+   应约等于注入跳变的比例 (断言 < EXPECTED_FLAG_RATE), 被标记店铺中春节影响的占比不高于全量占比
+3) 后台预热: AnomalyMonitor 构建立即返回 (不挡渲染), 就绪后同一天的刷新不更新,
+   跨过一天时用快照当天值 update 一次, 结果与直接调用 update() 一致
+4) 规模: --sizes 家店铺, 预热 window 天后再测一天的 update() 耗时、常驻状态大小和 tracemalloc 峰值
+
+用法:
+    python benchmarks/bench_anomaly.py --sizes 100000 1000000 --check-shops 2000 --days 40
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from aegis.anomaly import (  # noqa: E402
+    EWMA_L, EWMA_LAMBDA, MAD_SCALE, METRICS, MIN_PERIODS, SCALE, WINDOW_DAYS, Z_THRESHOLD, AnomalyMonitor,
+    FleetAnomalyDetector, peer_groups
+)
+from aegis.datagen import generate_daily_history, generate_shop_frame  # noqa: E402
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+# 两个指标各有 0.5% 店铺注入跳变, 合计约 1%; 春节漂移不应被标记
+EXPECTED_FLAG_RATE = 0.015
+
+
+def make_history(n, days, missing=0.0, seed=42):
+    """返回 (同组编码, {指标: (天, 店铺) 日值})"""
+    rng = np.random.default_rng(seed)
+    regions = rng.integers(0, 4, n)
+    cny = rng.random(n) < 0.25
+    history = {
+        'shipping_delay_rate': generate_daily_history(rng.beta(2, 5, n) * 0.3, cny, days=days, rng=rng),
+        'nrr': generate_daily_history(rng.beta(2, 8, n) * 0.1, np.zeros(n, bool), days=days,
+                                      noise=0.003, jump=(0.02, 0.05), rng=rng),
+    }
+    if missing:
+        for metric, values in history.items():
+            values = values.astype(np.float64)
+            values[rng.random(values.shape) < missing] = np.nan
+            history[metric] = values
+    return peer_groups(regions, cny), history
+
+
+def mad(window):
+    window = window[~np.isnan(window)]
+    return np.median(np.abs(window - np.median(window)))
+
+
+def pandas_reference(values, groups):
+    """批量参考实现: 返回每天的 (店铺 z, 同组 z, EWMA, 控制上限, 信号位), 单位为定点"""
+    x = pd.DataFrame(np.round(values * SCALE))  # 行 = 天, 列 = 店铺
+    rolling = x.shift(1).rolling(WINDOW_DAYS, min_periods=MIN_PERIODS)
+    median = rolling.median()
+    sigma = MAD_SCALE * rolling.apply(mad, raw=True).clip(lower=1)
+    shop_z = (x - median) / sigma
+
+    # 同组 z: 相对自身滚动中位数的偏离, 只在有店铺 z 的店铺之间比较
+    deviation = (x - median).where(shop_z.notna())
+    long = deviation.stack(future_stack=True).rename('x').reset_index()
+    long.columns = ['day', 'shop', 'x']
+    long['group'] = groups[long['shop']]
+    group_median = long.groupby(['day', 'group'])['x'].transform('median')
+    group_mad = (long['x'] - group_median).abs().groupby([long['day'], long['group']]).transform('median')
+    long['z'] = (long['x'] - group_median) / (MAD_SCALE * group_mad.clip(lower=1))
+    group_z = long.pivot(index='day', columns='shop', values='z')
+
+    ewma = x.ewm(alpha=EWMA_LAMBDA, adjust=False, ignore_na=True).mean().where(x.notna())
+    ucl = median + EWMA_L * np.sqrt(EWMA_LAMBDA / (2 - EWMA_LAMBDA)) * sigma
+    shop_hit, group_hit, ewma_hit = shop_z > Z_THRESHOLD, group_z > Z_THRESHOLD, ewma > ucl
+    bits = (shop_hit * 1 + group_hit * 2 + ewma_hit * 4).where(group_hit & (shop_hit | ewma_hit), 0)
+    return shop_z, group_z, ewma, ucl, bits
+
+
+def check(n, days):
+    groups, history = make_history(n, days, missing=0.05)
+    detector = FleetAnomalyDetector(np.arange(n), groups)
+    reports = [detector.update({m: history[m][d] for m in METRICS}) for d in range(days)]
+
+    for i, metric in enumerate(METRICS):
+        shop_z, group_z, ewma, ucl, bits = pandas_reference(history[metric], groups)
+        for d, report in enumerate(reports):
+            scores = report.scores[metric]
+            present = ~np.isnan(history[metric][d])
+            assert np.allclose(scores['shop_z'], shop_z.iloc[d], equal_nan=True, atol=1e-4), (metric, d)
+            assert np.allclose(scores['group_z'], group_z.iloc[d], equal_nan=True, atol=1e-4), (metric, d)
+            assert np.allclose(scores['ewma'][present] * SCALE, ewma.iloc[d][present]), (metric, d)
+            assert np.array_equal((report.flags >> (3 * i)) & 7, bits.iloc[d].to_numpy()), (metric, d)
+    flagged = sum(len(r) for r in reports)
+    print(f"一致性: {n:,} 家 x {days} 天, 两个指标逐日与 pandas 参考实现一致 (累计 {flagged:,} 个店铺日被标记)")
+
+
+def flag_rate(n):
+    """看板模拟数据上当天的标记率: 应接近注入跳变的比例, 且受春节影响的店铺不应被多标"""
+    groups, history = make_history(n, WINDOW_DAYS + 1)
+    detector = FleetAnomalyDetector(np.arange(n), groups)
+    for d in range(WINDOW_DAYS + 1):
+        report = detector.update({m: history[m][d] for m in METRICS})
+    flagged = report.flags != 0
+    cny = (groups & 1).astype(bool)  # peer_groups 编码的最低位
+    per_metric = [(((report.flags >> (3 * i)) & 7) != 0).mean() for i in range(len(METRICS))]
+    rate, cny_share = flagged.mean(), cny[flagged].mean()
+    print(f"标记率: {n:,} 家中标记 {flagged.sum():,} 家 ({rate:.2%}; 各指标 "
+          + ' / '.join(f"{r:.2%}" for r in per_metric)
+          + f", 每个指标注入跳变 0.5%); 被标记店铺中春节影响占 {cny_share:.1%} (全量 {cny.mean():.1%})")
+    assert rate < EXPECTED_FLAG_RATE, rate
+    assert cny_share < cny.mean() + 0.05, cny_share
+
+
+def monitor_check(n):
+    """后台预热与按天更新 (用可控时钟模拟跨天)"""
+    snapshot = ShopSnapshot(generate_shop_frame(n, seed=42))
+    groups, history = make_history(n, WINDOW_DAYS)
+
+    def build():
+        detector = FleetAnomalyDetector(snapshot.column('shop_id'), groups)
+        for d in range(WINDOW_DAYS):
+            detector.update({m: history[m][d] for m in METRICS})
+        return detector
+
+    now = [0.0]
+    start = time.perf_counter()
+    monitor = AnomalyMonitor(build, day_seconds=86400, clock=lambda: now[0])
+    construct_ms = (time.perf_counter() - start) * 1e3
+    assert monitor.report() is None and np.isnan(monitor.week_over_week('shipping_delay_rate'))
+    assert monitor.ready.wait(300), monitor.error
+    warm_s = time.perf_counter() - start
+
+    state = (snapshot, None, None)
+    monitor.observe(state, state)
+    assert monitor.detector.day == WINDOW_DAYS  # 同一天不更新
+    now[0] += 86400
+    monitor.observe(state, state)
+    reference = build()
+    expected = reference.update({m: snapshot.column(m) for m in METRICS})
+    assert monitor.detector.day == WINDOW_DAYS + 1
+    assert np.array_equal(monitor.report().flags, expected.flags)
+    print(f"后台预热: {n:,} 家, 构建返回 {construct_ms:.1f} ms, {warm_s:.1f} s 后就绪; "
+          f"跨天时按快照当天值更新 1 次 (标记 {len(monitor.report()):,} 家), 与直接 update 一致")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--check-shops', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=40)
+    args = parser.parse_args()
+
+    check(args.check_shops, args.days)
+    flag_rate(max(args.sizes[0], 100_000))
+    monitor_check(args.sizes[0])
+
+    print(f"\n{'店铺数':>10}{'单日 update ms':>16}{'常驻状态 MB':>13}{'update 峰值 MB':>16}{'标记店铺':>10}")
+    for n in args.sizes:
+        groups, history = make_history(n, WINDOW_DAYS + 1)
+        detector = FleetAnomalyDetector(np.arange(n), groups)
+        for d in range(WINDOW_DAYS):
+            detector.update({m: history[m][d] for m in METRICS})
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        report = detector.update({m: history[m][WINDOW_DAYS] for m in METRICS})
+        ms = (time.perf_counter() - start) * 1e3
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{n:>10,}{ms:>16,.0f}{detector.nbytes() / 2**20:>13,.1f}{peak / 2**20:>16,.1f}{len(report):>10,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+流式熔断引擎 Benchmark: 合成事件回放
+按 generate_roas_timeseries 的危机窗口形态 (第 15-20 小时 ROAS 跌到 0.7-1.3,
+烧钱速度 2.2-3.5x) 为每个广告计划生成逐秒花费 / 收入事件, 按秒分批回放.
+时间按 --seconds-per-hour 压缩, 便于在单核上快速跑完 24 小时.
+断言迟滞有效: 每个危机计划在危机窗口内最多熔断一次 (不会在同一场危机里反复熔断 / 恢复).
+
+用法:
+    python benchmarks/bench_breaker_replay.py --campaigns 10000 --event-rate 0.5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.breaker import TRIP, StreamingBreaker, is_circuit_breaker  # noqa: E402
+
+CRISIS_START = 15
+CRISIS_END = 20
+
+
+def hourly_shape(rng, campaigns, hours, crisis_share):
+    """与 generate_roas_timeseries 相同的小时级 ROAS / 烧钱速度形态, 每个计划一行"""
+    roas = 2.5 + rng.normal(0, 0.3, (campaigns, hours))
+    velocity = np.ones((campaigns, hours))
+    in_crisis = rng.random(campaigns) < crisis_share
+    span = CRISIS_END - CRISIS_START
+    roas[in_crisis, CRISIS_START:CRISIS_END] = rng.uniform(0.7, 1.3, (in_crisis.sum(), span))
+    velocity[in_crisis, CRISIS_START:CRISIS_END] = rng.uniform(2.2, 3.5, (in_crisis.sum(), span))
+    return roas, velocity, in_crisis
+
+
+def synth_events(rng, roas, velocity, seconds_per_hour, event_rate):
+    """小时级形态 -> 逐秒事件 (按时间排序)"""
+    campaigns, hours = roas.shape
+    chunks = []
+    for h in range(hours):
+        counts = rng.poisson(event_rate * velocity[:, h] * seconds_per_hour)
+        campaign = np.repeat(np.arange(campaigns), counts)
+        ts = h * seconds_per_hour + rng.integers(0, seconds_per_hour, len(campaign))
+        spend = rng.exponential(10.0, len(campaign))
+        revenue = spend * roas[campaign, h] * rng.lognormal(0, 0.2, len(campaign))
+        order = np.argsort(ts, kind='stable')
+        chunks.append((ts[order], campaign[order], spend[order], revenue[order]))
+    return [np.concatenate(cols) for cols in zip(*chunks)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--campaigns', type=int, default=10_000)
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--seconds-per-hour', type=int, default=60)
+    parser.add_argument('--event-rate', type=float, default=0.5, help='每个计划每秒平均事件数 (正常速度)')
+    parser.add_argument('--crisis-share', type=float, default=0.3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    roas, velocity, in_crisis = hourly_shape(rng, args.campaigns, args.hours, args.crisis_share)
+    ts, campaign, spend, revenue = synth_events(rng, roas, velocity, args.seconds_per_hour, args.event_rate)
+    print(f"{len(ts):,} events | {args.campaigns:,} campaigns | "
+          f"{args.hours}h x {args.seconds_per_hour}s/h | 危机计划 {in_crisis.sum():,}")
+
+    sph = args.seconds_per_hour
+    breaker = StreamingBreaker(
+        n_campaigns=args.campaigns,
+        window_buckets=max(sph // 2, 1),
+        baseline_halflife=6 * sph,
+    )
+
+    bounds = np.flatnonzero(np.diff(ts)) + 1
+    starts, ends = np.r_[0, bounds], np.r_[bounds, len(ts)]
+    transitions = []
+    start = time.perf_counter()
+    for lo, hi in zip(starts, ends):
+        out = breaker.ingest(ts[lo:hi], campaign[lo:hi], spend[lo:hi], revenue[lo:hi])
+        if len(out):
+            transitions.append(out)
+    transitions.append(breaker.advance_to(args.hours * sph + 2 * sph))
+    elapsed = time.perf_counter() - start
+    transitions = np.concatenate(transitions)
+
+    trips = transitions[transitions['kind'] == TRIP]
+    trip_hour = trips['ts'] // sph
+    in_window = (trip_hour >= CRISIS_START) & (trip_hour <= CRISIS_END)
+    detected, per_campaign = np.unique(trips['campaign'][in_window], return_counts=True)
+    true_pos = np.isin(detected, np.flatnonzero(in_crisis)).sum()
+    flapping = detected[per_campaign > 1]
+    assert len(flapping) == 0, f"{len(flapping)} 个计划在同一场危机里多次熔断, 如 {flapping[:5].tolist()}"
+
+    static_trips = is_circuit_breaker(roas, velocity).sum()
+    print(f"throughput: {len(ts) / elapsed:,.0f} events/s ({elapsed:.2f} s, 单核)")
+    print(f"transitions: {breaker.trips:,} trips / {breaker.resets:,} resets | "
+          f"危机窗口内熔断计划 {len(detected):,} (命中危机计划 {true_pos:,}/{in_crisis.sum():,}) | "
+          f"窗口外误熔断 {(~in_window).sum():,} | 每个计划危机内最多熔断 {per_campaign.max(initial=0)} 次")
+    print(f"静态小时级规则: {static_trips:,} 个 (计划, 小时) 熔断点")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+冷启动 Benchmark: 全新进程里看板的首屏时间 (核心指标渲染完成) 与各模块导入耗时
+每种数据源模式在全新子进程中用 AppTest 跑一次整页 (--repeat 次取中位数), 从进程启动开始计时:
+streamlit 导入 / app 模块导入 (到脚本开始计时) / 数据加载 / 首屏 (核心指标) / 整页首跑,
+并记录首屏时 Faker / plotly.express / requests 是否已被导入;
+另用 python -X importtime 统计首跑过程中的导入耗时, 按顶层包 (aegis 按子模块) 汇总自身耗时
+
+用法:
+    python benchmarks/bench_cold_start.py --shops 100 --repeat 3 --top 15
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+T0 = time.perf_counter()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ['faker', 'plotly.express', 'requests']  # plotly.graph_objects 由 streamlit 自身导入, 不计
+FIRST_PAINT = '核心指标'  # 页头 KPI 卡片渲染完成的区块
+
+
+def child():
+    """在本进程里跑一次整页, 打印各阶段相对进程启动的毫秒数 (JSON)"""
+    from streamlit.testing.v1 import AppTest
+    imported = time.perf_counter()
+
+    from aegis.timing import RenderTimer
+
+    marks = {}
+    start, lap = RenderTimer.start, RenderTimer.lap
+
+    def timed_start(self):
+        marks.setdefault('script', time.perf_counter())
+        return start(self)
+
+    def timed_lap(self, name):
+        marks.setdefault(name, time.perf_counter())
+        if name == FIRST_PAINT:
+            marks['heavy'] = [m for m in HEAVY_MODULES if m in sys.modules]
+        return lap(self, name)
+
+    RenderTimer.start, RenderTimer.lap = timed_start, timed_lap
+
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=600).run()
+    done = time.perf_counter()
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+
+    ms = lambda t: (t - T0) * 1e3  # noqa: E731
+    print(json.dumps({
+        'streamlit': ms(imported),
+        'app_imports': (marks['script'] - imported) * 1e3,
+        'data': (marks['数据加载'] - marks['页头']) * 1e3,
+        'first_paint': ms(marks[FIRST_PAINT]),
+        'full_run': ms(done),
+        'heavy': marks['heavy'],
+    }))
+
+
+def run_child(env, importtime=False):
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [os.path.abspath(__file__), '--child']
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def import_table(stderr, top):
+    """-X importtime 输出 -> [(包, 自身耗时合计 ms, 模块数)], 按耗时降序; 累计耗时会把依赖算到先导入它的模块头上, 这里不用"""
+    totals = Counter()
+    counts = Counter()
+    for line in stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+\d+ \| *(\S+)', line)
+        if m:
+            name = m[2]
+            package = name if name.startswith('aegis.') else name.split('.')[0]
+            totals[package] += int(m[1]) / 1e3
+            counts[package] += 1
+    return [(package, ms, counts[package]) for package, ms in totals.most_common(top)]
+
+
+def file_source_env(env, workdir, shops):
+    """非模拟数据源: 先把店铺 / ROAS 写成 Parquet, 看板从文件加载 (不应导入 Faker)"""
+    from aegis.datagen import generate_fleet, generate_roas_hours
+    from aegis.rng import RngStreams
+    from aegis.storage import write_roas_frame, write_shop_frame
+    import pandas as pd
+
+    streams = RngStreams()
+    shop_path, roas_path = os.path.join(workdir, 'shops.parquet'), os.path.join(workdir, 'roas.parquet')
+    write_shop_frame(generate_fleet(shops, streams), shop_path)
+    hours = 30 * 24
+    write_roas_frame(generate_roas_hours(pd.Timestamp.now().floor('h') - pd.Timedelta(hours=hours - 1), hours,
+                                         streams.generator('roas')), roas_path)
+    return dict(env, AEGIS_SHOP_SOURCE=shop_path, AEGIS_ROAS_SOURCE=roas_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child()
+
+    base = dict(os.environ, AEGIS_FLEET_SIZE=str(args.shops))
+    base.pop('AEGIS_SHOP_SOURCE', None)
+    base.pop('AEGIS_ROAS_SOURCE', None)
+    with tempfile.TemporaryDirectory() as workdir:
+        modes = {'模拟数据': base, '文件数据源': file_source_env(base, workdir, args.shops)}
+
+        print(f"{'模式':<8}{'streamlit':>11}{'app 导入':>10}{'数据加载':>10}{'首屏':>9}{'整页首跑':>10}  首屏前已导入")
+        stderr = {}
+        for mode, env in modes.items():
+            runs = [run_child(env)[0] for _ in range(args.repeat)]
+            med = {key: statistics.median(r[key] for r in runs) for key in
+                   ('streamlit', 'app_imports', 'data', 'first_paint', 'full_run')}
+            heavy = ', '.join(runs[0]['heavy']) or '无'
+            print(f"{mode:<8}{med['streamlit']:>11.0f}{med['app_imports']:>10.0f}{med['data']:>10.0f}"
+                  f"{med['first_paint']:>9.0f}{med['full_run']:>10.0f}  {heavy}")
+            _, stderr[mode] = run_child(env, importtime=True)
+        print("(毫秒, 从进程启动起算; 首屏 = 核心指标区块渲染完成)")
+
+        for mode, text in stderr.items():
+            print(f"\n{mode}: 整页首跑期间导入耗时 Top {args.top} (按包汇总自身耗时)")
+            for package, ms, n_modules in import_table(text, args.top):
+                print(f"  {package:<24}{ms:>9.1f} ms{n_modules:>6} 个模块")
+
+
+if __name__ == '__main__':
+    main()
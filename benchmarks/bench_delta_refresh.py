@@ -0,0 +1,91 @@
+"""
+增量刷新 Benchmark: 全量重建 (生成器 + ShopSnapshot + 预热) vs 按 shop_id upsert 变更行
+每档报告: 全量重建耗时, 一次 refresh_once (upsert + 预热索引/KPI + 发布) 耗时,
+变更行向物流拥堵目标回归 (delay_target=LogisticsNetwork.delay_rate_target) 时的 refresh_once 耗时,
+以及刷新期间另一线程调用 current() 的最大等待 (读者不应被阻塞)
+
+用法:
+    python benchmarks/bench_delta_refresh.py --sizes 100000 1000000 --change 0.01
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+from aegis.datagen import generate_shop_frame  # noqa: E402
+from aegis.logistics import LogisticsNetwork, generate_hubs, simulate_shipments  # noqa: E402
+from aegis.refresh import SimulatedDeltaSource, SnapshotRefresher  # noqa: E402
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+
+def full_rebuild(n):
+    snapshot = ShopSnapshot(generate_shop_frame(n, seed=42))
+    snapshot.index
+    snapshot.kpis
+    return snapshot
+
+
+def reader_latency(refresher, stop):
+    """读线程: 持续取当前版本, 返回单次 current() 的最大耗时 (ms)"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        snapshot, _, _ = refresher.current()
+        snapshot.n_shops
+        worst = max(worst, time.perf_counter() - start)
+        time.sleep(0.0005)
+    return worst * 1e3
+
+
+def median_refresh_ms(refresher, rounds):
+    timings = []
+    for _ in range(rounds):
+        changed = refresher.refresh_once()
+        timings.append(refresher.last_duration * 1e3)
+    return sorted(timings)[len(timings) // 2], changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--change', type=float, default=0.01, help='每次刷新变更的店铺比例')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    hubs = generate_hubs(2000)
+    network = LogisticsNetwork(hubs)
+    network.ingest_shipments(*simulate_shipments(hubs, 200_000))
+
+    print(f"{'店铺数':>10}{'变更行':>9}{'全量重建 ms':>13}{'增量刷新 ms':>13}{'加速':>8}{'含延迟目标 ms':>15}"
+          f"{'读者最大等待 ms':>17}")
+    for n in args.sizes:
+        start = time.perf_counter()
+        snapshot = full_rebuild(n)
+        rebuild_ms = (time.perf_counter() - start) * 1e3
+
+        roas_df = pd.DataFrame(columns=['timestamp', 'roas', 'spend_velocity', 'is_circuit_breaker'])
+        refresher = SnapshotRefresher(snapshot, roas_df, SimulatedDeltaSource(args.change))
+
+        result = {}
+        stop = threading.Event()
+        reader = threading.Thread(target=lambda: result.setdefault('worst', reader_latency(refresher, stop)))
+        reader.start()
+        refresh_ms, changed = median_refresh_ms(refresher, args.rounds)
+        stop.set()
+        reader.join()
+
+        targeted = SnapshotRefresher(snapshot, roas_df,
+                                     SimulatedDeltaSource(args.change, delay_target=network.delay_rate_target))
+        target_ms, _ = median_refresh_ms(targeted, args.rounds)
+        print(f"{n:>10,}{changed:>9,}{rebuild_ms:>13,.0f}{refresh_ms:>13,.0f}"
+              f"{rebuild_ms / refresh_ms:>7.1f}x{target_ms:>15,.0f}{result['worst']:>17.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+图表降采样 Benchmark: 百万级点的 LTTB / min-max / 密度散点耗时与保真度
+- ROAS: 分钟级多周时序降到 --points 点, 报告耗时与最低 ROAS 是否保留
+- 散点: --shops 家店铺降到 --points 点 (P0 店铺不占预算), 断言 P0 店铺全部单独保留、其余点数不超预算;
+  再把 P0 逐点上限 (keep_max) 调到 P0 店铺数以下, 断言 P0 全部计入单独的 P0 密度层
+
+用法:
+    python benchmarks/bench_downsample.py --series 5000000 --shops 1000000 --points 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.datagen import generate_shop_frame  # noqa: E402
+from aegis.downsample import density_sample, lttb, minmax_buckets  # noqa: E402
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--series', type=int, default=5_000_000, help='ROAS 时序点数 (分钟级)')
+    parser.add_argument('--shops', type=int, default=1_000_000)
+    parser.add_argument('--points', type=int, default=2000, help='点数预算')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    ts = np.arange(args.series, dtype=np.int64) * 60_000_000_000
+    roas = 2.5 + np.cumsum(rng.normal(0, 0.01, args.series))
+    dip = rng.integers(0, args.series)
+    roas[dip] = roas.min() - 1.0  # 单分钟熔断低谷
+
+    print(f"ROAS 时序 {args.series:,} 点 -> {args.points:,} 点")
+    for name, fn in (('lttb', lambda: lttb(ts, roas, args.points)),
+                     ('minmax', lambda: minmax_buckets(roas, args.points))):
+        rows, ms = timed(fn)
+        print(f"  {name:<8}{ms:>9,.1f} ms | 保留 {len(rows):,} 点 | 最低点保留: {dip in set(rows.tolist())}")
+
+    snapshot = ShopSnapshot(generate_shop_frame(args.shops, seed=42))
+    orders = snapshot.column('daily_orders')
+    sps = snapshot.column('sps_score')
+    critical = snapshot.flag('is_critical')
+    n_critical = int(critical.sum())
+    (rows, grid, critical_grid), ms = timed(
+        lambda: density_sample(orders, sps, keep=critical, budget=args.points, log_x=True))
+    kept_critical = int(critical[rows].sum())
+    print(f"\n散点 {args.shops:,} 家 -> 单独绘制 {len(rows):,} 家 + {len(grid[2]):,} 个密度格子: {ms:,.1f} ms")
+    print(f"  P0 店铺保留 {kept_critical:,} / {n_critical:,}, 其余 {len(rows) - kept_critical:,} 家 (预算 {args.points:,})")
+    assert critical_grid is None and kept_critical == n_critical, (kept_critical, n_critical)
+    assert len(rows) - kept_critical <= args.points, len(rows)
+    again, _, _ = density_sample(orders, sps, keep=critical, budget=args.points, log_x=True)
+    print(f"  同一种子结果一致: {np.array_equal(rows, again)}")
+
+    keep_max = max(n_critical // 2, 1)
+    rows, _, critical_grid = density_sample(orders, sps, keep=critical, budget=args.points, log_x=True,
+                                            keep_max=keep_max)
+    assert critical_grid is not None and critical_grid[2].sum() == n_critical, critical_grid
+    assert not critical[rows].any() and len(rows) <= args.points, len(rows)
+    print(f"  P0 逐点上限 {keep_max:,} < {n_critical:,} 家: P0 密度层 {len(critical_grid[2]):,} 个格子共 "
+          f"{int(critical_grid[2].sum()):,} 家, 单独绘制 {len(rows):,} 家离群 / 补足")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+图表缓存 Benchmark: 每张图发给浏览器的字节数 (优化前 vs 优化后) 以及构建 / 缓存命中耗时
+优化前 = 每次重跑 px.histogram(shop_df) 整列原始分数; 优化后 = np.histogram 分箱 + 按快照版本缓存序列化好的 JSON;
+字节数即缓存的 JSON 大小; 另列出命中后经公开接口渲染 (plotly_chart: 从 JSON 还原 Figure + st.plotly_chart,
+bare 模式下调用) 的耗时, 即每次重跑每张图仍要付出的成本
+
+用法:
+    python benchmarks/bench_figure_cache.py --shops 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.breaker import is_circuit_breaker  # noqa: E402
+from aegis.datagen import generate_shop_frame  # noqa: E402
+from aegis.figures import (  # noqa: E402
+    FigureCache, build_port_map, build_roas_chart, build_sps_gauge, build_sps_histogram,
+    build_sps_scatter, figure_bytes, frame_version, plotly_chart
+)
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+
+def legacy_histogram(shop_df):
+    """原 tab 4 的 px.histogram (对照组)"""
+    return px.histogram(shop_df, x='sps_score', nbins=20, title='SPS 分数分布',
+                        color_discrete_sequence=['#10A37F'])
+
+
+def roas_frame():
+    roas = 2.5 + np.random.default_rng(0).normal(0, 0.3, 24)
+    velocity = np.ones(24)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2026-02-17', periods=24, freq='h'),
+        'roas': roas,
+        'spend_velocity': velocity,
+        'is_circuit_breaker': is_circuit_breaker(roas, velocity),
+    })
+
+
+def quiet_streamlit():
+    """bare 模式 (不在 streamlit run 里) 调用 st.* 时每次都会警告缺少 ScriptRunContext; 须在首次调用加载配置之后设置"""
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    snapshot = ShopSnapshot(generate_shop_frame(args.shops, seed=42))
+    avg_sps = snapshot.kpis.total().avg_sps
+    roas_df = roas_frame()
+
+    fig, legacy_ms = timed(lambda: legacy_histogram(snapshot.frame))
+    print(f"{args.shops:,} 家店铺")
+    print(f"优化前 px.histogram: {figure_bytes(fig) / 1024:>10,.1f} KB | 每次重跑构建 {legacy_ms:,.1f} ms")
+
+    cache = FigureCache()
+    builders = {
+        'gauge': (round(avg_sps, 4), lambda: build_sps_gauge(avg_sps)),
+        'port_map': ('static', build_port_map),
+        'roas': (frame_version(roas_df), lambda: build_roas_chart(roas_df)),
+        'sps_histogram': ((snapshot.version, 20),
+                          lambda: build_sps_histogram(snapshot.column('sps_score'), avg_sps, bins=20)),
+        'sps_scatter': ((snapshot.version, 2000), lambda: build_sps_scatter(snapshot, budget=2000)),
+    }
+
+    print(f"\n{'figure':<14}{'字节 (KB)':>12}{'首次构建 ms':>14}{'缓存命中 ms':>14}{'命中后渲染 ms':>16}")
+    total_render = 0.0
+    for name, (key, build) in builders.items():
+        _, build_ms = timed(lambda: cache.get(name, key, build))
+        spec, hit_ms = timed(lambda: cache.get(name, key, build))
+        assert cache.sizes[name] == len(spec.json.encode()) == figure_bytes(build())
+        plotly_chart(spec)  # 预热 streamlit 的导入 (导入后 plotly 默认模板会变, 所以先比对字节数)
+        quiet_streamlit()
+        _, render_ms = timed(lambda: plotly_chart(spec))
+        total_render += render_ms
+        print(f"{name:<14}{cache.sizes[name] / 1024:>12,.1f}{build_ms:>14,.1f}{hit_ms:>14,.3f}{render_ms:>16,.1f}")
+    print(f"\n每次重跑 {len(builders)} 张图经公开接口渲染合计 {total_render:,.1f} ms")
+    print(f"\n缓存: {cache.stats()['hits']} 命中 / {cache.stats()['misses']} 未命中")
+
+
+if __name__ == '__main__':
+    main()
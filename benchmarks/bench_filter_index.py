@@ -0,0 +1,85 @@
+"""
+SPS 监控页筛选 Benchmark: pandas 掩码 + sort_values vs 预计算位图 + 预排序置换
+
+用法:
+    python benchmarks/bench_filter_index.py --shops 1000000
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.datagen import generate_shop_frame  # noqa: E402
+from aegis.schema import REGIONS, to_legacy_layout  # noqa: E402
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+FILTER_MODES = {'全部店铺': None, '仅 P0 Critical': 'critical', '仅警戒区': 'warning', '受春节影响': 'cny'}
+SORT_MODES = {'SPS 升序': 'sps_asc', 'SPS 降序': 'sps_desc', '订单量': 'orders_desc'}
+LEGACY_FLAG = {'critical': 'is_critical', 'warning': 'is_warning', 'cny': 'affected_by_cny'}
+LEGACY_SORT = {
+    'sps_asc': ('sps_score', True),
+    'sps_desc': ('sps_score', False),
+    'orders_desc': ('daily_orders', False),
+}
+
+
+def legacy_filter(shop_df, status, region, order, top_n):
+    """原 tab 4 逻辑: copy + 布尔掩码 + 全量 sort_values + head"""
+    filtered_df = shop_df.copy()
+    if status is not None:
+        filtered_df = filtered_df[filtered_df[LEGACY_FLAG[status]]]
+    if region is not None:
+        filtered_df = filtered_df[filtered_df['region'] == region]
+    column, ascending = LEGACY_SORT[order]
+    filtered_df = filtered_df.sort_values(column, ascending=ascending)
+    return filtered_df.head(top_n), len(filtered_df)
+
+
+def indexed_filter(index, status, region, order, top_n):
+    selection = index.select(status, region)
+    return index.top(selection, order, top_n), selection.count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, default=1_000_000)
+    parser.add_argument('--top-n', type=int, default=500)
+    args = parser.parse_args()
+
+    frame = generate_shop_frame(args.shops)
+    legacy_df = to_legacy_layout(frame)
+    snapshot = ShopSnapshot(frame)
+
+    start = time.perf_counter()
+    index = snapshot.index
+    print(f"{args.shops:,} shops, index build: {(time.perf_counter() - start) * 1000:.0f} ms (每个快照一次)")
+
+    legacy_ms, indexed_ms = [], []
+    combos = itertools.product(FILTER_MODES.values(), [None] + REGIONS, SORT_MODES.values())
+    for status, region, order in combos:
+        start = time.perf_counter()
+        legacy_top, legacy_count = legacy_filter(legacy_df, status, region, order, args.top_n)
+        legacy_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        rows, count = indexed_filter(index, status, region, order, args.top_n)
+        indexed_ms.append((time.perf_counter() - start) * 1000)
+
+        column = LEGACY_SORT[order][0]
+        assert count == legacy_count, (status, region, order)
+        assert np.allclose(legacy_top[column].to_numpy(), snapshot.column(column)[rows]), (status, region, order)
+
+    for name, samples in [('pandas mask + sort', legacy_ms), ('bitmap + presorted', indexed_ms)]:
+        samples = np.array(samples)
+        print(f"{name:>20}: p50={np.percentile(samples, 50):7.1f} ms  "
+              f"p95={np.percentile(samples, 95):7.1f} ms  max={samples.max():7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+页面分段渲染耗时 Benchmark: 整页首跑各区块耗时, 以及 Tab 4 筛选变化时 SPS 监控 fragment 的服务端耗时
+(线上 fragment 内控件交互只重跑该 fragment; AppTest 会重跑整页, 这里只读取 fragment 自己那一段的计时)
+
+用法:
+    python benchmarks/bench_fragment_rerun.py --shops 100000 --target-ms 100
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FILTERS = ['仅 P0 Critical', '仅警戒区', '受春节影响', '全部店铺']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=3, help='筛选模式轮换次数')
+    parser.add_argument('--target-ms', type=float, default=100)
+    args = parser.parse_args()
+
+    os.environ['AEGIS_FLEET_SIZE'] = str(args.shops)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=300).run()
+    if at.exception:
+        raise SystemExit(at.exception[0].value)
+    timer = at.session_state['render_timer']
+    print(f"{args.shops:,} 家店铺, 整页首跑:")
+    print(timer.report().to_string(index=False))
+
+    costs = []
+    for _ in range(args.rounds):
+        for mode in FILTERS:
+            at.selectbox[0].select(mode).run()
+            costs.append(at.session_state['render_timer'].last('SPS 监控'))
+
+    p50 = statistics.median(costs)
+    print(f"\nTab 4 筛选变化 x{len(costs)}: SPS 监控 fragment p50 {p50:.1f} ms / max {max(costs):.1f} ms "
+          f"(目标 < {args.target_ms:.0f} ms: {'✅' if p50 < args.target_ms else '❌'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+KPI 聚合器 Benchmark + 一致性校验
+1) 全量与各筛选组合: 聚合器结果 vs pandas 逐行重算
+2) 随机单店铺更新: O(1) 增量 vs 全量重扫, 更新后再次校验
+
+用法:
+    python benchmarks/bench_kpi.py --shops 1000000 --updates 10000
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.datagen import generate_shop_frame  # noqa: E402
+from aegis.kpi import KpiAggregator, shop_record  # noqa: E402
+from aegis.schema import REGIONS, enforce_shop_schema, pack_flags, to_legacy_layout  # noqa: E402
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+STATUS_COLUMNS = {'critical': 'is_critical', 'warning': 'is_warning', 'cny': 'affected_by_cny'}
+
+
+def pandas_kpis(df, status=None, region=None):
+    """原 app.py 的 pandas 归约 (旧版 float64 布局)"""
+    if status is not None:
+        df = df[df[STATUS_COLUMNS[status]]]
+    if region is not None:
+        df = df[df['region'] == region]
+    return {
+        'count': len(df),
+        'critical': int(df['is_critical'].sum()),
+        'warning': int(df['is_warning'].sum()),
+        'promo_eligible': int(df['smart_promo_eligible'].sum()),
+        'promo_ready': df[df['sps_score'] >= 3.6].shape[0],
+        'total_orders': int(df['daily_orders'].sum()),
+        'avg_sps': df['sps_score'].mean(),
+        'avg_delay_rate': df['shipping_delay_rate'].mean(),
+    }
+
+
+def check(agg, legacy_df):
+    for status, region in itertools.product([None, 'critical', 'warning', 'cny'], [None] + REGIONS):
+        expected = pandas_kpis(legacy_df, status, region)
+        got = agg.query(status, region)
+        for key, value in expected.items():
+            actual = getattr(got, key)
+            if isinstance(value, float):
+                same = (np.isnan(value) and np.isnan(actual)) or abs(value - actual) < 1e-9
+            else:
+                same = value == actual
+            assert same, (status, region, key, value, actual)
+
+
+def random_update(rng, record):
+    """模拟一次店铺指标变化 (SPS 波动可能导致档位切换)"""
+    sps = float(np.clip(round(record['sps_score'] + rng.normal(0, 0.3), 2), 2.0, 5.0))
+    new = dict(record)
+    new['sps_score'] = sps
+    new['daily_orders'] = int(rng.lognormal(4, 1.5))
+    new['shipping_delay_rate'] = round(float(rng.beta(2, 5) * 0.3), 3)
+    new['flags'] = int(pack_flags([sps < 3.5], [3.5 <= sps < 3.6], [sps >= 3.5],
+                                  [record['flags'] & 8 != 0])[0])
+    return new
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, default=1_000_000)
+    parser.add_argument('--updates', type=int, default=10_000)
+    args = parser.parse_args()
+
+    snapshot = ShopSnapshot(generate_shop_frame(args.shops))
+    legacy_df = to_legacy_layout(snapshot.frame)
+
+    start = time.perf_counter()
+    agg = KpiAggregator.from_snapshot(snapshot)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    pandas_kpis(legacy_df)
+    rescan_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    agg.total()
+    agg.query('critical', 'UK')
+    query_us = (time.perf_counter() - start) * 1e6 / 2
+
+    check(agg, legacy_df)
+    print(f"{args.shops:,} shops: build {build_ms:.0f} ms | pandas full rescan {rescan_ms:.0f} ms | "
+          f"query {query_us:.0f} us | 初始一致性校验通过")
+
+    rng = np.random.default_rng(7)
+    rows = rng.integers(0, args.shops, args.updates)
+    frame = snapshot.frame.copy()
+    records = {}
+    apply_s = 0.0
+    for row in rows:
+        old = records.get(row) or shop_record(snapshot, row)
+        new = random_update(rng, old)
+        start = time.perf_counter()
+        agg.apply(old, new)
+        apply_s += time.perf_counter() - start
+        records[row] = new
+    delta_us = apply_s * 1e6 / args.updates
+
+    for row, rec in records.items():
+        for column in ('sps_score', 'daily_orders', 'shipping_delay_rate', 'flags'):
+            frame.loc[row, column] = rec[column]
+    check(agg, to_legacy_layout(enforce_shop_schema(frame)))
+    print(f"{args.updates:,} 次单店铺更新: {delta_us:.1f} us/次 | 更新后一致性校验通过")
+
+
+if __name__ == '__main__':
+    main()
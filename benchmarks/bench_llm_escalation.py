@@ -0,0 +1,128 @@
+"""
+LLM 升级通道 Benchmark: 本地桩服务器 (模拟 DeepSeek chat/completions)
+统计端到端 p50 / p99 延迟、缓存命中率、合并请求数, 以及桩服务器实际收到的调用数和峰值并发
+
+用法:
+    python benchmarks/bench_llm_escalation.py --requests 5000 --unique 800 --latency-ms 80
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.escalation import DeepSeekClient, EscalationTier  # noqa: E402
+
+
+class StubDeepSeek(BaseHTTPRequestHandler):
+    """按固定延迟返回 OpenAI 兼容响应, 记录调用数与峰值并发"""
+
+    latency = 0.08
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    calls = 0
+    reviews = 0
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.calls += 1
+        try:
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            reviews = json.loads(body['messages'][-1]['content'])
+            with cls.lock:
+                cls.reviews += len(reviews)
+            time.sleep(cls.latency)
+            results = [{
+                'category': 'service' if 'service' in r or '客服' in r else 'quality',
+                'confidence': 0.8,
+                'reason': 'stub',
+            } for r in reviews]
+            payload = json.dumps({'choices': [{'message': {'content': json.dumps({'results': results})}}]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+async def run_workload(tier, texts, arrivals_per_wave, wave_gap):
+    tasks = []
+    for start in range(0, len(texts), arrivals_per_wave):
+        wave = texts[start:start + arrivals_per_wave]
+        tasks.extend(asyncio.create_task(tier.classify(t)) for t in wave)
+        await asyncio.sleep(wave_gap)
+    return await asyncio.gather(*tasks)
+
+
+async def main_async(args):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubDeepSeek)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/chat/completions'
+
+    rng = np.random.default_rng(42)
+    vocabulary = [f"Customer service not responding #{i}" if i % 2 else f"客服一直不回复 {i}"
+                  for i in range(args.unique)]
+    # Zipf 分布: 少量评论被大量复制
+    picks = np.minimum(rng.zipf(1.3, args.requests) - 1, args.unique - 1)
+    texts = [vocabulary[i] + ('  ' if rng.random() < 0.3 else '') for i in picks]
+
+    tier = EscalationTier(
+        client=DeepSeekClient(api_key='stub', url=url, pool_size=args.concurrency),
+        max_concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        batch_window=args.batch_window_ms / 1000,
+    )
+    StubDeepSeek.latency = args.latency_ms / 1000
+
+    start = time.perf_counter()
+    results = await run_workload(tier, texts, args.wave, args.wave_gap_ms / 1000)
+    elapsed = time.perf_counter() - start
+    stats = tier.stats()
+    await tier.close()
+    server.shutdown()
+
+    assert len(results) == len(texts)
+    print(f"{len(texts):,} requests ({args.unique:,} unique) in {elapsed:.2f} s "
+          f"= {len(texts) / elapsed:,.0f} req/s")
+    print(f"端到端延迟: p50={stats['p50_ms']:.1f} ms  p99={stats['p99_ms']:.1f} ms")
+    print(f"LLM 调用延迟: p50={stats['call_p50_ms']:.1f} ms  p99={stats['call_p99_ms']:.1f} ms")
+    print(f"缓存命中率: {stats['cache_hit_rate'] * 100:.1f}% | 合并在途请求: {stats['coalesced']:,} | "
+          f"失败: {stats['failures']}")
+    print(f"桩服务器: {StubDeepSeek.calls:,} 次调用 / {StubDeepSeek.reviews:,} 条评论 | "
+          f"峰值并发 {StubDeepSeek.peak} (上限 {args.concurrency})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=5_000)
+    parser.add_argument('--unique', type=int, default=800)
+    parser.add_argument('--latency-ms', type=float, default=80)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--batch-window-ms', type=float, default=20)
+    parser.add_argument('--wave', type=int, default=250, help='每批到达的请求数')
+    parser.add_argument('--wave-gap-ms', type=float, default=50)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
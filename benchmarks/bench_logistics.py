@@ -0,0 +1,99 @@
+"""
+物流网络 Benchmark: 网格索引最近站点查询 / 发货事件归集 / 地图预聚合 / 店铺拥堵暴露度
+1) 一致性: 抽样查询 (站点附近 + 区域内随机 + 全球随机) 与全量扫描比对最近站点和距离;
+   另在 180° 经线两侧放稀疏站点, 查询会落到各级粗网格 (含不整除 360 的窄列), 同样与全量扫描比对
+2) 规模: --hubs 个站点, --events 个发货事件归集到最近站点的耗时, 各粒度地图点数与聚合耗时,
+   --shops 家店铺关联站点并算暴露度的耗时
+
+用法:
+    python benchmarks/bench_logistics.py --hubs 2000 10000 --events 1000000 --shops 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from aegis.datagen import generate_shop_frame  # noqa: E402
+from aegis.logistics import (  # noqa: E402
+    MAP_LEVELS, REGION_CENTERS, GridIndex, LogisticsNetwork, generate_hubs, haversine_km, simulate_shipments
+)
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+
+def check(network, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    hubs = network.hubs
+    near = rng.choice(len(hubs), samples)
+    centers = np.array(list(REGION_CENTERS.values()))[rng.integers(0, len(REGION_CENTERS), samples)]
+    lat = np.concatenate([hubs['lat'].to_numpy()[near] + rng.normal(0, 0.1, samples),
+                          centers[:, 0] + rng.normal(0, 5, samples),
+                          rng.uniform(-80, 80, samples)])
+    lon = np.concatenate([hubs['lon'].to_numpy()[near] + rng.normal(0, 0.1, samples),
+                          centers[:, 1] + rng.normal(0, 10, samples),
+                          rng.uniform(-180, 180, samples)])
+
+    brute_force_check(network.index, lat, lon)
+    print(f"一致性: {len(lat):,} 个查询 (站点附近 / 区域内 / 全球各 {samples:,}) 与全量扫描一致")
+
+    # 180° 经线: 16° 一级的网格最后一列只有 8° 宽; 先查曾经返回错误站点的用例, 再查两侧随机的稀疏站点
+    brute_force_check(GridIndex([17, 8], [-179.9, 171.99]), np.array([8.0]), np.array([-179.9]))
+    hub_lat = rng.uniform(-60, 60, 6)
+    hub_lon = rng.choice([-1, 1], 6) * rng.uniform(165, 180, 6)
+    lat = rng.uniform(-60, 60, samples)
+    lon = rng.choice([-1, 1], samples) * rng.uniform(160, 180, samples)
+    brute_force_check(GridIndex(hub_lat, hub_lon), lat, lon)
+    print(f"一致性: 180° 经线两侧 {len(hub_lat)} 个站点, {len(lat):,} 个查询与全量扫描一致")
+
+
+def brute_force_check(index, lat, lon):
+    best, dist = index.nearest(lat, lon)
+    for i in range(len(lat)):
+        d = haversine_km(lat[i], lon[i], index.lat, index.lon)
+        assert np.isclose(dist[i], d.min()), (lat[i], lon[i])
+        assert np.isclose(d[best[i]], d.min()), (lat[i], lon[i])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hubs', type=int, nargs='+', default=[2000, 10000])
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--shops', type=int, default=1_000_000)
+    parser.add_argument('--check', type=int, default=1000)
+    args = parser.parse_args()
+
+    snapshot = ShopSnapshot(generate_shop_frame(args.shops, seed=42))
+    check(LogisticsNetwork(generate_hubs(args.hubs[0])), args.check)
+
+    levels = ''.join(f"{level + ' 点数':>10}" for level in MAP_LEVELS)
+    print(f"\n{'站点数':>8}{'建索引 ms':>11}{'事件归集 ms':>13}{'地图聚合 ms':>13}{levels}{'店铺关联 ms':>13}")
+    for n_hubs in args.hubs:
+        hubs = generate_hubs(n_hubs)
+        events = simulate_shipments(hubs, args.events)
+
+        start = time.perf_counter()
+        network = LogisticsNetwork(hubs)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        network.ingest_shipments(*events)
+        ingest_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        points = [len(network.map_points(level)) for level in MAP_LEVELS]
+        map_ms = (time.perf_counter() - start) * 1e3 / len(MAP_LEVELS)
+
+        start = time.perf_counter()
+        network.shop_exposure(snapshot)
+        shop_ms = (time.perf_counter() - start) * 1e3
+
+        counts = ''.join(f"{p:>12,}" for p in points)
+        print(f"{n_hubs:>10,}{build_ms:>11.0f}{ingest_ms:>13.0f}{map_ms:>13.1f}{counts}{shop_ms:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
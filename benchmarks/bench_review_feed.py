@@ -0,0 +1,78 @@
+"""
+实时差评流 Benchmark: 环形缓冲追加 / 读取耗时, 以及持续写入下的内存占用
+1) 单条 append 与批量 extend 的吞吐 (条/秒)
+2) latest(n) 读取耗时
+3) 后台生产者按 --rate 条/秒持续写入 --seconds 秒, 前后 tracemalloc 内存应基本不变
+
+用法:
+    python benchmarks/bench_review_feed.py --capacity 1024 --rate 1000 --seconds 5
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.feed import SAMPLE_REVIEWS, ReviewFeed, ReviewProducer, synthetic_reviews  # noqa: E402
+
+
+def bench_append(capacity, n):
+    feed = ReviewFeed(capacity)
+    text = SAMPLE_REVIEWS[0]
+    start = time.perf_counter()
+    for i in range(n):
+        feed.append(i, i % 100 + 1, text, 'logistics')
+    append_rate = n / (time.perf_counter() - start)
+
+    batch = 100
+    shop_ids = list(range(1, batch + 1))
+    texts = [text] * batch
+    categories = ['logistics'] * batch
+    start = time.perf_counter()
+    for i in range(n // batch):
+        feed.extend(i, shop_ids, texts, categories)
+    extend_rate = n / (time.perf_counter() - start)
+    return feed, append_rate, extend_rate
+
+
+def bench_latest(feed, n, repeats=200):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        feed.latest(n)
+    return (time.perf_counter() - start) / repeats * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--capacity', type=int, default=1024)
+    parser.add_argument('--events', type=int, default=200_000)
+    parser.add_argument('--rate', type=float, default=1000, help='生产者写入速率 (条/秒)')
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    feed, append_rate, extend_rate = bench_append(args.capacity, args.events)
+    print(f"append: {append_rate:>12,.0f} 条/s")
+    print(f"extend: {extend_rate:>12,.0f} 条/s (每批 100 条)")
+    for n in (4, 20, 100):
+        print(f"latest({n:>3}): {bench_latest(feed, n):.3f} ms")
+
+    feed = ReviewFeed(args.capacity)
+    producer = ReviewProducer(feed, rate=args.rate, source=synthetic_reviews())
+    tracemalloc.start()
+    producer.start()
+    time.sleep(min(1.0, args.seconds))  # 先填满缓冲
+    warm, _ = tracemalloc.get_traced_memory()
+    time.sleep(max(args.seconds - 1.0, 0))
+    producer.stop()
+    done, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"\n生产者 {args.rate:,.0f} 条/s x {args.seconds:.0f}s: 写入 {feed.total:,} 条, 缓冲 {len(feed):,} 条")
+    print(f"内存: 填满后 {warm / 1024:,.1f} KB -> 结束 {done / 1024:,.1f} KB (峰值 {peak / 1024:,.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()
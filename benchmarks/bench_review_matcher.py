@@ -0,0 +1,145 @@
+"""
+差评分类吞吐 Benchmark: 逐关键词 any() 子串扫描 vs 各匹配器后端 (逐个子串 scan / Aho-Corasick / trie 正则)
+分别在当前关键词表 (17 个) 和扩充到数百个中英文关键词时测 reviews/s, 并校验分类结果一致;
+另按词表大小扫描各后端吞吐, 给出 scan 与编译后端的交叉点 (对应 aegis.reviews.SCAN_MAX_KEYWORDS),
+并校验各后端对重叠关键词 (如 'trashipping') 的命中完全一致
+
+用法:
+    python benchmarks/bench_review_matcher.py --reviews 200000 --extra-keywords 300 --sweep 0 10 20 40 60 80 120
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis import reviews  # noqa: E402
+from aegis.reviews import (  # noqa: E402
+    LOGISTICS_KEYWORDS, QUALITY_KEYWORDS, REVIEW_RESULTS, KeywordMatcher, classify_review
+)
+
+BACKENDS = ['scan', 'aho-corasick', 'regex'] if reviews.ahocorasick is not None else ['scan', 'regex']
+
+# 重叠 / 互相包含的命中, 各后端的 scan() 结果必须一致
+OVERLAP_CASES = ["trashipping", "Package delayed, fake", "slowly delivered defective 假货物流", "lateslow"]
+
+REVIEW_TEMPLATES = [
+    "Shipping took forever! Still waiting after 3 weeks...",
+    "物流太慢了,春节期间等了一个月才收到,包装还破损了",
+    "Product is fake! Terrible quality, broken on arrival!",
+    "Customer service not responding",
+    "Seller never answered my messages, very disappointed with the experience",
+    "客服态度很差, 一直不回复消息",
+    "The color is different from the pictures but it works fine",
+    "Package arrived late and the box was crushed",
+    "尺码不对, 申请退货也没人处理",
+    "Defective charger, stopped working after two days",
+]
+
+FILLER = "honestly I expected better for this price and will not order again "
+
+
+def legacy_analyze(review_text, logistics_keywords, quality_keywords):
+    """原 analyze_review_with_deepseek 的规则引擎 (对照组)"""
+    review_lower = review_text.lower()
+    if any(kw in review_lower for kw in logistics_keywords):
+        return REVIEW_RESULTS['logistics']
+    elif any(kw in review_lower for kw in quality_keywords):
+        return REVIEW_RESULTS['quality']
+    else:
+        return REVIEW_RESULTS['service']
+
+
+def synth_keywords(rng, n):
+    """随机生成 n 个中英文关键词, 模拟扩充后的词表"""
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    hanzi = np.array(list('包裹快递仓库海关运输签收退款假冒瑕疵掉色开线异味少件错发漏发'))
+    words = []
+    for i in range(n):
+        pool = letters if i % 2 == 0 else hanzi
+        words.append(''.join(rng.choice(pool, rng.integers(3, 9) if i % 2 == 0 else rng.integers(2, 4))))
+    return sorted(set(words))
+
+
+def synth_reviews(rng, n):
+    picks = rng.integers(0, len(REVIEW_TEMPLATES), n)
+    pad = rng.integers(0, 3, n)
+    return [REVIEW_TEMPLATES[p] + ' ' + FILLER * k for p, k in zip(picks, pad)]
+
+
+def run(name, fn, reviews):
+    start = time.perf_counter()
+    results = [fn(r)['category'] for r in reviews]  # 只留类别, 不把每条结果 dict 都留在内存里拖慢 GC
+    rate = len(reviews) / (time.perf_counter() - start)
+    print(f"  {name:<28} {rate:>12,.0f} reviews/s")
+    return results, rate
+
+
+def check_overlaps():
+    matchers = {backend: KeywordMatcher(reviews.REVIEW_KEYWORDS, backend=backend) for backend in BACKENDS}
+    for text in OVERLAP_CASES:
+        hits = {backend: {c: sorted(k) for c, k in m.scan(text).items()} for backend, m in matchers.items()}
+        assert all(h == hits['scan'] for h in hits.values()), (text, hits)
+    trash = matchers['scan'].scan('trashipping')
+    assert trash == {'logistics': ['shipping'], 'quality': ['trash']}, trash
+    print(f"重叠命中: {len(OVERLAP_CASES)} 条样例各后端一致 ('trashipping' -> {trash})")
+
+
+def sweep(rng, reviews_, extra, sizes):
+    """词表大小 -> 各后端 reviews/s (只分类, 不含结果组装)"""
+    print(f"\n按词表大小扫描 (当前 17 个 + n 个; 默认后端切换阈值 SCAN_MAX_KEYWORDS={reviews.SCAN_MAX_KEYWORDS}):")
+    print(f"{'关键词':>8}" + ''.join(f"{b:>14}" for b in BACKENDS) + f"{'默认后端':>16}")
+    for n in sizes:
+        half = n // 2
+        keywords = {'logistics': LOGISTICS_KEYWORDS + extra[:half], 'quality': QUALITY_KEYWORDS + extra[half:n]}
+        rates = []
+        for backend in BACKENDS:
+            matcher = KeywordMatcher(keywords, backend=backend)
+            start = time.perf_counter()
+            for r in reviews_:
+                matcher.classify(r)
+            rates.append(len(reviews_) / (time.perf_counter() - start))
+        total = len(LOGISTICS_KEYWORDS) + len(QUALITY_KEYWORDS) + n
+        print(f"{total:>8}" + ''.join(f"{r:>14,.0f}" for r in rates) + f"{KeywordMatcher(keywords).backend:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--reviews', type=int, default=200_000)
+    parser.add_argument('--extra-keywords', type=int, default=300)
+    parser.add_argument('--sweep', type=int, nargs='*', default=[0, 10, 20, 40, 60, 80, 120])
+    args = parser.parse_args()
+    check_overlaps()
+
+    rng = np.random.default_rng(42)
+    reviews = synth_reviews(rng, args.reviews)
+    extra = synth_keywords(rng, args.extra_keywords)
+    half = len(extra) // 2
+
+    keyword_sets = {
+        '当前词表': (LOGISTICS_KEYWORDS, QUALITY_KEYWORDS),
+        '扩充词表': (LOGISTICS_KEYWORDS + extra[:half], QUALITY_KEYWORDS + extra[half:]),
+    }
+    for label, (logistics, quality) in keyword_sets.items():
+        print(f"{label}: {len(logistics) + len(quality)} keywords, {len(reviews):,} reviews")
+        legacy, legacy_rate = run('any() 子串扫描', lambda r: legacy_analyze(r, logistics, quality), reviews)
+        for backend in BACKENDS:
+            matcher = KeywordMatcher({'logistics': logistics, 'quality': quality}, backend=backend)
+            # 仅类别: 与 any() 对照组同样只返回共享的结果模板; 含命中关键词: classify_review 另组装结果 dict
+            compiled, compiled_rate = run(f'{backend} (仅类别)', lambda r: REVIEW_RESULTS[matcher.classify(r)[0]],
+                                          reviews)
+            full, _ = run(f'{backend} (含命中关键词)', lambda r: classify_review(r, matcher), reviews)
+            mismatches = sum(a != b or a != c for a, b, c in zip(legacy, compiled, full))
+            print(f"  {'':<28} speedup {compiled_rate / legacy_rate:.1f}x | 分类不一致 {mismatches}")
+        print(f"  默认后端: {KeywordMatcher({'logistics': logistics, 'quality': quality}).backend}")
+
+    if args.sweep:
+        sweep(rng, reviews[:50_000], extra, args.sweep)
+
+
+if __name__ == '__main__':
+    main()
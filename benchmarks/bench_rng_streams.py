@@ -0,0 +1,79 @@
+"""
+随机数流 Benchmark: 分块店铺生成 串行 vs 进程池 的耗时与逐位一致性
+每档: 串行生成一次作为基准, 再用 --workers 个进程并行生成 / 逆序逐块生成, 逐列比对内容哈希;
+另在子进程里取同名流, 确认跨进程一致
+
+用法:
+    python benchmarks/bench_rng_streams.py --sizes 1000000 10000000 --workers 2 4
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from aegis.datagen import SHOP_CHUNK_ROWS, generate_fleet_arrays, generate_shop_chunk  # noqa: E402
+from aegis.rng import RngStreams  # noqa: E402
+
+
+def digest(arrays):
+    h = hashlib.sha256()
+    for column in sorted(arrays):
+        h.update(column.encode())
+        h.update(np.ascontiguousarray(arrays[column]).tobytes())
+    return h.hexdigest()[:16]
+
+
+def draw(streams, name):
+    return streams.generator(name).standard_normal(8).tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--chunk-rows', type=int, default=SHOP_CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    streams = RngStreams(args.seed)
+
+    with ProcessPoolExecutor(2) as pool:
+        remote = list(pool.map(draw, [streams] * 2, ['roas', 'shops']))
+    assert remote == [draw(streams, 'roas'), draw(streams, 'shops')]
+    print(f"跨进程: 同名流在子进程中取到的序列一致 (CPU 数 {os.cpu_count()})")
+
+    print(f"\n{'店铺数':>12}{'块数':>6}{'方式':>12}{'耗时 s':>9}{'万行/s':>9}  内容哈希")
+    for n in args.sizes:
+        n_chunks = -(-n // args.chunk_rows)
+        runs = {}
+
+        start = time.perf_counter()
+        runs['串行'] = generate_fleet_arrays(n, streams, chunk_rows=args.chunk_rows)
+        elapsed = {'串行': time.perf_counter() - start}
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            runs[f"{workers} 进程"] = generate_fleet_arrays(n, streams, chunk_rows=args.chunk_rows, workers=workers)
+            elapsed[f"{workers} 进程"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        chunks = {i: generate_shop_chunk(streams, i, n, args.chunk_rows) for i in reversed(range(n_chunks))}
+        runs['逆序逐块'] = {c: np.concatenate([chunks[i][c] for i in range(n_chunks)]) for c in chunks[0]}
+        elapsed['逆序逐块'] = time.perf_counter() - start
+
+        baseline = digest(runs['串行'])
+        for mode, arrays in runs.items():
+            h = digest(arrays)
+            assert h == baseline, (n, mode)
+            print(f"{n:>12,}{n_chunks:>6}{mode:>12}{elapsed[mode]:>9.2f}{n / elapsed[mode] / 1e4:>9.0f}  {h}")
+        del runs, chunks
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+店铺数据生成器 Benchmark: 逐行循环 vs 向量化批量生成
+
+用法:
+    python benchmarks/bench_shop_generator.py
+    python benchmarks/bench_shop_generator.py --sizes 1000 100000 --legacy-max 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.datagen import _name_categories, generate_shop_frame  # noqa: E402
+from aegis.schema import flag  # noqa: E402
+
+
+def legacy_generate_shop_data(n_shops, fake):
+    """原 app.py 中的逐行生成逻辑 (对照组)"""
+    shops = []
+    for i in range(n_shops):
+        base_sps = np.random.beta(8, 2) * 1.8 + 3.2
+        is_affected_by_cny = np.random.random() < 0.25
+        sps_drop = np.random.uniform(0.4, 0.9) if is_affected_by_cny else 0
+        sps_score = base_sps - sps_drop
+        is_critical = sps_score < 3.5
+        is_warning = 3.5 <= sps_score < 3.6
+
+        shops.append({
+            'shop_id': f'SHOP_{i+1:04d}',
+            'shop_name': fake.company(),
+            'sps_score': round(max(2.0, min(5.0, sps_score)), 2),
+            'daily_orders': int(np.random.lognormal(4, 1.5)),
+            'nrr': round(np.random.beta(2, 8) * 0.1, 3),
+            'shipping_delay_rate': round(np.random.beta(2, 5) * 0.3, 3),
+            'is_critical': is_critical,
+            'is_warning': is_warning,
+            'smart_promo_eligible': sps_score >= 3.5,
+            'region': np.random.choice(['US-East', 'US-West', 'UK', 'EU'], p=[0.4, 0.3, 0.2, 0.1]),
+            'affected_by_cny': is_affected_by_cny
+        })
+
+    return pd.DataFrame(shops)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def summarize(df):
+    # 向量化版本是紧凑 Schema (布尔列打包在 flags 里), 逐行版本仍是旧版布尔列
+    packed = 'flags' in df.columns
+    critical = flag(df, 'is_critical') if packed else df['is_critical'].to_numpy()
+    cny = flag(df, 'affected_by_cny') if packed else df['affected_by_cny'].to_numpy()
+    return (
+        f"mean_sps={df['sps_score'].mean():.3f} "
+        f"critical={critical.mean() * 100:.1f}% "
+        f"cny={cny.mean() * 100:.1f}%"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=1_000_000,
+                        help='超过该规模时跳过逐行版本 (1M 逐行约需数分钟)')
+    args = parser.parse_args()
+
+    np.random.seed(42)
+    fake = Faker(['zh_CN', 'en_US'])
+    fake.seed_instance(42)
+
+    # 名称池 (及其 category 编码) 只构建一次, 与 Streamlit 进程内的行为一致
+    _, pool_time = timed(_name_categories)
+    print(f"name pool build: {pool_time * 1000:.1f} ms (一次性)")
+    print(f"{'shops':>10} | {'legacy (s)':>11} | {'vectorized (s)':>14} | {'speedup':>8}")
+    print('-' * 54)
+
+    for n in args.sizes:
+        vec_df, vec_time = timed(generate_shop_frame, n)
+        if n <= args.legacy_max:
+            legacy_df, legacy_time = timed(legacy_generate_shop_data, n, fake)
+            legacy_col = f"{legacy_time:>11.3f}"
+            speedup = f"{legacy_time / vec_time:>7.0f}x"
+        else:
+            legacy_df = None
+            legacy_col = f"{'skipped':>11}"
+            speedup = f"{'-':>8}"
+        print(f"{n:>10,} | {legacy_col} | {vec_time:>14.3f} | {speedup}")
+        print(f"{'':>10}   vectorized: {summarize(vec_df)}")
+        if legacy_df is not None:
+            print(f"{'':>10}   legacy:     {summarize(legacy_df)}")
+
+
+if __name__ == '__main__':
+    main()
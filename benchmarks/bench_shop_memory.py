@@ -0,0 +1,37 @@
+"""
+店铺表内存报告: 旧版布局 vs 紧凑 Schema (每店铺字节数)
+
+用法:
+    python benchmarks/bench_shop_memory.py --shops 1000000
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aegis.datagen import generate_shop_frame  # noqa: E402
+from aegis.schema import memory_report  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--shops', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    pd.set_option('display.width', 140)
+    for n in args.shops:
+        report = memory_report(generate_shop_frame(n))
+        total = report.iloc[-1]
+        ratio = total['legacy_bytes_per_shop'] / total['compact_bytes_per_shop']
+        print(f"\n=== {n:,} shops ===")
+        print(report.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        print(f"总内存: {total['legacy_bytes_per_shop'] * n / 2**20:.1f} MiB -> "
+              f"{total['compact_bytes_per_shop'] * n / 2**20:.1f} MiB ({ratio:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
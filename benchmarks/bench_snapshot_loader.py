@@ -0,0 +1,100 @@
+"""
+快照加载冷启动 Benchmark: Faker 生成 vs Parquet vs Arrow IPC (内存映射), 默认 1000 万行
+每种方式在全新子进程中加载 (含 import 与 ShopSnapshot 构建), 报告耗时和进程峰值 RSS;
+另测列投影 + 区域/档位谓词下推的部分加载. 注意: 文件刚写完, 操作系统页缓存是热的
+
+用法:
+    python benchmarks/bench_snapshot_loader.py --rows 10000000 --dir /tmp/aegis_bench
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CASES = [
+    # (名称, 模式, 文件扩展名)
+    ('Faker 生成', 'generate', None),
+    ('Parquet 全表', 'full', 'parquet'),
+    ('Arrow IPC 全表 (mmap)', 'full', 'arrow'),
+    ('Parquet 投影+谓词', 'partial', 'parquet'),
+    ('Arrow IPC 投影+谓词', 'partial', 'arrow'),
+]
+
+PARTIAL = dict(columns=['shop_id', 'sps_score', 'daily_orders', 'region'], regions=['UK'], tiers=['critical', 'warning'])
+
+
+def peak_rss_mb():
+    """本进程峰值 RSS (VmHWM; ru_maxrss 会继承父进程的值)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def child(mode, path, rows):
+    """子进程: 冷启动一次加载, 输出 JSON"""
+    start = time.perf_counter()
+    if mode == 'generate':
+        from aegis.datagen import generate_shop_frame
+        from aegis.snapshot import ShopSnapshot
+        n = len(ShopSnapshot(generate_shop_frame(rows, seed=42)))
+    elif mode == 'full':
+        from aegis.snapshot import ShopSnapshot
+        from aegis.storage import load_shop_frame
+        n = len(ShopSnapshot(load_shop_frame(path)))
+    else:
+        from aegis.storage import load_shop_frame
+        n = len(load_shop_frame(path, **PARTIAL))
+    seconds = time.perf_counter() - start
+    print(json.dumps({'rows': n, 'seconds': seconds, 'rss_mb': peak_rss_mb()}))
+
+
+def run_child(mode, path, rows):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, '--path', path or '', '--rows', str(rows)],
+        check=True, capture_output=True, text=True, cwd=ROOT,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--dir', default='/tmp/aegis_bench')
+    parser.add_argument('--child', choices=['generate', 'full', 'partial'])
+    parser.add_argument('--path')
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.path, args.rows)
+        return
+
+    from aegis.datagen import generate_shop_frame
+    from aegis.storage import write_shop_frame
+
+    os.makedirs(args.dir, exist_ok=True)
+    paths = {ext: os.path.join(args.dir, f'shops_{args.rows}.{ext}') for ext in ('parquet', 'arrow')}
+    if not all(os.path.exists(p) for p in paths.values()):
+        df = generate_shop_frame(args.rows, seed=42)
+        for ext, path in paths.items():
+            start = time.perf_counter()
+            write_shop_frame(df, path)
+            print(f"写入 {ext:<8}{os.path.getsize(path) / 2**20:>9,.1f} MB  {time.perf_counter() - start:.1f}s")
+        del df
+
+    print(f"\n{args.rows:,} 行冷启动 (新进程, 含 import):")
+    print(f"{'方式':<26}{'行数':>12}{'耗时 s':>9}{'峰值 RSS MB':>13}")
+    for name, mode, ext in CASES:
+        result = run_child(mode, paths.get(ext), args.rows)
+        print(f"{name:<24}{result['rows']:>12,}{result['seconds']:>9.2f}{result['rss_mb']:>13,.0f}")
+
+
+if __name__ == '__main__':
+    main()
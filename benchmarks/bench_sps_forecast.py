@@ -0,0 +1,66 @@
+"""
+SPS 跌破风险预测 Benchmark: 全量店铺批量拟合 + 72 小时外推的耗时
+每档报告: 历史生成 / 趋势拟合 (加权最小二乘) / 跌破概率与 ETA 外推 / 对齐到快照 的耗时,
+以及预计 72h 内跌破的店铺数; 另抽样与逐店铺 np.polyfit 对照, 确认批量解一致
+
+用法:
+    python benchmarks/bench_sps_forecast.py --sizes 10000 100000 1000000 --days 30
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from aegis.datagen import generate_shop_frame, generate_sps_history  # noqa: E402
+from aegis.forecast import HALFLIFE_DAYS, SpsForecast, breach_forecast, fit_trend  # noqa: E402
+from aegis.snapshot import ShopSnapshot  # noqa: E402
+
+
+def check_polyfit(history, fit, samples=200, seed=0):
+    """抽样逐店铺加权 polyfit, 返回斜率最大偏差"""
+    n_days = history.shape[1]
+    t = np.arange(n_days) - (n_days - 1.0)
+    w = 0.5 ** (-t / HALFLIFE_DAYS)
+    rows = np.random.default_rng(seed).choice(len(history), min(samples, len(history)), replace=False)
+    slopes = np.array([np.polyfit(t, history[i].astype(np.float64), 1, w=np.sqrt(w))[0] for i in rows])
+    return np.abs(slopes - fit.slope[rows]).max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'店铺数':>10}{'历史 ms':>10}{'拟合 ms':>10}{'外推 ms':>10}{'对齐 ms':>10}{'72h 风险':>10}{'斜率偏差':>11}")
+    for n in args.sizes:
+        snapshot = ShopSnapshot(generate_shop_frame(n, seed=42))
+
+        start = time.perf_counter()
+        history = generate_sps_history(snapshot.column('sps_score'), snapshot.flag('affected_by_cny'), days=args.days)
+        history_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        fit = fit_trend(history)
+        fit_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        breach_prob, eta_hours = breach_forecast(fit)
+        project_ms = (time.perf_counter() - start) * 1e3
+
+        forecast = SpsForecast(snapshot.column('shop_id'), breach_prob, eta_hours, fit.slope)
+        start = time.perf_counter()
+        at_risk = int(forecast.at_risk(snapshot).sum())
+        align_ms = (time.perf_counter() - start) * 1e3
+
+        print(f"{n:>10,}{history_ms:>10.0f}{fit_ms:>10.0f}{project_ms:>10.0f}{align_ms:>10.0f}"
+              f"{at_risk:>10,}{check_polyfit(history, fit):>11.1e}")
+
+
+if __name__ == '__main__':
+    main()